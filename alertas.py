@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Alertas de eventos próximos e de saldos vencidos, calculados uma vez por dia
+
+gerar_alertas() grava na tabela alerta:
+- 'proximo': eventos agendados entre hoje e o maior horizonte (uma consulta
+  por faixa de data_evento, então um evento que caiu num fim de semana ou
+  com o servidor desligado continua avisando até a data);
+  o nível é o do menor horizonte que contém o evento (ex: 3 dias 'urgente',
+  7 dias 'semana');
+- 'vencido': eventos já passados, não cancelados, com saldo a receber
+  (até DIAS_VENCIDOS atrás).
+
+Cada execução marca os alertas do seu escopo, faz um upsert por (evento,
+categoria) e remove os que continuaram marcados. Um alerta reconhecido continua reconhecido enquanto o nível
+não muda; se o evento passa de 'semana' para 'urgente', volta a aparecer.
+A leitura da API é uma consulta nessa tabela pequena.
+"""
+
+HORIZONTES = {3: 'urgente', 7: 'semana'}  # dias até o evento -> nível
+DIAS_VENCIDOS = 180
+
+_TABELAS = (
+    "CREATE TABLE IF NOT EXISTS alerta ("
+    "id INTEGER PRIMARY KEY, evento_id INTEGER NOT NULL, categoria VARCHAR(20) NOT NULL, "
+    "nivel VARCHAR(20) NOT NULL, dias INTEGER NOT NULL, valor FLOAT NOT NULL, "
+    "gerado_em DATE NOT NULL, reconhecido_em DATETIME, "
+    "UNIQUE (evento_id, categoria))",
+    "CREATE TABLE IF NOT EXISTS alerta_execucao (id INTEGER PRIMARY KEY CHECK (id = 1), dia DATE NOT NULL)",
+)
+
+_SALDO = "ROUND(valor_negociado - COALESCE(valor_pago, 0), 2)"
+_DIAS = "CAST(julianday({a}) - julianday({b}) AS INTEGER)"
+
+_UPSERT = """
+    ON CONFLICT (evento_id, categoria) DO UPDATE SET
+        nivel = excluded.nivel, dias = excluded.dias, valor = excluded.valor, gerado_em = excluded.gerado_em,
+        reconhecido_em = CASE WHEN alerta.nivel = excluded.nivel THEN alerta.reconhecido_em END
+"""
+
+
+def instalar_alertas(conexao):
+    """Cria as tabelas de alertas (idempotente)"""
+    for comando in _TABELAS:
+        conexao.exec_driver_sql(comando)
+
+
+def _filtro(eventos, coluna):
+    if eventos is None:
+        return '', ()
+    return f"AND {coluna} IN ({', '.join('?' * len(eventos))})", tuple(eventos)
+
+
+def gerar_alertas(conexao, hoje, horizontes=HORIZONTES, dias_vencidos=DIAS_VENCIDOS, eventos=None):
+    """Recalcula os alertas do dia (de todos os eventos ou só dos informados)
+
+    Retorna um dict com as quantidades de alertas 'proximos' e 'vencidos' gerados.
+    """
+    if eventos is not None and not eventos:
+        return {'proximos': 0, 'vencidos': 0}
+    dia = hoje.isoformat()
+    dias_ate = _DIAS.format(a='data_evento', b='?')
+    niveis = ' '.join(f"WHEN {dias_ate} <= {dias} THEN '{nivel}'" for dias, nivel in sorted(horizontes.items()))
+    filtro, ids = _filtro(eventos, 'id')
+
+    # Marca os alertas do escopo; o upsert desmarca os que continuam valendo
+    filtro_alerta, _ = _filtro(eventos, 'evento_id')
+    conexao.exec_driver_sql(f"UPDATE alerta SET gerado_em = '' WHERE 1 = 1 {filtro_alerta}", ids)
+    proximos = conexao.exec_driver_sql(
+        f"INSERT INTO alerta (evento_id, categoria, nivel, dias, valor, gerado_em) "
+        f"SELECT id, 'proximo', CASE {niveis} END, {dias_ate}, {_SALDO}, ? FROM evento "
+        f"WHERE status = 'Agendado' AND data_evento >= ? AND data_evento <= date(?, ?) {filtro} {_UPSERT}",
+        (dia,) * (len(horizontes) + 4) + (f'+{max(horizontes)} days',) + ids,
+    ).rowcount
+    vencidos = conexao.exec_driver_sql(
+        f"INSERT INTO alerta (evento_id, categoria, nivel, dias, valor, gerado_em) "
+        f"SELECT id, 'vencido', 'vencido', {_DIAS.format(a='?', b='data_evento')}, {_SALDO}, ? FROM evento "
+        f"WHERE data_evento < ? AND data_evento >= date(?, ?) AND status != 'Cancelado' AND {_SALDO} > 0 "
+        f"{filtro} {_UPSERT}",
+        (dia, dia, dia, dia, f'-{dias_vencidos} days') + ids,
+    ).rowcount
+
+    # O que não foi gerado agora deixou de valer (evento pago, cancelado, excluído ou já passou)
+    conexao.exec_driver_sql("DELETE FROM alerta WHERE gerado_em = ''")
+    if eventos is None:
+        conexao.exec_driver_sql(
+            "INSERT INTO alerta_execucao (id, dia) VALUES (1, ?) ON CONFLICT (id) DO UPDATE SET dia = excluded.dia",
+            (dia,),
+        )
+    return {'proximos': proximos, 'vencidos': vencidos}
+
+
+def gerados_em(conexao):
+    """Dia da última execução completa (None se nunca executou)"""
+    return conexao.exec_driver_sql("SELECT dia FROM alerta_execucao WHERE id = 1").scalar()
+
+
+def ler_alertas(conexao, incluir_reconhecidos=False):
+    """Lista os alertas com os dados do evento: vencidos, depois os próximos pela data"""
+    filtro = '' if incluir_reconhecidos else 'WHERE a.reconhecido_em IS NULL'
+    linhas = conexao.exec_driver_sql(
+        "SELECT a.id, a.evento_id, a.categoria, a.nivel, a.dias, a.valor, a.reconhecido_em, "
+        "e.cliente, e.tipo_servico, e.data_evento "
+        f"FROM alerta a JOIN evento e ON e.id = a.evento_id {filtro} "
+        "ORDER BY a.categoria = 'proximo', e.data_evento, a.id"
+    )
+    return [
+        {
+            'id': id, 'evento_id': evento_id, 'categoria': categoria, 'tipo': nivel, 'dias': dias,
+            'valor': valor, 'reconhecido': reconhecido_em is not None,
+            'cliente': cliente, 'tipo_servico': tipo_servico, 'data_evento': data_evento,
+        }
+        for id, evento_id, categoria, nivel, dias, valor, reconhecido_em, cliente, tipo_servico, data_evento in linhas
+    ]
+
+
+def reconhecer(conexao, id, momento):
+    """Marca o alerta como reconhecido; retorna False se ele não existe"""
+    return conexao.exec_driver_sql(
+        "UPDATE alerta SET reconhecido_em = ? WHERE id = ?", (momento.isoformat(sep=' '), id)
+    ).rowcount == 1
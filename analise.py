@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Totais mensais para os gráficos e a API de análise
+
+Duas tabelas guardam os totais por mês ('YYYY-MM'):
+- analise_eventos_mes: por tipo de serviço e status (quantidade, negociado,
+  recebido e a receber);
+- analise_caixa_mes: por categoria e tipo de transação (quantidade e valor).
+
+Triggers em evento e transacao só anotam em analise_meses_pendentes o mês
+de cada linha escrita (o antigo e o novo, numa edição). atualizar_analise()
+recalcula apenas esses meses, cada um pelo índice de data, e limpa a lista:
+uma importação grande marca poucos meses e é consolidada de uma vez, e a
+leitura dos gráficos percorre meses, não eventos.
+"""
+
+CATEGORIA_VAZIA = 'Sem categoria'
+
+_TABELAS = (
+    "CREATE TABLE IF NOT EXISTS analise_meses_pendentes (mes VARCHAR(7) PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS analise_eventos_mes ("
+    "mes VARCHAR(7) NOT NULL, tipo_servico VARCHAR(50) NOT NULL, status VARCHAR(20) NOT NULL, "
+    "eventos INTEGER NOT NULL, negociado FLOAT NOT NULL, recebido FLOAT NOT NULL, pendente FLOAT NOT NULL, "
+    "PRIMARY KEY (mes, tipo_servico, status))",
+    "CREATE TABLE IF NOT EXISTS analise_caixa_mes ("
+    "mes VARCHAR(7) NOT NULL, categoria VARCHAR(50) NOT NULL, tipo VARCHAR(20) NOT NULL, "
+    "transacoes INTEGER NOT NULL, valor FLOAT NOT NULL, "
+    "PRIMARY KEY (mes, categoria, tipo))",
+)
+
+# Tabela de origem -> (coluna de data, colunas que mudam os totais)
+TABELAS = {
+    'evento': ('data_evento', ('tipo_servico', 'status', 'valor_negociado', 'valor_pago', 'data_evento')),
+    'transacao': ('data_transacao', ('tipo', 'categoria', 'valor', 'data_transacao')),
+}
+
+# Linhas de cada mês pendente, pela faixa de datas (usa os índices de data)
+_DO_MES = (
+    "JOIN analise_meses_pendentes p "
+    "ON {data} >= p.mes || '-01' AND {data} < date(p.mes || '-01', '+1 month')"
+)
+
+_RECALCULAR = (
+    "INSERT INTO analise_eventos_mes (mes, tipo_servico, status, eventos, negociado, recebido, pendente) "
+    "SELECT p.mes, e.tipo_servico, COALESCE(e.status, 'Agendado'), COUNT(*), "
+    "ROUND(TOTAL(e.valor_negociado), 2), ROUND(TOTAL(e.valor_pago), 2), "
+    "ROUND(TOTAL(CASE WHEN e.status != 'Cancelado' "
+    "THEN MAX(e.valor_negociado - COALESCE(e.valor_pago, 0), 0) ELSE 0 END), 2) "
+    f"FROM evento e {_DO_MES.format(data='e.data_evento')} "
+    "GROUP BY 1, 2, 3",
+
+    "INSERT INTO analise_caixa_mes (mes, categoria, tipo, transacoes, valor) "
+    f"SELECT p.mes, COALESCE(NULLIF(t.categoria, ''), '{CATEGORIA_VAZIA}'), t.tipo, COUNT(*), ROUND(TOTAL(t.valor), 2) "
+    f"FROM transacao t {_DO_MES.format(data='t.data_transacao')} "
+    "GROUP BY 1, 2, 3",
+)
+
+
+def _marcar(linha, data):
+    return (
+        f"INSERT OR IGNORE INTO analise_meses_pendentes (mes) "
+        f"SELECT strftime('%Y-%m', {linha}.{data}) WHERE {linha}.{data} IS NOT NULL;"
+    )
+
+
+def instalar_analise(conexao):
+    """Cria as tabelas e os triggers que marcam os meses alterados (idempotente)"""
+    for comando in _TABELAS:
+        conexao.exec_driver_sql(comando)
+    for tabela, (data, colunas) in TABELAS.items():
+        conexao.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS analise_{tabela}_insert AFTER INSERT ON {tabela}\n"
+            f"BEGIN\n    {_marcar('NEW', data)}\nEND"
+        )
+        conexao.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS analise_{tabela}_delete AFTER DELETE ON {tabela}\n"
+            f"BEGIN\n    {_marcar('OLD', data)}\nEND"
+        )
+        conexao.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS analise_{tabela}_update AFTER UPDATE OF {', '.join(colunas)} ON {tabela}\n"
+            f"BEGIN\n    {_marcar('OLD', data)}\n    {_marcar('NEW', data)}\nEND"
+        )
+
+
+def ha_pendentes(conexao):
+    return conexao.exec_driver_sql("SELECT EXISTS (SELECT 1 FROM analise_meses_pendentes)").scalar() == 1
+
+
+def atualizar_analise(conexao):
+    """Recalcula os meses marcados pelos triggers e retorna quantos foram atualizados"""
+    meses = conexao.exec_driver_sql("SELECT COUNT(*) FROM analise_meses_pendentes").scalar()
+    if not meses:
+        return 0
+    for tabela in ('analise_eventos_mes', 'analise_caixa_mes'):
+        conexao.exec_driver_sql(f"DELETE FROM {tabela} WHERE mes IN (SELECT mes FROM analise_meses_pendentes)")
+    for comando in _RECALCULAR:
+        conexao.exec_driver_sql(comando)
+    conexao.exec_driver_sql("DELETE FROM analise_meses_pendentes")
+    return meses
+
+
+def reconstruir_analise(conexao):
+    """Marca todos os meses com eventos ou transações e recalcula tudo"""
+    conexao.exec_driver_sql("DELETE FROM analise_eventos_mes")
+    conexao.exec_driver_sql("DELETE FROM analise_caixa_mes")
+    for tabela, (data, _) in TABELAS.items():
+        conexao.exec_driver_sql(
+            f"INSERT OR IGNORE INTO analise_meses_pendentes (mes) "
+            f"SELECT DISTINCT strftime('%Y-%m', {data}) FROM {tabela} WHERE {data} IS NOT NULL"
+        )
+    return atualizar_analise(conexao)
+
+
+def _periodo(inicio, fim):
+    filtro, parametros = [], []
+    if inicio:
+        filtro.append("mes >= ?")
+        parametros.append(inicio)
+    if fim:
+        filtro.append("mes <= ?")
+        parametros.append(fim)
+    return (" WHERE " + " AND ".join(filtro)) if filtro else "", tuple(parametros)
+
+
+def ler_analise(conexao, inicio=None, fim=None):
+    """Lê os totais consolidados entre os meses inicio e fim ('YYYY-MM', inclusivos)
+
+    Retorna um dict com as listas 'meses' (uma linha por mês),
+    'servicos' (por tipo de serviço e mês) e 'categorias' (por categoria e
+    tipo de transação, somando o período).
+    """
+    onde, parametros = _periodo(inicio, fim)
+    eventos = conexao.exec_driver_sql(
+        "SELECT mes, SUM(eventos), ROUND(SUM(negociado), 2), ROUND(SUM(recebido), 2), ROUND(SUM(pendente), 2), "
+        "SUM(CASE WHEN status = 'Agendado' THEN eventos ELSE 0 END), "
+        "SUM(CASE WHEN status = 'Realizado' THEN eventos ELSE 0 END), "
+        "SUM(CASE WHEN status = 'Cancelado' THEN eventos ELSE 0 END) "
+        f"FROM analise_eventos_mes{onde} GROUP BY mes", parametros
+    )
+    caixa = conexao.exec_driver_sql(
+        "SELECT mes, ROUND(TOTAL(CASE WHEN tipo = 'Entrada' THEN valor END), 2), "
+        "ROUND(TOTAL(CASE WHEN tipo = 'Saída' THEN valor END), 2) "
+        f"FROM analise_caixa_mes{onde} GROUP BY mes", parametros
+    )
+
+    meses = {}
+    vazio = {'eventos': 0, 'negociado': 0.0, 'recebido': 0.0, 'pendente': 0.0, 'agendados': 0,
+             'realizados': 0, 'cancelados': 0, 'entradas': 0.0, 'saidas': 0.0}
+    for mes, total, negociado, recebido, pendente, agendados, realizados, cancelados in eventos:
+        meses.setdefault(mes, dict(vazio, mes=mes)).update(
+            eventos=total, negociado=negociado, recebido=recebido, pendente=pendente,
+            agendados=agendados, realizados=realizados, cancelados=cancelados,
+        )
+    for mes, entradas, saidas in caixa:
+        meses.setdefault(mes, dict(vazio, mes=mes)).update(entradas=entradas, saidas=saidas)
+
+    servicos = conexao.exec_driver_sql(
+        "SELECT mes, tipo_servico, SUM(eventos), ROUND(SUM(negociado), 2), ROUND(SUM(recebido), 2) "
+        f"FROM analise_eventos_mes{onde} GROUP BY mes, tipo_servico ORDER BY mes, tipo_servico", parametros
+    )
+    categorias = conexao.exec_driver_sql(
+        "SELECT categoria, tipo, SUM(transacoes), ROUND(SUM(valor), 2) "
+        f"FROM analise_caixa_mes{onde} GROUP BY categoria, tipo ORDER BY categoria, tipo", parametros
+    )
+    return {
+        'meses': [meses[mes] for mes in sorted(meses)],
+        'servicos': [
+            {'mes': mes, 'tipo_servico': tipo, 'eventos': total, 'negociado': negociado, 'recebido': recebido}
+            for mes, tipo, total, negociado, recebido in servicos
+        ],
+        'categorias': [
+            {'categoria': categoria, 'tipo': tipo, 'transacoes': total, 'valor': valor}
+            for categoria, tipo, total, valor in categorias
+        ],
+    }
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Perfil de conexão do SQLite para uso simultâneo (vários usuários no sistema)
+
+- PRAGMAs aplicados a cada conexão nova do pool: WAL (leitores não esperam
+  pelo escritor), synchronous=NORMAL, busy_timeout, mmap e cache;
+- escritas passam por um único caminho: escrita() segura uma trava do
+  processo e faz a transação começar com BEGIN IMMEDIATE, que reserva o
+  banco logo no início. Assim uma transação de escrita nunca descobre no
+  meio do caminho que outra já está gravando ('database is locked'); ela
+  espera a vez na trava (ou no busy_timeout, se for outro processo).
+
+Leituras continuam com BEGIN comum e, no modo WAL, nunca são bloqueadas.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+PERFIS = {
+    # Configuração padrão do SQLite (journal em arquivo, sem espera por travas)
+    'simples': {},
+    'producao': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,           # ms
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,       # KiB (negativo = tamanho em memória)
+        'temp_store': 'MEMORY',
+    },
+}
+
+trava_escrita = threading.RLock()
+_estado = threading.local()
+
+
+def instalar_perfil(engine, pragmas):
+    """Aplica os PRAGMAs em cada conexão e assume o controle do BEGIN"""
+
+    @event.listens_for(engine, 'connect')
+    def _configurar(conexao_dbapi, registro):
+        # O driver sqlite3 passa a não abrir transações sozinho; o BEGIN vem do evento abaixo
+        conexao_dbapi.isolation_level = None
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nome} = {valor}")
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _iniciar(conexao):
+        conexao.exec_driver_sql('BEGIN IMMEDIATE' if em_escrita() else 'BEGIN')
+
+
+def em_escrita():
+    return getattr(_estado, 'escrita', 0) > 0
+
+
+def iniciar_escrita():
+    """Entra no caminho de escrita (bloqueia até os outros escritores terminarem)"""
+    trava_escrita.acquire()
+    _estado.escrita = getattr(_estado, 'escrita', 0) + 1
+
+
+def finalizar_escrita():
+    _estado.escrita -= 1
+    trava_escrita.release()
+
+
+@contextmanager
+def escrita():
+    """Executa o bloco como escritor: uma escrita por vez, transação com BEGIN IMMEDIATE"""
+    iniciar_escrita()
+    try:
+        yield
+    finally:
+        finalizar_escrita()
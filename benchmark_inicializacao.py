@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do tempo de inicialização (python -X importtime)
+Mede, em processos novos, o que os scripts (create_app + app_context) e o
+test client pagam antes de fazer qualquer trabalho: tempo total do processo,
+tempo gasto em imports e os pacotes mais pesados (o custo de cada pacote
+aparece no primeiro módulo que o importa). pandas e openpyxl servem de
+referência do custo evitado: só a importação e a exportação os carregam.
+Termina com código 1 se algum deles for carregado na inicialização.
+Execute: python benchmark_inicializacao.py [--repeticoes 5] [--pacotes 8]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+PESADOS = ('pandas', 'openpyxl')
+
+ALVOS = {
+    'scripts (create_app + app_context)': (
+        "from app import create_app\n"
+        "with create_app().app_context():\n"
+        "    pass\n"
+    ),
+    'test client (GET /metrics)': (
+        "from app import create_app\n"
+        "create_app({'TESTING': True}).test_client().get('/metrics')\n"
+    ),
+}
+REFERENCIAS = {f'referência: import {pacote}': f'import {pacote}\n' for pacote in PESADOS}
+
+# import time: self [us] | cumulative | imported package
+LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)')
+
+
+def medir(codigo, pasta):
+    """Roda o código num processo novo
+
+    Retorna (ms do processo, ms em imports, {pacote: ms} dos imports feitos
+    pelos módulos de primeiro nível, como app -> flask, pesados carregados).
+    """
+    verificacao = f"\nimport sys\nprint(','.join(p for p in {PESADOS!r} if p in sys.modules))\n"
+    ambiente = dict(os.environ, PYTHONPATH=PASTA_APP,
+                    FOTOGRAFIA_BANCO='sqlite:///' + os.path.join(pasta, 'inicializacao.db'))
+    comeco = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo + verificacao],
+                              cwd=pasta, env=ambiente, capture_output=True, text=True)
+    total = (time.perf_counter() - comeco) * 1000
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+
+    imports, pacotes = 0.0, {}
+    for linha in processo.stderr.splitlines():
+        encontrado = LINHA_IMPORTTIME.match(linha)
+        if not encontrado:
+            continue
+        nivel = len(encontrado.group(3)) // 2  # Dois espaços de recuo por nível
+        if nivel == 0:
+            imports += int(encontrado.group(2)) / 1000
+        elif nivel == 1:
+            pacotes[encontrado.group(4)] = int(encontrado.group(2)) / 1000
+    pesados = [p for p in processo.stdout.strip().split(',') if p]
+    return total, imports, pacotes, pesados
+
+
+def executar(repeticoes, quantidade_pacotes):
+    pasta = tempfile.mkdtemp(prefix='benchmark_inicializacao_')
+    problemas = []
+    try:
+        print(f"🚀 Inicialização | {repeticoes} repetições | Python {sys.version.split()[0]}")
+        print(f"   {'alvo':<38} {'processo':>10} {'imports':>10}  pesados")
+        for nome, codigo in {**ALVOS, **REFERENCIAS}.items():
+            medidas = [medir(codigo, pasta) for _ in range(repeticoes)]
+            processo = statistics.median(m[0] for m in medidas)
+            imports = statistics.median(m[1] for m in medidas)
+            pacotes, pesados = medidas[-1][2], medidas[-1][3]
+            print(f"   {nome:<38} {processo:>8.0f}ms {imports:>8.0f}ms  {', '.join(pesados) or '-'}")
+            if nome in ALVOS:
+                if pesados:
+                    problemas.append(f"{nome}: carregou {', '.join(pesados)} na inicialização")
+                for pacote, ms in sorted(pacotes.items(), key=lambda item: -item[1])[:quantidade_pacotes]:
+                    print(f"      {pacote:<35} {ms:>8.1f}ms")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return problemas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização do app com python -X importtime")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--pacotes', type=int, default=8, help="pacotes mais pesados listados por alvo")
+    args = parser.parse_args()
+
+    problemas = executar(args.repeticoes, args.pacotes)
+    for problema in problemas:
+        print(f"   ❌ {problema}")
+    print("✅ pandas e openpyxl fora da inicialização" if not problemas else f"❌ {len(problemas)} problemas")
+    sys.exit(1 if problemas else 0)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da renderização de tabelas grandes sobre um banco temporário
+Compara a renderização das linhas sem cache, com o cache frio (custo extra de
+guardar cada linha), com o cache quente e depois de editar 1% das linhas
+Execute: python benchmark_renderizacao.py [--linhas 10000] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+EDITADAS = 0.01  # fração das linhas alteradas entre duas renderizações
+
+def preparar_banco(pasta, linhas):
+    os.environ['FOTOGRAFIA_BANCO'] = 'sqlite:///' + os.path.join(pasta, 'renderizacao.db')
+    from app import create_app
+    from modelos import db, inicializar_banco
+
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        with db.engine.begin() as conexao:
+            conexao.exec_driver_sql(
+                f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {linhas}) "
+                "INSERT INTO evento (cliente, tipo_servico, data_evento, valor_negociado, valor_pago, status, ensaios_extras, data_cadastro) "
+                "SELECT 'Cliente ' || i, 'Fotografia', date('now', (i % 365 - 180) || ' days'), 1500 + i, i % 1500, "
+                "'Agendado', 'Nenhum', datetime('now') FROM n"
+            )
+            conexao.exec_driver_sql(
+                f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {linhas}) "
+                "INSERT INTO transacao (tipo, valor, descricao, data_transacao, categoria) "
+                "SELECT CASE i % 2 WHEN 0 THEN 'Entrada' ELSE 'Saída' END, i * 1.37, 'Lançamento ' || i, "
+                "date('now', (i % 365 - 180) || ' days'), 'Outros' FROM n"
+            )
+    return app, db
+
+def medir(funcao, repeticoes):
+    """Menor tempo entre as repetições (em segundos)"""
+    tempos = []
+    for _ in range(repeticoes):
+        comeco = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - comeco)
+    return min(tempos)
+
+def benchmark_tabelas(app, db, repeticoes):
+    from modelos import Evento, Transacao
+    from servicos import renderizar_linha
+
+    with app.app_context():
+        tabelas = [
+            ('eventos', '_linha_evento.html', 'evento', Evento.query.order_by(Evento.id).all()),
+            ('transações', '_linha_transacao.html', 'transacao', Transacao.query.order_by(Transacao.id).all()),
+        ]
+        for rotulo, modelo, nome, registros in tabelas:
+            template = app.jinja_env.get_template(modelo)
+            sem_cache = medir(lambda: ''.join(template.render({nome: r}) for r in registros), repeticoes)
+
+            def renderizar_frio():
+                app.extensions['cache_linhas'].limpar()
+                return ''.join(renderizar_linha(modelo, nome, r) for r in registros)
+            frio = medir(renderizar_frio, repeticoes)
+            quente = medir(lambda: ''.join(renderizar_linha(modelo, nome, r) for r in registros), repeticoes)
+
+            # Uma escrita muda a versão só das linhas alteradas: as outras continuam no cache
+            modelo_registro = type(registros[0])
+            passo = int(1 / EDITADAS)
+            coluna = 'valor_pago' if modelo_registro is Evento else 'valor'
+            db.session.rollback()
+            with db.engine.begin() as conexao:
+                conexao.exec_driver_sql(f"UPDATE {modelo_registro.__tablename__} SET {coluna} = {coluna} + 1 "
+                                        f"WHERE id % {passo} = 0")
+            registros = modelo_registro.query.order_by(modelo_registro.id).all()
+            editadas = medir(lambda: ''.join(renderizar_linha(modelo, nome, r) for r in registros), 1)
+
+            por_linha = (frio - sem_cache) / len(registros) * 1e6
+            # Renderizações de cada linha até o cache compensar o custo de guardá-la
+            empate = (frio - quente) / max(sem_cache - quente, 1e-9)
+            print(f"📄 {len(registros)} linhas de {rotulo}: sem cache {sem_cache * 1000:.0f} ms | "
+                  f"cache frio {frio * 1000:.0f} ms ({por_linha:+.1f} µs/linha) | "
+                  f"cache quente {quente * 1000:.0f} ms ({sem_cache / quente:.0f}x) | "
+                  f"{EDITADAS:.0%} editadas {editadas * 1000:.0f} ms")
+            print(f"   compensa a partir de {empate:.2f} renderizações por versão da linha")
+
+        # Cada escrita incrementa o contador uma única vez (ver versao_dados.py)
+        evento = Evento.query.order_by(Evento.id).first()
+        antes = evento.versao
+        evento.valor_pago += 1
+        db.session.commit()
+        assert evento.versao > antes, "versão da linha não mudou"
+        versao_dados = db.session.execute(db.text("SELECT versao FROM versao_dados")).scalar()
+        assert versao_dados == evento.versao, "o contador foi incrementado mais de uma vez"
+        print(f"🔁 Linha editada: versão {antes} -> {evento.versao} (HTML renderizado de novo só para ela)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da renderização de tabelas grandes")
+    parser.add_argument('--linhas', type=int, default=10000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='benchmark_renderizacao_')
+    try:
+        app, db = preparar_banco(pasta, args.linhas)
+        benchmark_tabelas(app, db, args.repeticoes)
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark das páginas e APIs com dados sintéticos (ver dados_sinteticos.py)
+Para cada tamanho, gera um banco (ou reaproveita o de --pasta) e mede em cada rota:
+- p50/p95 do tempo de resposta com os caches vazios (o custo real da consulta)
+  e p50 com o cache de respostas quente;
+- quantidade de consultas SQL por requisição;
+- pico de memória alocada durante a requisição (tracemalloc, medido à parte).
+O resultado vai para um JSON; com --base, compara com uma execução anterior e
+termina com código 1 se alguma rota piorou além da tolerância.
+Execute: python benchmark_rotas.py [--tamanhos 1000 100000] [--repeticoes 20] [--base base.json]
+         python benchmark_rotas.py --base base.json --atualizar-base   # grava a nova base
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROTAS = (
+    '/',
+    '/eventos',
+    '/caixa',
+    '/api/dashboard-data',
+    '/api/analise',
+    '/api/fluxo-caixa',
+    '/api/eventos?limite=50',
+    '/api/eventos?status=Agendado&pendente=1&totais=1&limite=50',
+    '/api/transacoes?limite=50',
+    '/api/busca?q=silva',
+    '/api/eventos-calendario?formato=colunas',
+    '/api/alertas-eventos',
+)
+TAMANHOS_PADRAO = (1000, 100000)
+TOLERANCIA = 0.25  # piora relativa aceita
+MINIMO_MS = 2.0    # diferenças de tempo menores que isso são ruído
+MINIMO_KB = 256    # idem para memória
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+def medir_tamanho(eventos, semente, banco, repeticoes):
+    """Roda em um processo próprio (memória e caches sem interferência dos outros tamanhos)"""
+    os.environ['FOTOGRAFIA_BANCO'] = 'sqlite:///' + banco
+    from app import create_app
+    from banco import escrita
+    from dados_sinteticos import gerar_dados
+    from modelos import db, inicializar_banco
+    from servicos import atualizar_alertas, limpar_caches
+    from sqlalchemy import event
+
+    app = create_app()
+
+    geracao = None
+    with app.app_context():
+        inicializar_banco()
+        with escrita(), db.engine.begin() as conexao:
+            if not conexao.exec_driver_sql("SELECT EXISTS (SELECT 1 FROM evento)").scalar():
+                comeco = time.perf_counter()
+                gerar_dados(conexao, eventos, semente)
+                atualizar_alertas(conexao)
+                geracao = round(time.perf_counter() - comeco, 1)
+
+        consultas = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def contar(*_):
+            consultas[0] += 1
+
+    cliente = app.test_client()
+    rotas = {}
+    for rota in ROTAS:
+        limpar_caches(app)
+        status = cliente.get(rota).status_code  # Aquecimento: conexões, templates compilados
+
+        frios = []
+        for _ in range(repeticoes):
+            limpar_caches(app)
+            comeco = time.perf_counter()
+            cliente.get(rota)
+            frios.append(time.perf_counter() - comeco)
+
+        quentes = []
+        for _ in range(repeticoes):
+            comeco = time.perf_counter()
+            cliente.get(rota)
+            quentes.append(time.perf_counter() - comeco)
+
+        limpar_caches(app)
+        consultas[0] = 0
+        cliente.get(rota)
+        total_consultas = consultas[0]
+
+        limpar_caches(app)
+        tracemalloc.start()
+        cliente.get(rota)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rotas[rota] = {
+            'status': status,
+            'p50_ms': round(percentil(frios, 0.5) * 1000, 2),
+            'p95_ms': round(percentil(frios, 0.95) * 1000, 2),
+            'p50_cache_ms': round(percentil(quentes, 0.5) * 1000, 2),
+            'consultas': total_consultas,
+            'memoria_kb': round(pico / 1024),
+        }
+    return {'eventos': eventos, 'geracao_s': geracao, 'rotas': rotas}
+
+def executar(tamanhos, semente, pasta, repeticoes):
+    contexto = multiprocessing.get_context('spawn')
+    resultados = {}
+    for eventos in tamanhos:
+        banco = os.path.join(pasta, f'sinteticos_{eventos}_{semente}.db')
+        with contexto.Pool(1) as pool:
+            resultado = pool.apply(medir_tamanho, (eventos, semente, banco, repeticoes))
+        mostrar(resultado)
+        resultados[str(eventos)] = resultado
+    return resultados
+
+def mostrar(resultado):
+    geracao = f" (dados gerados em {resultado['geracao_s']}s)" if resultado['geracao_s'] is not None else ''
+    print(f"\n📊 {resultado['eventos']} eventos{geracao}")
+    print(f"   {'rota':<58} {'p50':>8} {'p95':>8} {'cache':>8} {'SQL':>4} {'memória':>9}")
+    for rota, medidas in resultado['rotas'].items():
+        aviso = '' if medidas['status'] < 400 else f"  ❌ HTTP {medidas['status']}"
+        print(f"   {rota:<58} {medidas['p50_ms']:>6.1f}ms {medidas['p95_ms']:>6.1f}ms "
+              f"{medidas['p50_cache_ms']:>6.1f}ms {medidas['consultas']:>4} {medidas['memoria_kb']:>7}KB{aviso}")
+
+def comparar(atual, base, tolerancia):
+    """Lista as pioras em relação à base (só tamanhos e rotas presentes nas duas)"""
+    regressoes = []
+    for tamanho, resultado in atual['tamanhos'].items():
+        rotas_base = base['tamanhos'].get(tamanho, {}).get('rotas', {})
+        for rota, medidas in resultado['rotas'].items():
+            anterior = rotas_base.get(rota)
+            if not anterior:
+                continue
+            for chave, minimo in (('p50_ms', MINIMO_MS), ('p95_ms', MINIMO_MS), ('memoria_kb', MINIMO_KB)):
+                if medidas[chave] > anterior[chave] * (1 + tolerancia) and medidas[chave] - anterior[chave] > minimo:
+                    regressoes.append(f"{tamanho} eventos {rota}: {chave} {anterior[chave]} -> {medidas[chave]}")
+            if medidas['consultas'] > anterior['consultas']:
+                regressoes.append(f"{tamanho} eventos {rota}: consultas {anterior['consultas']} -> {medidas['consultas']}")
+            if medidas['status'] != anterior['status']:
+                regressoes.append(f"{tamanho} eventos {rota}: HTTP {anterior['status']} -> {medidas['status']}")
+    return regressoes
+
+def salvar(caminho, dados):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das rotas com dados sintéticos")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO),
+                        help="quantidades de eventos (ex: 1000 100000 1000000)")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--pasta', help="pasta para guardar e reaproveitar os bancos gerados (padrão: temporária)")
+    parser.add_argument('--saida', default='benchmark_rotas.json')
+    parser.add_argument('--base', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--atualizar-base', action='store_true', help="grava o resultado como nova base em --base")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    pasta = args.pasta or tempfile.mkdtemp(prefix='benchmark_rotas_')
+    os.makedirs(pasta, exist_ok=True)
+    try:
+        print(f"⏱️  {len(ROTAS)} rotas | {args.repeticoes} repetições | semente {args.semente}")
+        resultado = {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'semente': args.semente,
+            'repeticoes': args.repeticoes,
+            'tamanhos': executar(args.tamanhos, args.semente, pasta, args.repeticoes),
+        }
+    finally:
+        if not args.pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    salvar(args.saida, resultado)
+    print(f"\n💾 Resultado salvo em {args.saida}")
+
+    regressoes = []
+    if args.base and args.atualizar_base:
+        salvar(args.base, resultado)
+        print(f"📌 Nova base salva em {args.base}")
+    elif args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo), args.tolerancia)
+        for regressao in regressoes:
+            print(f"   ❌ {regressao}")
+        print("✅ Nenhuma regressão em relação à base" if not regressoes
+              else f"❌ {len(regressoes)} regressões (tolerância {args.tolerancia:.0%})")
+    sys.exit(1 if regressoes else 0)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de busca textual (SQLite FTS5) sobre clientes, observações e descrições
+
+A tabela virtual busca_fts guarda Evento.cliente, Evento.observacoes e
+Transacao.descricao. O rowid identifica a origem sem coluna extra:
+evento N -> rowid 2N, transação N -> rowid 2N + 1, então atualizar ou
+remover uma linha do índice é uma busca pela chave.
+
+Triggers mantêm o índice em dia em qualquer INSERT/UPDATE/DELETE (inclusive
+importações e scripts). O tokenizador unicode61 com remove_diacritics ignora
+acentos tanto no índice quanto na consulta, e o índice de prefixos acelera
+as buscas por começo de palavra.
+"""
+
+import re
+
+DDL_TABELA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_fts USING fts5("
+    "cliente, observacoes, descricao, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+DDL_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS busca_evento_insert AFTER INSERT ON evento
+BEGIN
+    INSERT INTO busca_fts (rowid, cliente, observacoes, descricao)
+    VALUES (NEW.id * 2, NEW.cliente, COALESCE(NEW.observacoes, ''), '');
+END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_evento_update AFTER UPDATE OF cliente, observacoes ON evento
+BEGIN
+    DELETE FROM busca_fts WHERE rowid = OLD.id * 2;
+    INSERT INTO busca_fts (rowid, cliente, observacoes, descricao)
+    VALUES (NEW.id * 2, NEW.cliente, COALESCE(NEW.observacoes, ''), '');
+END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_evento_delete AFTER DELETE ON evento
+BEGIN
+    DELETE FROM busca_fts WHERE rowid = OLD.id * 2;
+END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_transacao_insert AFTER INSERT ON transacao
+BEGIN
+    INSERT INTO busca_fts (rowid, cliente, observacoes, descricao)
+    VALUES (NEW.id * 2 + 1, '', '', NEW.descricao);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_transacao_update AFTER UPDATE OF descricao ON transacao
+BEGIN
+    DELETE FROM busca_fts WHERE rowid = OLD.id * 2 + 1;
+    INSERT INTO busca_fts (rowid, cliente, observacoes, descricao)
+    VALUES (NEW.id * 2 + 1, '', '', NEW.descricao);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS busca_transacao_delete AFTER DELETE ON transacao
+BEGIN
+    DELETE FROM busca_fts WHERE rowid = OLD.id * 2 + 1;
+END""",
+)
+
+# Pesos do bm25 por coluna: cliente, observacoes, descricao
+PESOS = (10.0, 2.0, 5.0)
+
+_PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+
+def instalar_indice(conexao):
+    """Cria a tabela FTS5 e os triggers de sincronização (idempotente)"""
+    conexao.exec_driver_sql(DDL_TABELA)
+    for comando in DDL_TRIGGERS:
+        conexao.exec_driver_sql(comando)
+
+
+def reconstruir_indice(conexao):
+    """Recarrega todo o índice a partir de evento e transacao"""
+    conexao.exec_driver_sql("DELETE FROM busca_fts")
+    conexao.exec_driver_sql(
+        "INSERT INTO busca_fts (rowid, cliente, observacoes, descricao) "
+        "SELECT id * 2, cliente, COALESCE(observacoes, ''), '' FROM evento"
+    )
+    conexao.exec_driver_sql(
+        "INSERT INTO busca_fts (rowid, cliente, observacoes, descricao) "
+        "SELECT id * 2 + 1, '', '', descricao FROM transacao"
+    )
+    conexao.exec_driver_sql("INSERT INTO busca_fts (busca_fts) VALUES ('optimize')")
+
+
+def montar_consulta(texto):
+    """Converte o texto digitado em uma expressão MATCH com prefixo em cada palavra
+
+    'ana sil' -> '"ana"* "sil"*' (todas as palavras, cada uma como prefixo).
+    Retorna None se não houver palavras pesquisáveis.
+    """
+    palavras = _PALAVRA.findall(texto or '')
+    if not palavras:
+        return None
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+
+def buscar(conexao, texto, limite=20):
+    """Retorna [(entidade, id, relevancia)] ordenado pela relevância (bm25)"""
+    consulta = montar_consulta(texto)
+    if consulta is None:
+        return []
+    pesos = ', '.join(str(p) for p in PESOS)
+    linhas = conexao.exec_driver_sql(
+        f"SELECT rowid, bm25(busca_fts, {pesos}) AS relevancia FROM busca_fts "
+        f"WHERE busca_fts MATCH ? ORDER BY relevancia LIMIT ?",
+        (consulta, limite),
+    ).fetchall()
+    return [
+        ('transacao' if rowid % 2 else 'evento', rowid // 2, relevancia)
+        for rowid, relevancia in linhas
+    ]
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Comandos de administração do banco (flask --app app db ...)
+
+Substituem o menu interativo do antigo acesso_banco.py por comandos que
+podem rodar no cron. As listagens e o SQL avulso leem o banco em lotes
+(yield_per) e escrevem cada linha assim que ela chega, em tabela, CSV ou
+JSON: a memória usada não depende do tamanho das tabelas.
+
+    flask --app app db list-events --status Agendado --pendente --formato csv
+    flask --app app db list-transactions --lista realizadas --de 2024-01-01 --limite 100
+    flask --app app db sql "SELECT status, COUNT(*) FROM evento GROUP BY status"
+    flask --app app db stats --formato json
+    flask --app app db reconcile --simular
+    flask --app app db purge-transactions --ate 2020-12-31 --sim
+"""
+
+import csv
+import json
+from itertools import islice
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from banco import escrita
+from formatacao import formatar_moeda
+from migracoes import versao_atual
+from modelos import Evento, Transacao, db, inicializar_banco, obter_resumo
+from reconciliacao import diferencas, reconciliar
+from rotas_caixa import filtrar_transacoes, filtros_transacoes
+from rotas_eventos import ORDENACOES_EVENTO, filtrar_eventos, filtros_eventos
+from servicos import atualizar_alertas
+from versao_dados import incrementar_versao, ler_versao
+
+LINHAS_POR_LOTE = 1000
+AMOSTRA_TABELA = 200  # linhas usadas para calcular a largura das colunas no formato tabela
+LARGURA_MAXIMA = 40
+FORMATOS = ('tabela', 'csv', 'json')
+
+COLUNAS_EVENTO = ('id', 'cliente', 'tipo_servico', 'data_evento', 'valor_negociado', 'valor_pago', 'status')
+COLUNAS_TRANSACAO = ('id', 'evento_id', 'tipo', 'valor', 'descricao', 'data_transacao', 'categoria')
+
+grupo_db = AppGroup('db', help="Consultas e manutenção do banco de dados.")
+
+opcao_formato = click.option('--formato', type=click.Choice(FORMATOS), default='tabela', show_default=True)
+opcao_limite = click.option('--limite', type=click.IntRange(min=1), help="Máximo de linhas (padrão: todas)")
+
+
+# Saída em streaming
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        return f'{valor:.2f}'
+    return str(valor)
+
+def _emitir(colunas, linhas, formato):
+    """Escreve as linhas (iterável de tuplas) conforme chegam; retorna quantas foram escritas"""
+    saida = click.get_text_stream('stdout')
+    total = 0
+    if formato == 'csv':
+        escritor = csv.writer(saida, lineterminator='\n')
+        escritor.writerow(colunas)
+        for linha in linhas:
+            escritor.writerow(['' if valor is None else valor for valor in linha])
+            total += 1
+    elif formato == 'json':
+        # Um array JSON escrito item a item, sem montar a lista em memória
+        saida.write('[')
+        for linha in linhas:
+            saida.write(',\n' if total else '\n')
+            saida.write(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False, default=str))
+            total += 1
+        saida.write('\n]\n' if total else ']\n')
+    else:
+        # As larguras saem das primeiras linhas; valores maiores são cortados
+        linhas = iter(linhas)
+        amostra = [[_texto(valor) for valor in linha] for linha in islice(linhas, AMOSTRA_TABELA)]
+        larguras = [min(LARGURA_MAXIMA, max([len(nome)] + [len(linha[i]) for linha in amostra]))
+                    for i, nome in enumerate(colunas)]
+
+        def escrever(valores):
+            celulas = [valor if len(valor) <= largura else valor[:largura - 1] + '…'
+                       for valor, largura in zip(valores, larguras)]
+            saida.write('  '.join(celula.ljust(largura) for celula, largura in zip(celulas, larguras)).rstrip() + '\n')
+
+        escrever(list(colunas))
+        escrever(['-' * largura for largura in larguras])
+        for valores in amostra:
+            escrever(valores)
+        total = len(amostra)
+        for linha in linhas:
+            escrever([_texto(valor) for valor in linha])
+            total += 1
+    saida.flush()
+    return total
+
+def _resumo_listagem(total, formato):
+    # Só na tabela: CSV e JSON vão para outros programas
+    if formato == 'tabela':
+        click.echo(f"📊 {total} linhas", err=True)
+
+def _ler_filtros(funcao, args):
+    try:
+        return funcao(args)
+    except ValueError as e:
+        raise click.BadParameter(f"{e} (use AAAA-MM-DD)") from e
+
+
+# Listagens
+@grupo_db.command('list-events')
+@click.option('--status', help="Agendado, Realizado ou Cancelado")
+@click.option('--tipo-servico')
+@click.option('--de', 'data_inicio', metavar='AAAA-MM-DD', help="Eventos a partir desta data")
+@click.option('--ate', 'data_fim', metavar='AAAA-MM-DD', help="Eventos até esta data")
+@click.option('--pendente', is_flag=True, help="Só eventos com saldo a receber")
+@click.option('--ordem', type=click.Choice(tuple(ORDENACOES_EVENTO)), default='data', show_default=True)
+@click.option('--desc', is_flag=True, help="Ordem decrescente")
+@opcao_limite
+@opcao_formato
+def listar_eventos(status, tipo_servico, data_inicio, data_fim, pendente, ordem, desc, limite, formato):
+    """Lista os eventos com os mesmos filtros da tela de eventos."""
+    filtros = _ler_filtros(filtros_eventos, {
+        'status': status, 'tipo_servico': tipo_servico, 'data_inicio': data_inicio, 'data_fim': data_fim,
+        'pendente': '1' if pendente else None, 'ordem': ordem, 'direcao': 'desc' if desc else None,
+    })
+    coluna, _ = ORDENACOES_EVENTO[filtros['ordem']]
+    query = filtrar_eventos(db.session.query(*[getattr(Evento, nome) for nome in COLUNAS_EVENTO]), filtros)
+    if filtros['desc']:
+        query = query.order_by(coluna.desc(), Evento.id.desc())
+    else:
+        query = query.order_by(coluna.asc(), Evento.id.asc())
+    if limite:
+        query = query.limit(limite)
+    total = _emitir(COLUNAS_EVENTO, (tuple(linha) for linha in query.yield_per(LINHAS_POR_LOTE)), formato)
+    _resumo_listagem(total, formato)
+
+@grupo_db.command('list-transactions')
+@click.option('--lista', type=click.Choice(('realizadas', 'pendentes')), help="Padrão: todas")
+@click.option('--tipo', help="Entrada, Saída ou Entrada Pendente")
+@click.option('--categoria')
+@click.option('--evento', 'evento_id', type=int, help="Só as transações deste evento")
+@click.option('--de', 'data_inicio', metavar='AAAA-MM-DD', help="Transações a partir desta data")
+@click.option('--ate', 'data_fim', metavar='AAAA-MM-DD', help="Transações até esta data")
+@opcao_limite
+@opcao_formato
+def listar_transacoes(lista, tipo, categoria, evento_id, data_inicio, data_fim, limite, formato):
+    """Lista as transações em ordem cronológica, com os filtros do caixa."""
+    filtros = _ler_filtros(filtros_transacoes, {
+        'tipo': tipo, 'categoria': categoria, 'data_inicio': data_inicio, 'data_fim': data_fim,
+    })
+    query = filtrar_transacoes(
+        db.session.query(*[getattr(Transacao, nome) for nome in COLUNAS_TRANSACAO]), filtros, lista
+    )
+    if evento_id is not None:
+        query = query.filter(Transacao.evento_id == evento_id)
+    query = query.order_by(Transacao.data_transacao, Transacao.id)
+    if limite:
+        query = query.limit(limite)
+    total = _emitir(COLUNAS_TRANSACAO, (tuple(linha) for linha in query.yield_per(LINHAS_POR_LOTE)), formato)
+    _resumo_listagem(total, formato)
+
+
+# SQL avulso
+def _ler_parametros(valores):
+    parametros = {}
+    for valor in valores:
+        nome, separador, conteudo = valor.partition('=')
+        if not separador or not nome:
+            raise click.BadParameter(f"'{valor}' não está no formato nome=valor", param_hint='--param')
+        parametros[nome] = conteudo
+    return parametros
+
+@grupo_db.command('sql')
+@click.argument('consulta')
+@click.option('--param', 'parametros', multiple=True, metavar='NOME=VALOR',
+              help="Valor de um parâmetro :NOME da consulta (pode repetir)")
+@click.option('--escrita', 'permitir_escrita', is_flag=True,
+              help="Permite INSERT/UPDATE/DELETE (padrão: somente leitura)")
+@opcao_limite
+@opcao_formato
+def executar_sql(consulta, parametros, permitir_escrita, limite, formato):
+    """Executa uma instrução SQL; use :nome e --param nome=valor para os valores.
+
+    Sem --escrita a conexão fica em PRAGMA query_only e qualquer alteração é recusada.
+    """
+    parametros = _ler_parametros(parametros)
+    db.session.close()  # A consulta usa uma conexão própria
+
+    if permitir_escrita:
+        with escrita(), db.engine.begin() as conexao:
+            resultado = conexao.execute(text(consulta), parametros)
+            if resultado.returns_rows:
+                total = _emitir(tuple(resultado.keys()), islice(resultado, limite), formato)
+                _resumo_listagem(total, formato)
+            else:
+                click.echo(f"✅ {resultado.rowcount} linhas alteradas", err=True)
+            incrementar_versao(conexao)  # Invalida o cache das APIs mesmo fora de evento/transacao
+        return
+
+    with db.engine.connect() as conexao:
+        conexao.exec_driver_sql("PRAGMA query_only = ON")
+        try:
+            resultado = conexao.execution_options(yield_per=LINHAS_POR_LOTE).execute(text(consulta), parametros)
+            if resultado.returns_rows:
+                total = _emitir(tuple(resultado.keys()), islice(resultado, limite), formato)
+                _resumo_listagem(total, formato)
+            resultado.close()
+        except OperationalError as e:
+            if 'readonly' in str(e.orig):
+                raise click.ClickException("Consulta somente leitura; use --escrita para alterar dados") from e
+            raise click.ClickException(str(e.orig)) from e
+        finally:
+            conexao.rollback()
+            conexao.exec_driver_sql("PRAGMA query_only = OFF")
+
+
+# Estatísticas
+@grupo_db.command('stats')
+@click.option('--formato', type=click.Choice(FORMATOS), default='tabela', show_default=True)
+def estatisticas(formato):
+    """Tamanho do banco, versões e totais do resumo financeiro."""
+    conexao = db.session.connection()
+    tamanho = conexao.exec_driver_sql("PRAGMA page_count").scalar() * conexao.exec_driver_sql("PRAGMA page_size").scalar()
+    livres = conexao.exec_driver_sql("PRAGMA freelist_count").scalar()
+    resumo = obter_resumo()
+    dados = {
+        'versao_schema': versao_atual(conexao),
+        'versao_dados': ler_versao(conexao),
+        'tamanho_bytes': tamanho,
+        'paginas_livres': livres,
+        'eventos': resumo.total_eventos,
+        'eventos_agendados': resumo.eventos_agendados,
+        'eventos_realizados': resumo.eventos_realizados,
+        'eventos_cancelados': resumo.eventos_cancelados,
+        'total_negociado': resumo.total_negociado,
+        'total_recebido': resumo.total_recebido,
+        'transacoes': resumo.total_transacoes,
+        'transacoes_pendentes': resumo.transacoes_pendentes,
+        'entradas': resumo.entradas,
+        'saidas': resumo.saidas,
+        'saldo': round(resumo.entradas - resumo.saidas, 2),
+        'a_receber': resumo.pendentes,
+    }
+    db.session.rollback()
+    if formato == 'json':
+        click.echo(json.dumps(dados, ensure_ascii=False))
+    else:
+        _emitir(('indicador', 'valor'), dados.items(), formato)
+
+
+# Manutenção
+@grupo_db.command('reconcile')
+@click.option('--simular', is_flag=True, help="Mostra o que seria feito, sem alterar o banco")
+@click.option('--eventos', help="Ids dos eventos separados por vírgula (padrão: todos)")
+def reconciliar_banco(simular, eventos):
+    """Reconcilia as entradas pendentes com os eventos e recalcula os alertas."""
+    try:
+        eventos = [int(id_evento) for id_evento in eventos.split(',')] if eventos else None
+    except ValueError as e:
+        raise click.BadParameter("use ids numéricos separados por vírgula", param_hint='--eventos') from e
+    inicializar_banco()
+
+    if simular:
+        with db.engine.connect() as conexao:
+            plano = diferencas(conexao, eventos)
+        click.echo(f"🔍 {len(plano['inserir'])} a criar | {len(plano['atualizar'])} a atualizar | "
+                   f"{len(plano['remover'])} a remover (nada foi alterado)")
+        return
+
+    with escrita(), db.engine.begin() as conexao:
+        resultado = reconciliar(conexao, eventos)
+        alertas = atualizar_alertas(conexao, eventos)
+    click.echo(f"✅ {resultado['inseridas']} criadas | {resultado['atualizadas']} atualizadas | "
+               f"{resultado['removidas']} removidas")
+    click.echo(f"🔔 {alertas['proximos']} alertas de eventos próximos | {alertas['vencidos']} de saldos vencidos")
+
+@grupo_db.command('purge-transactions')
+@click.option('--lista', type=click.Choice(('realizadas', 'pendentes')), help="Padrão: todas")
+@click.option('--tipo', help="Entrada, Saída ou Entrada Pendente")
+@click.option('--categoria')
+@click.option('--de', 'data_inicio', metavar='AAAA-MM-DD', help="Transações a partir desta data")
+@click.option('--ate', 'data_fim', metavar='AAAA-MM-DD', help="Transações até esta data")
+@click.option('--simular', is_flag=True, help="Só conta as transações, sem excluir")
+@click.option('--sim', 'confirmado', is_flag=True, help="Não pede confirmação (cron)")
+def excluir_transacoes(lista, tipo, categoria, data_inicio, data_fim, simular, confirmado):
+    """Exclui as transações filtradas, em lotes curtos de escrita.
+
+    O valor pago dos eventos não muda; entradas pendentes excluídas voltam no próximo reconcile.
+    """
+    filtros = _ler_filtros(filtros_transacoes, {
+        'tipo': tipo, 'categoria': categoria, 'data_inicio': data_inicio, 'data_fim': data_fim,
+    })
+    selecao = filtrar_transacoes(db.session.query(Transacao.id), filtros, lista)
+    quantidade = selecao.count()
+    total = selecao.with_entities(db.func.coalesce(db.func.sum(Transacao.valor), 0)).scalar()
+    db.session.rollback()
+    click.echo(f"🔍 {quantidade} transações selecionadas ({formatar_moeda(total)})")
+    if simular or not quantidade:
+        return
+    if not confirmado:
+        click.confirm("Excluir essas transações?", abort=True)
+
+    # Um lote por transação: a trava de escrita nunca fica presa pela limpeza inteira
+    excluidas = 0
+    while True:
+        with escrita():
+            ids = [id_transacao for id_transacao, in selecao.order_by(Transacao.id).limit(LINHAS_POR_LOTE)]
+            if ids:
+                db.session.query(Transacao).filter(Transacao.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+        if not ids:
+            break
+        excluidas += len(ids)
+        click.echo(f"   🗑️  {excluidas}/{quantidade}", err=True)
+    click.echo(f"✅ {excluidas} transações excluídas")
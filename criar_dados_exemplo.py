@@ -1,13 +1,19 @@
-from app import app, db, Evento, Transacao
+from app import create_app
+from banco import escrita
+from modelos import db, inicializar_banco
+from migracoes import resetar_versao
 from datetime import datetime, date, timedelta
 
 def criar_dados_exemplo():
     """Inicializa o banco de dados sem dados de exemplo"""
     
-    with app.app_context():
-        # Limpar dados existentes e criar tabelas
-        db.drop_all()
-        db.create_all()
+    with create_app().app_context():
+        # Limpar dados existentes e criar tabelas (como escritor, ver banco.py)
+        with escrita():
+            db.drop_all()
+            with db.engine.begin() as conexao:
+                resetar_versao(conexao)
+            inicializar_banco()
         
         print("Banco de dados inicializado com sucesso!")
         print("\nSistema pronto para receber dados via importação.")
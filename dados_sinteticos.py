@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de dados sintéticos (eventos e transações) para testes de volume
+Os mesmos parâmetros e a mesma semente geram sempre os mesmos dados:
+- eventos de 3 anos atrás até 1 ano à frente, mais concentrados nos fins de semana
+  e entre setembro e dezembro;
+- passados quase todos Realizados e quitados, alguns com saldo em aberto; futuros
+  Agendados, parte com sinal pago; alguns Cancelados;
+- uma Entrada por pagamento (sinal no cadastro, o restante na data do evento),
+  cerca de 1,5 Saída por evento e as Entradas Pendentes geradas pela reconciliação.
+Com 1 milhão de eventos, reserve uns 1,5 GB de disco e alguns minutos.
+Execute: python dados_sinteticos.py --eventos 100000 [--semente 42] [--banco dados.db]
+O banco precisa estar vazio (use um arquivo novo em --banco).
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+SERVICOS = (('Fotografia', 55, 2500), ('Storymaker', 15, 1200), ('Ambos', 30, 4200))  # tipo, peso, valor médio
+ENSAIOS = (('Nenhum', 70), ('Pre-Wedding', 10), ('Ensaio Casal', 8), ('Book Fotográfico (15 anos)', 5),
+           ('Ensaio Família', 5), ('Ensaio Individual', 2))
+SAIDAS = (('Equipamento', 15, 900), ('Transporte', 30, 120), ('Marketing', 10, 400), ('Manutenção', 8, 350),
+          ('Alimentação', 20, 60), ('Hospedagem', 7, 450), ('Impostos', 10, 700))  # categoria, peso, valor médio
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago', 'Vanessa', 'Yuri')
+SOBRENOMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida',
+              'Nascimento', 'Carvalho', 'Ribeiro', 'Gomes', 'Martins', 'Rocha', 'Barbosa')
+PESO_MES = (6, 6, 7, 7, 8, 7, 7, 8, 10, 11, 11, 12)  # Jan..Dez: mais eventos no fim do ano
+LOTE = 10000
+
+
+def _sortear(aleatorio, opcoes):
+    """Sorteia o primeiro campo de uma tupla (valor, peso, ...) pelo peso"""
+    return aleatorio.choices(opcoes, weights=[opcao[1] for opcao in opcoes])[0]
+
+
+def _data_evento(aleatorio, inicio, dias):
+    """Data no intervalo, aceitando mais os fins de semana e os meses movimentados"""
+    while True:
+        dia = inicio + timedelta(days=aleatorio.randrange(dias))
+        peso = PESO_MES[dia.month - 1] * (3 if dia.weekday() >= 5 else 1)
+        if aleatorio.random() * 36 < peso:
+            return dia
+
+
+def _pagamentos(aleatorio, negociado, status, passado):
+    """(sinal, restante) pagos do valor negociado"""
+    sorteio = aleatorio.random()
+    sinal = round(negociado * aleatorio.choice((0.2, 0.3, 0.5)), 2)
+    if status == 'Cancelado':
+        return (sinal, 0.0) if sorteio < 0.5 else (0.0, 0.0)
+    if passado:
+        if sorteio < 0.8:
+            return sinal, round(negociado - sinal, 2)
+        if sorteio < 0.95:
+            return sinal, round((negociado - sinal) * aleatorio.choice((0.25, 0.5)), 2)
+        return 0.0, 0.0
+    if sorteio < 0.5:
+        return 0.0, 0.0
+    return sinal, (round((negociado - sinal) * 0.5, 2) if sorteio > 0.9 else 0.0)
+
+
+def _registros(quantidade, semente, hoje):
+    """Gera (evento, transações do evento) em ordem, um evento por vez"""
+    aleatorio = random.Random(semente)
+    inicio = hoje - timedelta(days=3 * 365)
+    dias = 4 * 365
+    for numero in range(1, quantidade + 1):
+        tipo, _, valor_medio = _sortear(aleatorio, SERVICOS)
+        data_evento = _data_evento(aleatorio, inicio, dias)
+        passado = data_evento < hoje
+        sorteio = aleatorio.random()
+        if sorteio < 0.06:
+            status = 'Cancelado'
+        elif passado:
+            status = 'Agendado' if sorteio > 0.97 else 'Realizado'
+        else:
+            status = 'Agendado'
+        negociado = max(300.0, round(aleatorio.gauss(valor_medio, valor_medio * 0.3) / 50) * 50)
+        cadastro = data_evento - timedelta(days=aleatorio.randint(15, 365))
+        sinal, restante = _pagamentos(aleatorio, negociado, status, passado)
+        cliente = f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {numero}"
+
+        evento = (numero, cliente, tipo, data_evento.isoformat(), negociado, round(sinal + restante, 2), status,
+                  _sortear(aleatorio, ENSAIOS)[0], f"{cadastro.isoformat()} {aleatorio.randrange(8, 20):02d}:00:00")
+        transacoes = []
+        if sinal:
+            transacoes.append(('Entrada', sinal, f'Sinal - {cliente}', min(cadastro, hoje).isoformat(),
+                               'Sinal/Entrada', numero))
+        if restante:
+            transacoes.append(('Entrada', restante, f'Pagamento - {cliente}', min(data_evento, hoje).isoformat(),
+                               'Pagamento de Cliente', numero))
+        # Gastos: ~1,5 por evento, só até hoje
+        for _ in range(aleatorio.choice((0, 1, 1, 2, 2, 3))):
+            categoria, _, media = _sortear(aleatorio, SAIDAS)
+            data_saida = min(data_evento + timedelta(days=aleatorio.randint(-20, 5)), hoje)
+            transacoes.append(('Saída', round(max(10.0, aleatorio.expovariate(1 / media)), 2),
+                               f'{categoria} - {cliente}', data_saida.isoformat(), categoria, None))
+        yield evento, transacoes
+
+
+def gerar_dados(conexao, eventos, semente=42, hoje=None):
+    """Insere os eventos e transações sintéticos e as entradas pendentes
+
+    Carga em massa: os triggers de evento/transacao são removidos durante os
+    INSERTs e recriados depois (com o mesmo SQL), e o resumo, a análise mensal
+    e o índice de busca são recalculados de uma vez. Tudo roda na transação da
+    conexão: um erro desfaz inclusive a remoção dos triggers.
+    Retorna (eventos, transações) inseridos.
+    """
+    from analise import reconstruir_analise
+    from busca import reconstruir_indice
+    from reconciliacao import reconciliar
+    from resumo_financeiro import reconstruir_resumo
+    from versao_dados import incrementar_versao
+
+    hoje = hoje or date.today()
+    triggers = conexao.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ('evento', 'transacao')"
+    ).all()
+    for nome, _ in triggers:
+        conexao.exec_driver_sql(f"DROP TRIGGER {nome}")
+    lote_eventos, lote_transacoes = [], []
+    total_transacoes = 0
+
+    def gravar():
+        conexao.exec_driver_sql(
+            "INSERT INTO evento (id, cliente, tipo_servico, data_evento, valor_negociado, valor_pago, status, "
+            "ensaios_extras, data_cadastro) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", lote_eventos)
+        if lote_transacoes:
+            conexao.exec_driver_sql(
+                "INSERT INTO transacao (tipo, valor, descricao, data_transacao, categoria, evento_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)", lote_transacoes)
+        lote_eventos.clear()
+        lote_transacoes.clear()
+
+    for evento, transacoes in _registros(eventos, semente, hoje):
+        lote_eventos.append(evento)
+        lote_transacoes.extend(transacoes)
+        total_transacoes += len(transacoes)
+        if len(lote_eventos) >= LOTE:
+            gravar()
+    if lote_eventos:
+        gravar()
+
+    pendentes = reconciliar(conexao)
+
+    for _, sql in triggers:
+        conexao.exec_driver_sql(sql)
+    reconstruir_resumo(conexao)
+    reconstruir_analise(conexao)
+    reconstruir_indice(conexao)
+    incrementar_versao(conexao)
+    return eventos, total_transacoes + pendentes['inseridas']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preenche um banco vazio com dados sintéticos')
+    parser.add_argument('--eventos', type=int, default=1000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--banco', help='arquivo SQLite (padrão: o banco configurado em FOTOGRAFIA_BANCO)')
+    args = parser.parse_args()
+
+    if args.banco:
+        os.environ['FOTOGRAFIA_BANCO'] = 'sqlite:///' + os.path.abspath(args.banco)
+    from app import create_app
+    from banco import escrita
+    from modelos import db, inicializar_banco
+    from servicos import atualizar_alertas
+
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        with escrita(), db.engine.begin() as conexao:
+            if conexao.exec_driver_sql("SELECT EXISTS (SELECT 1 FROM evento)").scalar():
+                print("❌ O banco já tem eventos; use um arquivo novo em --banco")
+                return
+            comeco = time.perf_counter()
+            eventos, transacoes = gerar_dados(conexao, args.eventos, args.semente)
+            atualizar_alertas(conexao)
+        print(f"✅ {eventos} eventos e {transacoes} transações gerados em {time.perf_counter() - comeco:.1f}s "
+              f"(semente {args.semente})")
+        print(f"🗄️ Banco: {app.config['SQLALCHEMY_DATABASE_URI']}")
+
+
+if __name__ == "__main__":
+    main()
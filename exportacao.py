@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação de eventos e transações em CSV, XLSX e Parquet
+
+As funções recebem o cabeçalho (nome, tipo) e um iterador de linhas (tuplas)
+vindas de uma consulta com yield_per, e são geradores de bytes para uma
+resposta HTTP em partes: a consulta só roda quando a resposta começa a ser
+enviada, dentro do iterador. Nenhuma delas guarda a tabela inteira em memória:
+
+- CSV: as linhas são escritas em blocos e enviadas assim que o bloco enche;
+- XLSX: openpyxl em modo write_only grava em um arquivo temporário, que é
+  enviado em pedaços e removido em seguida. O zip só fica válido no final,
+  então o primeiro byte sai depois da última linha;
+- Parquet: pyarrow (opcional) grava um grupo de linhas por bloco no arquivo
+  temporário, enviado como o XLSX. Sem pyarrow instalado, FormatoIndisponivel
+  é levantada (verificar_parquet() permite checar antes da resposta).
+"""
+
+import csv
+import io
+import os
+import tempfile
+from itertools import islice
+
+LINHAS_POR_BLOCO = 1000
+TAMANHO_PEDACO = 64 * 1024
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class FormatoIndisponivel(Exception):
+    """O formato pedido depende de uma biblioteca que não está instalada"""
+
+
+def _blocos(linhas, tamanho=LINHAS_POR_BLOCO):
+    linhas = iter(linhas)
+    while True:
+        bloco = list(islice(linhas, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def gerar_csv(cabecalho, linhas):
+    """CSV separado por ';' em UTF-8 com BOM (abre direto no Excel)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+    escritor.writerow([nome for nome, _ in cabecalho])
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    for bloco in _blocos(linhas):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(bloco)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _enviar_arquivo(caminho):
+    """Envia o arquivo temporário em pedaços e o remove no final"""
+    try:
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                pedaco = arquivo.read(TAMANHO_PEDACO)
+                if not pedaco:
+                    break
+                yield pedaco
+    finally:
+        os.remove(caminho)
+
+
+def _arquivo_temporario(extensao):
+    descritor, caminho = tempfile.mkstemp(suffix='.' + extensao)
+    os.close(descritor)
+    return caminho
+
+
+def gerar_xlsx(cabecalho, linhas, titulo='Dados'):
+    """Planilha única gravada em modo write_only (linha a linha), dentro do iterador da resposta"""
+    from openpyxl import Workbook  # Só aqui: importar o openpyxl atrasa a inicialização do app
+
+    caminho = _arquivo_temporario('xlsx')
+    try:
+        planilha = Workbook(write_only=True)
+        aba = planilha.create_sheet(title=titulo)
+        aba.append([nome for nome, _ in cabecalho])
+        for linha in linhas:
+            aba.append(linha)
+        planilha.save(caminho)
+    except Exception:
+        os.remove(caminho)
+        raise
+    yield from _enviar_arquivo(caminho)
+
+
+def verificar_parquet():
+    """Importa o pyarrow (FormatoIndisponivel se não estiver instalado)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise FormatoIndisponivel('Exportação em Parquet requer o pacote pyarrow (pip install pyarrow)')
+    return pyarrow, pyarrow.parquet
+
+
+def gerar_parquet(cabecalho, linhas):
+    """Arquivo Parquet com um grupo de linhas por bloco"""
+    pa, pq = verificar_parquet()
+    tipos = {'inteiro': pa.int64(), 'numero': pa.float64(), 'data': pa.date32(), 'texto': pa.string()}
+    esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in cabecalho])
+
+    caminho = _arquivo_temporario('parquet')
+    try:
+        with pq.ParquetWriter(caminho, esquema) as escritor:
+            for bloco in _blocos(linhas):
+                colunas = [list(coluna) for coluna in zip(*bloco)]
+                escritor.write_table(pa.Table.from_arrays(colunas, schema=esquema))
+    except Exception:
+        os.remove(caminho)
+        raise
+    yield from _enviar_arquivo(caminho)
+
+
+def gerar_exportacao(formato, cabecalho, linhas, titulo='Dados'):
+    """Escolhe o gerador do formato (ValueError se desconhecido)"""
+    if formato == 'csv':
+        return gerar_csv(cabecalho, linhas)
+    if formato == 'xlsx':
+        return gerar_xlsx(cabecalho, linhas, titulo)
+    if formato == 'parquet':
+        return gerar_parquet(cabecalho, linhas)
+    raise ValueError('Formato inválido. Use csv, xlsx ou parquet')
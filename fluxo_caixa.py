@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Série temporal do fluxo de caixa (saldo realizado e projetado)
+
+Uma consulta só: uma CTE recursiva gera os períodos (dia, semana ou mês)
+entre o início e o fim, as transações são somadas por período e os saldos
+acumulados saem de SUM() OVER (ORDER BY período), sem laço em Python.
+
+- saldo: Entradas menos Saídas até o fim de cada período;
+- saldo_projetado: saldo mais as Entradas Pendentes com data até o período.
+
+O saldo anterior ao início vem das linhas mensais de resumo_financeiro
+(mais os dias do mês inicial antes do início), sem percorrer o histórico.
+"""
+
+from datetime import date, timedelta
+
+PERIODOS = {
+    # periodo -> (início do período que contém a data {d}, passo para o próximo)
+    'dia': ("date({d})", "+1 day"),
+    'semana': ("date({d}, 'weekday 0', '-6 days')", "+7 days"),  # Semanas começam na segunda
+    'mes': ("date({d}, 'start of month')", "+1 month"),
+}
+PONTOS_MAXIMOS = 1000
+
+_MOVIMENTO = """
+    TOTAL(CASE WHEN tipo = 'Entrada' THEN valor END) AS entradas,
+    TOTAL(CASE WHEN tipo = 'Saída' THEN valor END) AS saidas,
+    TOTAL(CASE WHEN tipo = 'Entrada Pendente' THEN valor END) AS pendentes
+"""
+
+_SERIE = """
+WITH RECURSIVE periodos(inicio) AS (
+    SELECT :inicio
+    UNION ALL
+    SELECT date(inicio, :passo) FROM periodos WHERE date(inicio, :passo) <= :fim
+),
+movimento AS (
+    SELECT {periodo} AS inicio, {movimento}
+    FROM transacao
+    WHERE data_transacao >= :inicio AND data_transacao <= :fim
+    GROUP BY 1
+)
+SELECT p.inicio,
+       COALESCE(m.entradas, 0), COALESCE(m.saidas, 0), COALESCE(m.pendentes, 0),
+       :saldo + SUM(COALESCE(m.entradas - m.saidas, 0)) OVER acumulado,
+       :projetado + SUM(COALESCE(m.entradas - m.saidas + m.pendentes, 0)) OVER acumulado
+FROM periodos p LEFT JOIN movimento m ON m.inicio = p.inicio
+WINDOW acumulado AS (ORDER BY p.inicio ROWS UNBOUNDED PRECEDING)
+ORDER BY p.inicio
+"""
+
+
+def inicio_periodo(conexao, periodo, data):
+    """Primeiro dia do período que contém a data"""
+    return conexao.exec_driver_sql(f"SELECT {PERIODOS[periodo][0].format(d='?')}", (data.isoformat(),)).scalar()
+
+
+def saldos_ate(conexao, data):
+    """(saldo, saldo projetado) antes da data, pelo resumo mensal e pelos dias do mês da data"""
+    mes = data.strftime('%Y-%m')
+    anteriores = conexao.exec_driver_sql(
+        "SELECT TOTAL(entradas), TOTAL(saidas), TOTAL(pendentes) FROM resumo_financeiro "
+        "WHERE periodo < ? AND periodo != 'geral'", (mes,)
+    ).one()
+    do_mes = conexao.exec_driver_sql(
+        f"SELECT {_MOVIMENTO} FROM transacao WHERE data_transacao >= ? AND data_transacao < ?",
+        (mes + '-01', data.isoformat()),
+    ).one()
+    entradas, saidas, pendentes = (a + b for a, b in zip(anteriores, do_mes))
+    return round(entradas - saidas, 2), round(entradas - saidas + pendentes, 2)
+
+
+def serie_fluxo(conexao, periodo='semana', inicio=None, fim=None, hoje=None):
+    """Saldos por período entre inicio e fim (datas; padrão: 3 meses atrás até 6 meses à frente)
+
+    O início é recuado para o começo do seu período. ValueError se o
+    período for inválido, se fim < inicio ou se a série passar de
+    PONTOS_MAXIMOS pontos. Retorna um dict com os saldos iniciais e a
+    lista 'pontos' (um por período, inclusive os sem movimento).
+    """
+    if periodo not in PERIODOS:
+        raise ValueError('periodo deve ser dia, semana ou mes')
+    hoje = hoje or date.today()
+    inicio = inicio or hoje - timedelta(days=90)
+    fim = fim or hoje + timedelta(days=183)
+    if fim < inicio:
+        raise ValueError('fim deve ser posterior ao inicio')
+    inicio = date.fromisoformat(inicio_periodo(conexao, periodo, inicio))
+    dias = (fim - inicio).days
+    pontos_estimados = {'dia': dias + 1, 'semana': dias // 7 + 1, 'mes': dias // 28 + 1}[periodo]
+    if pontos_estimados > PONTOS_MAXIMOS:
+        raise ValueError(f'Intervalo longo demais para o período {periodo} (máximo {PONTOS_MAXIMOS} pontos)')
+
+    saldo, projetado = saldos_ate(conexao, inicio)
+    sql = _SERIE.format(periodo=PERIODOS[periodo][0].format(d='data_transacao'), movimento=_MOVIMENTO)
+    linhas = conexao.exec_driver_sql(sql, {
+        'inicio': inicio.isoformat(), 'fim': fim.isoformat(), 'passo': PERIODOS[periodo][1],
+        'saldo': saldo, 'projetado': projetado,
+    })
+    return {
+        'periodo': periodo,
+        'inicio': inicio.isoformat(),
+        'fim': fim.isoformat(),
+        'saldo_inicial': saldo,
+        'saldo_projetado_inicial': projetado,
+        'pontos': [
+            {
+                'data': data_inicio,
+                'entradas': round(entradas, 2),
+                'saidas': round(saidas, 2),
+                'pendentes': round(pendentes, 2),
+                'saldo': round(saldo_periodo, 2),
+                'saldo_projetado': round(projetado_periodo, 2),
+                'futuro': data_inicio > hoje.isoformat(),
+            }
+            for data_inicio, entradas, saidas, pendentes, saldo_periodo, projetado_periodo in linhas
+        ],
+    }
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Formatação de números no padrão brasileiro (1.234,56)
+
+Usada pelos filtros dos templates (moeda, numero, decimal) e pelos scripts,
+para que todos formatem do mesmo jeito.
+"""
+
+
+def formatar_decimal(valor, casas=2):
+    """1234.5 -> '1.234,50'"""
+    return f"{valor or 0:,.{casas}f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def formatar_moeda(valor):
+    """1234.5 -> 'R$ 1.234,50'"""
+    return "R$ " + formatar_decimal(valor)
+
+
+def formatar_numero(valor):
+    """1234 -> '1.234' (sem casas decimais)"""
+    return f"{valor or 0:,.0f}".replace(',', '.')
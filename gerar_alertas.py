@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para gerar os alertas do dia (eventos próximos e saldos vencidos)
+Agende uma vez por dia, logo após a meia-noite (ex: cron '5 0 * * *');
+sem ele, a primeira abertura do dashboard no dia gera os alertas
+Execute: python gerar_alertas.py
+"""
+
+from datetime import date
+
+from alertas import ler_alertas
+from app import create_app
+from banco import escrita
+from formatacao import formatar_moeda
+from modelos import db, inicializar_banco
+from servicos import atualizar_alertas
+from versao_dados import incrementar_versao
+
+def gerar():
+    """Recalcula os alertas de hoje e mostra um resumo"""
+    with create_app().app_context():
+        inicializar_banco()
+        with escrita(), db.engine.begin() as conexao:
+            gerados = atualizar_alertas(conexao)
+            incrementar_versao(conexao)  # Respostas de /api/alertas-eventos já em cache deixam de valer
+            pendentes = ler_alertas(conexao)
+
+        print(f"🔔 Alertas de {date.today().strftime('%d/%m/%Y')}: {gerados['proximos']} eventos próximos, "
+              f"{gerados['vencidos']} saldos vencidos")
+        print(f"👀 {len(pendentes)} ainda não vistos")
+        for alerta in pendentes[:10]:
+            if alerta['categoria'] == 'vencido':
+                print(f"   💸 {alerta['cliente']}: {formatar_moeda(alerta['valor'])} em aberto há {alerta['dias']} dias")
+            else:
+                print(f"   📅 {alerta['cliente']} ({alerta['tipo_servico']}) em {alerta['dias']} dias [{alerta['tipo']}]")
+
+if __name__ == "__main__":
+    gerar()
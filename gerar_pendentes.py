@@ -1,45 +1,59 @@
-from app import app, db, Evento, Transacao
-from datetime import date
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para reconciliar as entradas pendentes (valores a receber) com os eventos
+Cria, corrige ou remove as transações 'Entrada Pendente' conforme o saldo de cada evento
+Execute: python gerar_pendentes.py [--simular] [--eventos 1,2,3]
+"""
 
-def gerar_entradas_pendentes():
-    """Gera transações de entrada pendentes para eventos já cadastrados"""
+import argparse
+
+from app import create_app
+from banco import escrita
+from formatacao import formatar_moeda
+from modelos import db, inicializar_banco
+from reconciliacao import diferencas, reconciliar
+
+LINHAS_RELATORIO = 50
+
+def gerar_entradas_pendentes(simular=False, eventos=None):
+    """Reconcilia as entradas pendentes de todos os eventos (ou só dos informados)"""
     
-    with app.app_context():
-        # Buscar eventos que têm valor a receber
-        eventos_pendentes = Evento.query.filter(Evento.valor_pago < Evento.valor_negociado).all()
-        
-        transacoes_criadas = 0
-        
-        for evento in eventos_pendentes:
-            valor_pendente = evento.valor_negociado - evento.valor_pago
-            
-            # Verificar se já existe transação pendente para este evento
-            transacao_existente = Transacao.query.filter_by(
-                evento_id=evento.id,
-                tipo='Entrada Pendente'
-            ).first()
-            
-            if not transacao_existente and valor_pendente > 0:
-                # Criar transação pendente
-                transacao = Transacao(
-                    evento_id=evento.id,
-                    tipo='Entrada Pendente',
-                    valor=valor_pendente,
-                    descricao=f'A receber - {evento.cliente}',
-                    data_transacao=evento.data_evento,
-                    categoria='Pagamento de Cliente'
-                )
-                db.session.add(transacao)
-                transacoes_criadas += 1
-        
-        db.session.commit()
-        
-        print(f"✅ {transacoes_criadas} entradas pendentes criadas!")
-        print(f"📊 {len(eventos_pendentes)} eventos com valores a receber")
+    with create_app().app_context():
+        inicializar_banco()
+        if simular:
+            with db.engine.connect() as conexao:
+                plano = diferencas(conexao, eventos)
+            print("🔍 Simulação (nada foi alterado)")
+            for id_transacao, evento_id, valor in plano['remover'][:LINHAS_RELATORIO]:
+                print(f"   ➖ remover #{id_transacao} do evento {evento_id} ({formatar_moeda(valor)})")
+            for id_transacao, evento_id, atual, novo in plano['atualizar'][:LINHAS_RELATORIO]:
+                print(f"   ✏️  atualizar #{id_transacao} do evento {evento_id}: {formatar_moeda(atual)} -> {formatar_moeda(novo)}")
+            for evento_id, valor in plano['inserir'][:LINHAS_RELATORIO]:
+                print(f"   ➕ criar para o evento {evento_id} ({formatar_moeda(valor)})")
+            if max(len(lista) for lista in plano.values()) > LINHAS_RELATORIO:
+                print(f"   ... (mostrando até {LINHAS_RELATORIO} por tipo)")
+            print(f"📊 {len(plano['inserir'])} a criar | {len(plano['atualizar'])} a atualizar | {len(plano['remover'])} a remover")
+            return plano
+
+        # Mesmo caminho de escrita das rotas e do flask db reconcile (ver banco.py)
+        with escrita(), db.engine.begin() as conexao:
+            resultado = reconciliar(conexao, eventos)
+            total_pendente = conexao.exec_driver_sql(
+                "SELECT COUNT(*), COALESCE(SUM(valor), 0) FROM transacao WHERE tipo = 'Entrada Pendente'"
+            ).one()
         
-        # Mostrar resumo
-        total_pendente = sum(e.valor_negociado - e.valor_pago for e in eventos_pendentes)
-        print(f"💰 Total a receber: R$ {total_pendente:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+        print(f"✅ {resultado['inseridas']} entradas pendentes criadas!")
+        print(f"✏️  {resultado['atualizadas']} atualizadas | 🗑️  {resultado['removidas']} removidas")
+        print(f"📊 {total_pendente[0]} entradas pendentes no caixa")
+        print(f"💰 Total a receber: {formatar_moeda(total_pendente[1])}")
+        return resultado
 
 if __name__ == "__main__":
-    gerar_entradas_pendentes()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reconcilia as entradas pendentes com os eventos")
+    parser.add_argument('--simular', action='store_true', help="Mostra o que seria feito, sem alterar o banco")
+    parser.add_argument('--eventos', help="Ids dos eventos separados por vírgula (padrão: todos)")
+    args = parser.parse_args()
+    
+    eventos = [int(id_evento) for id_evento in args.eventos.split(',')] if args.eventos else None
+    gerar_entradas_pendentes(simular=args.simular, eventos=eventos)
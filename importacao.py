@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Validação e inserção em lote das planilhas de eventos e transações
+
+A validação é feita por coluna com pandas (datas, números e valores
+permitidos), sem percorrer linha a linha. As linhas válidas são inseridas em
+lotes com um único executemany por lote, cada lote na sua transação. As rejeitadas voltam com o número
+da linha na planilha e o motivo, para o relatório de rejeições.
+
+Cada linha importada recebe uma chave (campos naturais + ordem de ocorrência
+no arquivo) e um hash do conteúdo. Reimportar a mesma planilha compara as
+chaves com as já gravadas em uma única consulta: linhas novas são inseridas,
+as de conteúdo diferente são atualizadas e as iguais são ignoradas.
+"""
+
+import hashlib
+import os
+import uuid
+
+import pandas as pd
+from sqlalchemy import bindparam, insert, update
+
+from banco import escrita
+
+TAMANHO_LOTE = 1000
+
+EXTENSOES_PERMITIDAS = ('.xlsx', '.xls', '.csv', '.txt')
+FORMATO_NAO_SUPORTADO = 'Formato de arquivo não suportado. Use Excel (.xlsx, .xls) ou CSV/TXT (.csv, .txt)'
+
+STATUS_PERMITIDOS = ('Agendado', 'Realizado', 'Cancelado')  # os mesmos de Evento.status
+
+# Colunas gravadas por importação, na ordem usada no hash do conteúdo
+CAMPOS_EVENTO = ('cliente', 'tipo_servico', 'data_evento', 'valor_negociado', 'valor_pago',
+                 'status', 'observacoes', 'ensaios_extras')
+CAMPOS_TRANSACAO = ('tipo', 'valor', 'descricao', 'data_transacao', 'categoria')
+
+# Campos que identificam a linha entre importações (o restante só entra no hash)
+CHAVE_EVENTO = ('cliente', 'tipo_servico', 'data_evento')
+CHAVE_TRANSACAO = ('tipo', 'data_transacao', 'descricao', 'categoria')
+# Transações com evento_id são do app (pagamentos, entradas pendentes): a importação nunca as grava
+TRANSACOES_IMPORTAVEIS = 'evento_id IS NULL'
+
+# Grafias aceitas para o tipo de transação (minúsculas) -> valor gravado
+TIPOS_TRANSACAO = {
+    'entrada': 'Entrada',
+    'saída': 'Saída',
+    'saida': 'Saída',
+    'entrada pendente': 'Entrada Pendente',
+}
+
+
+def ler_planilha(caminho, nome_arquivo):
+    """Lê Excel (.xlsx/.xls) ou CSV/TXT separado por ';' (ValueError se outro formato)"""
+    nome = nome_arquivo.lower()
+    if nome.endswith('.xlsx') or nome.endswith('.xls'):
+        df = pd.read_excel(caminho)
+    elif nome.endswith('.csv') or nome.endswith('.txt'):
+        df = pd.read_csv(caminho, sep=';')
+    else:
+        raise ValueError(FORMATO_NAO_SUPORTADO)
+    df.columns = [str(coluna).strip().lower() for coluna in df.columns]
+    return df
+
+
+def _coluna(df, nome):
+    """Retorna a coluna ou uma série vazia (NaN) se a planilha não a tiver"""
+    if nome in df.columns:
+        return df[nome]
+    return pd.Series(float('nan'), index=df.index, dtype=object)
+
+
+def _texto(serie, padrao=''):
+    """Converte para texto sem espaços nas pontas; vazio/NaN vira o padrão"""
+    texto = serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+    return texto.mask(texto == '', padrao)
+
+
+def _data(serie):
+    return pd.to_datetime(serie, errors='coerce', format='mixed')
+
+
+def _numero(serie):
+    return pd.to_numeric(serie, errors='coerce')
+
+
+def _separar(df, regras):
+    """Aplica as regras (máscara de inválidos, motivo) e separa válidas e rejeitadas"""
+    motivo = pd.Series('', index=df.index, dtype=object)
+    for mascara, texto in regras:
+        mascara = mascara.fillna(True).astype(bool)
+        motivo[mascara] = motivo[mascara] + texto + '; '
+    invalidas = motivo != ''
+
+    rejeitadas = df[invalidas].copy()
+    # +2: cabeçalho na linha 1 e índice do pandas começando em 0
+    rejeitadas.insert(0, 'motivo', motivo[invalidas].str.rstrip('; '))
+    rejeitadas.insert(0, 'linha', rejeitadas.index + 2)
+    return ~invalidas, rejeitadas
+
+
+def validar_eventos(df):
+    """Retorna (registros válidos prontos para inserir, linhas rejeitadas)"""
+    cliente = _texto(_coluna(df, 'cliente'))
+    data_evento = _data(_coluna(df, 'data_evento'))
+    valor_negociado = _numero(_coluna(df, 'valor_negociado'))
+    valor_pago = _numero(_coluna(df, 'valor_pago')).fillna(0.0)
+    status = _texto(_coluna(df, 'status'), 'Agendado')
+
+    validas, rejeitadas = _separar(df, [
+        (cliente == '', 'cliente ausente'),
+        (data_evento.isna(), 'data_evento inválida ou ausente'),
+        (valor_negociado.isna(), 'valor_negociado inválido ou ausente'),
+        (valor_negociado < 0, 'valor_negociado negativo'),
+        (valor_pago < 0, 'valor_pago negativo'),
+        (~status.isin(STATUS_PERMITIDOS), 'status deve ser ' + ', '.join(STATUS_PERMITIDOS)),
+    ])
+
+    registros = pd.DataFrame({
+        'cliente': cliente,
+        'tipo_servico': _texto(_coluna(df, 'tipo_servico'), 'Fotografia'),
+        'data_evento': data_evento.dt.date,
+        'valor_negociado': valor_negociado.astype(float),
+        'valor_pago': valor_pago.astype(float),
+        'status': status,
+        'observacoes': _texto(_coluna(df, 'observacoes')),
+        'ensaios_extras': 'Nenhum',
+    }).loc[validas, list(CAMPOS_EVENTO)]
+    return registros, rejeitadas
+
+
+def validar_transacoes(df):
+    """Retorna (registros válidos prontos para inserir, linhas rejeitadas)"""
+    tipo_informado = _texto(_coluna(df, 'tipo'), 'Entrada')
+    tipo = tipo_informado.str.lower().map(TIPOS_TRANSACAO)
+    valor = _numero(_coluna(df, 'valor'))
+    data_transacao = _data(_coluna(df, 'data_transacao'))
+
+    validas, rejeitadas = _separar(df, [
+        (tipo.isna(), 'tipo deve ser Entrada, Saída ou Entrada Pendente'),
+        (valor.isna(), 'valor inválido ou ausente'),
+        (valor < 0, 'valor negativo'),
+        (data_transacao.isna(), 'data_transacao inválida ou ausente'),
+    ])
+
+    registros = pd.DataFrame({
+        'tipo': tipo,
+        'valor': valor.astype(float),
+        'descricao': _texto(_coluna(df, 'descricao')),
+        'data_transacao': data_transacao.dt.date,
+        'categoria': _texto(_coluna(df, 'categoria')),
+    }).loc[validas, list(CAMPOS_TRANSACAO)]
+    return registros, rejeitadas
+
+
+def _normalizar(serie):
+    """Texto canônico para chave/hash: números com 2 casas, vazio para nulos"""
+    if pd.api.types.is_float_dtype(serie):
+        return serie.map(lambda v: '' if pd.isna(v) else f'{v:.2f}')
+    return serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+
+
+def _sha1(textos):
+    return [hashlib.sha1(texto.encode('utf-8')).hexdigest() for texto in textos]
+
+
+def identificar(registros, campos_chave):
+    """Acrescenta chave_importacao e hash_conteudo aos registros
+
+    Linhas com os mesmos campos de chave são numeradas na ordem em que
+    aparecem, então lançamentos repetidos legítimos (duas corridas iguais no
+    mesmo dia) continuam sendo linhas distintas.
+    """
+    if registros.empty:
+        return registros.assign(chave_importacao=pd.Series(dtype=object),
+                                hash_conteudo=pd.Series(dtype=object))
+    separador = '\x1f'
+    base = _normalizar(registros[campos_chave[0]]).str.casefold()
+    for campo in campos_chave[1:]:
+        base = base + separador + _normalizar(registros[campo]).str.casefold()
+    ocorrencia = base.groupby(base).cumcount().astype(str)
+
+    conteudo = _normalizar(registros[registros.columns[0]])
+    for campo in registros.columns[1:]:
+        conteudo = conteudo + separador + _normalizar(registros[campo])
+
+    return registros.assign(
+        chave_importacao=_sha1(base + separador + ocorrencia),
+        hash_conteudo=_sha1(conteudo),
+    )
+
+
+def identificar_existentes(conexao, tabela, campos, campos_chave, condicao=None):
+    """Calcula chave e hash das linhas já gravadas sem chave (bancos anteriores)
+
+    As linhas são numeradas na ordem de id, como se viessem de uma planilha.
+    condicao (SQL) limita as linhas que podem ter vindo de uma importação; as
+    demais ficam sem chave e nunca são atualizadas por uma planilha.
+    Retorna quantas linhas foram preenchidas.
+    """
+    filtro = f" AND ({condicao})" if condicao else ""
+    linhas = conexao.exec_driver_sql(
+        f"SELECT id, {', '.join(campos)} FROM {tabela} WHERE chave_importacao IS NULL{filtro} ORDER BY id"
+    ).fetchall()
+    if not linhas:
+        return 0
+    registros = pd.DataFrame(linhas, columns=('id',) + tuple(campos))
+    identificados = identificar(registros[list(campos)], campos_chave)
+    conexao.exec_driver_sql(
+        f"UPDATE {tabela} SET chave_importacao = ?, hash_conteudo = ? WHERE id = ?",
+        list(zip(identificados['chave_importacao'], identificados['hash_conteudo'],
+                 registros['id'].astype(int).tolist())),
+    )
+    return len(linhas)
+
+
+def _classificar(conexao, tabela, registros):
+    """Junta as chaves do arquivo com as gravadas: retorna (novos, alterados, inalterados)"""
+    conexao.exec_driver_sql("DROP TABLE IF EXISTS temp.importacao_chaves")
+    conexao.exec_driver_sql("CREATE TEMP TABLE importacao_chaves (chave VARCHAR(40) PRIMARY KEY)")
+    conexao.exec_driver_sql(
+        "INSERT INTO importacao_chaves (chave) VALUES (?)",
+        [(chave,) for chave in registros['chave_importacao']],
+    )
+    existentes = pd.DataFrame(
+        conexao.exec_driver_sql(
+            f"SELECT t.chave_importacao, t.id, t.hash_conteudo FROM {tabela.name} t "
+            f"JOIN importacao_chaves c ON c.chave = t.chave_importacao"
+        ).fetchall(),
+        columns=['chave_importacao', 'id_existente', 'hash_existente'],
+    )
+    conexao.exec_driver_sql("DROP TABLE temp.importacao_chaves")
+
+    juntos = registros.merge(existentes, on='chave_importacao', how='left')
+    novos = juntos['id_existente'].isna()
+    iguais = ~novos & (juntos['hash_conteudo'] == juntos['hash_existente'])
+    colunas = list(registros.columns)
+    return (juntos.loc[novos, colunas],
+            juntos.loc[~novos & ~iguais, colunas + ['id_existente']],
+            int(iguais.sum()))
+
+
+def sincronizar_em_lotes(engine, tabela, registros, campos_chave,
+                         tamanho_lote=TAMANHO_LOTE, ao_processar=None):
+    """Insere as linhas novas e atualiza as alteradas, em lotes
+
+    Cada lote é classificado e gravado na sua própria transação curta de
+    escrita (banco.escrita()): as rotas que alteram dados esperam um lote, não
+    a importação inteira. Se a importação parar no meio, os lotes já gravados
+    ficam; reimportar o arquivo completa o restante pelas chaves.
+    ao_processar(processadas, inseridas, atualizadas, inalteradas) é chamado
+    após o commit de cada lote (contagens do lote), se informado.
+    Retorna (inseridas, atualizadas, inalteradas).
+    """
+    registros = identificar(registros, campos_chave)
+    colunas = [c for c in registros.columns if c != 'chave_importacao']
+    # As colunas de cada registro viram o SET; id_existente localiza a linha
+    comando = update(tabela).where(tabela.c.id == bindparam('id_existente'))
+    inseridas = atualizadas = inalteradas = 0
+    for inicio in range(0, len(registros), tamanho_lote):
+        lote = registros.iloc[inicio:inicio + tamanho_lote]
+        with escrita(), engine.begin() as conexao:
+            novos, alterados, iguais = _classificar(conexao, tabela, lote)
+            if len(novos):
+                conexao.execute(insert(tabela), novos.to_dict('records'))
+            if len(alterados):
+                alterados = alterados.astype({'id_existente': int})
+                conexao.execute(comando, alterados[colunas + ['id_existente']].to_dict('records'))
+        inseridas += len(novos)
+        atualizadas += len(alterados)
+        inalteradas += iguais
+        if ao_processar:
+            ao_processar(len(lote), len(novos), len(alterados), iguais)
+    return inseridas, atualizadas, inalteradas
+
+
+def salvar_rejeicoes(rejeitadas, pasta):
+    """Grava o relatório de rejeições em CSV (';', UTF-8 com BOM) e retorna o nome do arquivo"""
+    nome = f'rejeicoes_{uuid.uuid4().hex}.csv'
+    rejeitadas.to_csv(os.path.join(pasta, nome), sep=';', index=False, encoding='utf-8-sig')
+    return nome
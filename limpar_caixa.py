@@ -1,10 +1,11 @@
-from app import app, db, Transacao
+from app import create_app
+from banco import escrita
+from modelos import db
 
-with app.app_context():
-    # Excluir todas as transações
-    transacoes_excluidas = Transacao.query.count()
-    Transacao.query.delete()
-    db.session.commit()
+with create_app().app_context():
+    # Excluir todas as transações (mesmo caminho de escrita das rotas, ver banco.py)
+    with escrita(), db.engine.begin() as conexao:
+        transacoes_excluidas = conexao.exec_driver_sql("DELETE FROM transacao").rowcount
     
     print(f"✅ {transacoes_excluidas} transações excluídas do caixa!")
     print("Dados de caixa limpos com sucesso.")
\ No newline at end of file
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de desempenho por rota (formato texto do Prometheus em /metrics)
+
+instalar_metricas() liga ao app:
+- before/after_request: tempo total de cada requisição, por rota e método;
+- eventos do engine (before/after_cursor_execute): quantidade e tempo das
+  consultas SQL de cada requisição;
+- sinais de template do Flask: tempo de renderização;
+- consultas acima de METRICAS_CONSULTA_LENTA segundos vão para o log
+  'fotografia.consultas_lentas' e para uma lista das últimas (com a rota de
+  origem), em /metrics/consultas-lentas. Dos parâmetros só aparecem os tipos
+  (nomes de clientes e valores ficam fora), a menos que METRICAS_PARAMETROS
+  esteja ligado. BEGIN/COMMIT/ROLLBACK ficam de fora: o tempo deles é espera
+  pela trava do banco, não custo da consulta.
+
+Com METRICAS_SERVER_TIMING ligado, cada resposta leva o cabeçalho
+Server-Timing (banco x renderização x total), visível nas ferramentas do
+navegador. Cada app guarda os seus valores em app.extensions['metricas'];
+eles zeram quando o servidor reinicia.
+
+orcamento_consultas(n) declara quantos comandos SQL uma rota ou função pode
+executar (decorador ou bloco with). Se passar, com o app em modo de teste
+(TESTING) levanta OrcamentoExcedido; fora dele, registra no log
+'fotografia.orcamento_consultas' e em fotografia_orcamento_excedido_total.
+A contagem vem do mesmo evento do engine, então só vale depois de
+instalar_metricas(). Nas respostas em streaming (ex: exportações), as
+consultas do gerador também contam e o limite é conferido no fim do corpo.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+from flask import (Response, before_render_template, current_app, g, has_app_context, has_request_context, jsonify,
+                   request, template_rendered)
+from sqlalchemy import event
+
+BALDES_TEMPO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # segundos
+BALDES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+CONSULTAS_LENTAS_GUARDADAS = 100
+TAMANHO_PARAMETROS = 500  # caracteres dos parâmetros guardados no log
+CONTROLE_TRANSACAO = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'END')
+
+registro = logging.getLogger('fotografia.consultas_lentas')
+registro_orcamento = logging.getLogger('fotografia.orcamento_consultas')
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos):
+    """[('rota', '/x')] -> '{rota="/x"}'"""
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + '}'
+
+
+def _tipos_parametros(parametros, varios):
+    """Resumo dos parâmetros sem os valores: (int, str) ou {'nome': str}"""
+    if varios:
+        return f"{len(parametros)} conjuntos de parâmetros"
+    if isinstance(parametros, dict):
+        return '{' + ', '.join(f"'{nome}': {type(valor).__name__}" for nome, valor in parametros.items()) + '}'
+    return '(' + ', '.join(type(valor).__name__ for valor in parametros or ()) + ')'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma com rótulos (baldes acumulados, soma e contagem)"""
+
+    def __init__(self, nome, ajuda, rotulos, baldes):
+        self.nome, self.ajuda, self.rotulos, self.baldes = nome, ajuda, rotulos, baldes
+        self._series = {}  # valores dos rótulos -> [contagem por balde..., soma, total]
+        self._trava = threading.Lock()
+
+    def observar(self, valor, *rotulos):
+        with self._trava:
+            serie = self._series.setdefault(rotulos, [0] * len(self.baldes) + [0.0, 0])
+            for i, limite in enumerate(self.baldes):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._trava:
+            series = {rotulos: list(serie) for rotulos, serie in self._series.items()}
+        for valores, serie in sorted(series.items()):
+            base = list(zip(self.rotulos, valores))
+            for limite, contagem in zip(self.baldes, serie):
+                linhas.append(f"{self.nome}_bucket{_rotulos(base + [('le', _numero(limite))])} {contagem}")
+            linhas.append(f"{self.nome}_bucket{_rotulos(base + [('le', '+Inf')])} {serie[-1]}")
+            linhas.append(f"{self.nome}_sum{_rotulos(base)} {_numero(serie[-2])}")
+            linhas.append(f"{self.nome}_count{_rotulos(base)} {serie[-1]}")
+        return linhas
+
+
+class Contador:
+    """Contador com rótulos"""
+
+    def __init__(self, nome, ajuda, rotulos):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def somar(self, *rotulos, valor=1):
+        with self._trava:
+            self._series[rotulos] = self._series.get(rotulos, 0) + valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._trava:
+            series = dict(self._series)
+        for valores, total in sorted(series.items()):
+            linhas.append(f"{self.nome}{_rotulos(list(zip(self.rotulos, valores)))} {_numero(total)}")
+        return linhas
+
+
+class Metricas:
+    """Coleta as medidas das requisições e das consultas de um app"""
+
+    def __init__(self):
+        self.requisicoes = Contador(
+            'fotografia_requisicoes_total', 'Requisições atendidas', ('rota', 'metodo', 'status'))
+        self.duracao = Histograma(
+            'fotografia_requisicao_segundos', 'Tempo total da requisição', ('rota', 'metodo'), BALDES_TEMPO)
+        self.duracao_sql = Histograma(
+            'fotografia_requisicao_sql_segundos', 'Tempo gasto em consultas SQL na requisição',
+            ('rota', 'metodo'), BALDES_TEMPO)
+        self.consultas = Histograma(
+            'fotografia_requisicao_consultas', 'Consultas SQL executadas na requisição',
+            ('rota', 'metodo'), BALDES_CONSULTAS)
+        self.duracao_render = Histograma(
+            'fotografia_requisicao_render_segundos', 'Tempo de renderização de templates na requisição',
+            ('rota', 'metodo'), BALDES_TEMPO)
+        self.lentas = Contador(
+            'fotografia_consultas_lentas_total', 'Consultas acima do limite de consulta lenta', ('rota',))
+        self.orcamentos_excedidos = Contador(
+            'fotografia_orcamento_excedido_total', 'Execuções acima do orçamento de consultas', ('orcamento',))
+        self.ultimas_lentas = deque(maxlen=CONSULTAS_LENTAS_GUARDADAS)
+
+    def exportar(self):
+        linhas = []
+        for metrica in (self.requisicoes, self.duracao, self.duracao_sql, self.consultas,
+                        self.duracao_render, self.lentas, self.orcamentos_excedidos):
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+
+
+class OrcamentoExcedido(Exception):
+    """Uma rota ou função executou mais comandos SQL do que o orçamento declarado"""
+
+
+_orcamentos = threading.local()  # orçamentos abertos na thread atual (blocos with aninhados)
+
+
+class orcamento_consultas:
+    """Limite de comandos SQL de um bloco (with) ou de uma função/rota (decorador)
+
+    Orçamentos aninhados contam as mesmas consultas. Como decorador, expõe
+    o limite em funcao.orcamento_consultas; se a rota responde em streaming,
+    as consultas do gerador entram na mesma conta, conferida no fim do corpo.
+    """
+
+    def __init__(self, maximo, nome=None):
+        self.maximo = maximo
+        self.nome = nome
+        self.consultas = 0
+        self.excedido = False
+
+    def __enter__(self):
+        self.consultas = 0
+        _orcamentos.__dict__.setdefault('abertos', []).append(self)
+        return self
+
+    def __exit__(self, tipo_erro, erro, rastreamento):
+        _orcamentos.abertos.remove(self)
+        if self.nome is None:
+            self.nome = _rota_atual() if has_request_context() else 'bloco'
+        if tipo_erro is None:
+            self._verificar(current_app._get_current_object() if has_app_context() else None)
+        return False
+
+    def _verificar(self, app):
+        if self.excedido or self.consultas <= self.maximo:
+            return
+        self.excedido = True
+        mensagem = f"{self.nome}: {self.consultas} consultas SQL (orçamento {self.maximo})"
+        if app is not None and app.testing:
+            raise OrcamentoExcedido(mensagem)
+        metricas = app.extensions.get('metricas') if app is not None else None
+        if metricas is not None:
+            metricas.orcamentos_excedidos.somar(self.nome)
+        registro_orcamento.warning(mensagem)
+
+    def acompanhar(self, corpo, app):
+        """Corpo de uma resposta em streaming que continua contando neste orçamento
+
+        O servidor itera o corpo depois que a rota retornou (e às vezes fora do
+        contexto do app), por isso o app é capturado antes.
+        """
+        iterador = iter(corpo)
+        try:
+            while True:
+                abertos = _orcamentos.__dict__.setdefault('abertos', [])
+                abertos.append(self)
+                try:
+                    parte = next(iterador)
+                except StopIteration:
+                    break
+                finally:
+                    abertos.remove(self)
+                yield parte
+        finally:
+            if hasattr(corpo, 'close'):
+                corpo.close()
+        self._verificar(app)  # Só quando o corpo termina (um stream SSE fechado pelo cliente não conta)
+
+    def __call__(self, funcao):
+        maximo, nome = self.maximo, self.nome or funcao.__name__
+
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with orcamento_consultas(maximo, nome) as orcamento:  # Um contador por chamada (várias threads)
+                resposta = funcao(*args, **kwargs)
+            if isinstance(resposta, Response) and resposta.is_streamed and not resposta.direct_passthrough:
+                app = current_app._get_current_object() if has_app_context() else None
+                resposta.response = orcamento.acompanhar(resposta.response, app)
+            return resposta
+        envolvida.orcamento_consultas = maximo
+        return envolvida
+
+
+def _contar_orcamentos():
+    for orcamento in getattr(_orcamentos, 'abertos', ()):
+        orcamento.consultas += 1
+
+
+def _rota_atual():
+    """Regra da rota (ex: /evento/<int:id>/pagar), para não criar uma série por id"""
+    if not has_request_context():
+        return '(fora de requisição)'
+    return request.url_rule.rule if request.url_rule else '(sem rota)'
+
+
+def instalar_metricas(app, engine):
+    """Liga a coleta ao app e ao engine e registra /metrics e /metrics/consultas-lentas"""
+    metricas = app.extensions['metricas'] = Metricas()
+    app.config.setdefault('METRICAS_CONSULTA_LENTA', 0.25)
+    app.config.setdefault('METRICAS_SERVER_TIMING', False)
+    app.config.setdefault('METRICAS_PARAMETROS', False)
+
+    @app.before_request
+    def iniciar_medicao():
+        g.metricas = {'inicio': time.perf_counter(), 'consultas': 0, 'sql': 0.0, 'render': 0.0}
+
+    @app.after_request
+    def registrar_medicao(resposta):
+        medicao = g.pop('metricas', None)
+        if medicao is None:
+            return resposta
+        total = time.perf_counter() - medicao['inicio']
+        rota, metodo = _rota_atual(), request.method
+        metricas.requisicoes.somar(rota, metodo, str(resposta.status_code))
+        metricas.duracao.observar(total, rota, metodo)
+        metricas.duracao_sql.observar(medicao['sql'], rota, metodo)
+        metricas.consultas.observar(medicao['consultas'], rota, metodo)
+        metricas.duracao_render.observar(medicao['render'], rota, metodo)
+        if app.config['METRICAS_SERVER_TIMING']:
+            resposta.headers['Server-Timing'] = (
+                f'db;dur={medicao["sql"] * 1000:.1f};desc="SQL ({medicao["consultas"]})", '
+                f'render;dur={medicao["render"] * 1000:.1f}, total;dur={total * 1000:.1f}'
+            )
+        return resposta
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes_consulta(conexao, cursor, sql, parametros, contexto, varios):
+        conexao.info.setdefault('metricas_inicio', []).append(time.perf_counter())
+        _contar_orcamentos()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois_consulta(conexao, cursor, sql, parametros, contexto, varios):
+        duracao = time.perf_counter() - conexao.info['metricas_inicio'].pop()
+        medicao = g.get('metricas') if has_request_context() else None
+        if medicao is not None:
+            medicao['consultas'] += 1
+            medicao['sql'] += duracao
+        if duracao >= app.config['METRICAS_CONSULTA_LENTA'] and not sql.lstrip().upper().startswith(CONTROLE_TRANSACAO):
+            rota = _rota_atual()
+            if app.config['METRICAS_PARAMETROS']:
+                texto_parametros = repr(parametros)[:TAMANHO_PARAMETROS]
+            else:
+                texto_parametros = _tipos_parametros(parametros, varios)[:TAMANHO_PARAMETROS]
+            metricas.lentas.somar(rota)
+            metricas.ultimas_lentas.append({
+                'momento': datetime.now().isoformat(timespec='seconds'),
+                'rota': rota,
+                'segundos': round(duracao, 4),
+                'sql': ' '.join(sql.split()),
+                'parametros': texto_parametros,
+            })
+            registro.warning("Consulta lenta (%.3fs) em %s: %s | parâmetros: %s",
+                             duracao, rota, ' '.join(sql.split()), texto_parametros)
+
+    @event.listens_for(engine, 'handle_error')
+    def erro_consulta(contexto):
+        # Consulta que falhou: o after_cursor_execute não roda
+        inicios = contexto.connection.info.get('metricas_inicio') if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
+
+    def antes_render(remetente, template, context, **extra):
+        medicao = g.get('metricas')
+        if medicao is not None:
+            medicao.setdefault('render_inicio', []).append(time.perf_counter())
+
+    def depois_render(remetente, template, context, **extra):
+        medicao = g.get('metricas')
+        if medicao is not None and medicao.get('render_inicio'):
+            medicao['render'] += time.perf_counter() - medicao['render_inicio'].pop()
+
+    before_render_template.connect(antes_render, app, weak=False)
+    template_rendered.connect(depois_render, app, weak=False)
+
+    def exportar_metricas():
+        return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    def consultas_lentas():
+        return jsonify(list(reversed(metricas.ultimas_lentas)))
+
+    app.add_url_rule('/metrics', 'metricas', orcamento_consultas(0)(exportar_metricas))
+    app.add_url_rule('/metrics/consultas-lentas', 'consultas_lentas', orcamento_consultas(0)(consultas_lentas))
+    return metricas
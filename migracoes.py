@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Migrações versionadas do banco de dados
+
+Cada migração tem um número de versão, uma descrição e uma função que recebe
+a conexão SQLAlchemy. As versões aplicadas ficam registradas na tabela
+versao_schema; aplicar_migracoes() executa, em ordem e na mesma transação,
+apenas as que ainda não foram aplicadas.
+
+As migrações devem ser idempotentes: em um banco novo o db.create_all() já
+cria tabelas e índices dos modelos, e as migrações apenas completam o que
+falta (colunas novas em bancos antigos, triggers, dados derivados).
+"""
+
+from datetime import datetime
+
+from alertas import instalar_alertas
+from analise import instalar_analise, reconstruir_analise
+from busca import instalar_indice, reconstruir_indice
+from resumo_financeiro import instalar_triggers, reconstruir_resumo
+from versao_dados import instalar_contador, instalar_versao_linhas
+
+MIGRACOES = []
+
+
+def migracao(versao, descricao):
+    """Registra uma função como migração da versão informada"""
+    def registrar(funcao):
+        MIGRACOES.append((versao, descricao, funcao))
+        MIGRACOES.sort(key=lambda m: m[0])
+        return funcao
+    return registrar
+
+
+def _colunas(conexao, tabela):
+    return [linha[1] for linha in conexao.exec_driver_sql(f"PRAGMA table_info({tabela})")]
+
+
+@migracao(1, "Coluna ensaios_extras na tabela evento")
+def _ensaios_extras(conexao):
+    if 'ensaios_extras' not in _colunas(conexao, 'evento'):
+        conexao.exec_driver_sql("ALTER TABLE evento ADD COLUMN ensaios_extras VARCHAR(100) DEFAULT 'Nenhum'")
+    conexao.exec_driver_sql("UPDATE evento SET ensaios_extras = 'Nenhum' WHERE ensaios_extras IS NULL")
+
+
+@migracao(2, "Triggers e carga inicial do resumo_financeiro")
+def _resumo_financeiro(conexao):
+    instalar_triggers(conexao)
+    if conexao.exec_driver_sql("SELECT COUNT(*) FROM resumo_financeiro").scalar() == 0:
+        reconstruir_resumo(conexao)
+
+
+@migracao(3, "Índices compostos para os filtros de evento e transacao")
+def _indices(conexao):
+    for comando in (
+        "CREATE INDEX IF NOT EXISTS ix_evento_status_data ON evento (status, data_evento)",
+        "CREATE INDEX IF NOT EXISTS ix_evento_data ON evento (data_evento)",
+        "CREATE INDEX IF NOT EXISTS ix_transacao_tipo_data ON transacao (tipo, data_transacao)",
+        "CREATE INDEX IF NOT EXISTS ix_transacao_evento_tipo ON transacao (evento_id, tipo)",
+        "CREATE INDEX IF NOT EXISTS ix_transacao_data ON transacao (data_transacao)",
+    ):
+        conexao.exec_driver_sql(comando)
+
+
+@migracao(4, "Índices para as ordenações da listagem de eventos")
+def _indices_listagem_eventos(conexao):
+    for comando in (
+        "CREATE INDEX IF NOT EXISTS ix_evento_cliente ON evento (cliente)",
+        "CREATE INDEX IF NOT EXISTS ix_evento_valor ON evento (valor_negociado)",
+    ):
+        conexao.exec_driver_sql(comando)
+
+
+@migracao(5, "Índice de busca textual FTS5 (clientes, observações, descrições)")
+def _indice_busca(conexao):
+    instalar_indice(conexao)
+    reconstruir_indice(conexao)
+
+
+@migracao(6, "Contador de versão dos dados (ETag e cache das APIs)")
+def _versao_dados(conexao):
+    instalar_contador(conexao)
+
+
+@migracao(7, "Chave e hash de importação (reimportação sem duplicar linhas)")
+def _chave_importacao(conexao):
+    # Importado aqui: carrega o pandas, só necessário em bancos anteriores a esta migração
+    from importacao import (CAMPOS_EVENTO, CAMPOS_TRANSACAO, CHAVE_EVENTO, CHAVE_TRANSACAO, TRANSACOES_IMPORTAVEIS,
+                            identificar_existentes)
+
+    for tabela, campos, campos_chave, condicao in (
+        ('evento', CAMPOS_EVENTO, CHAVE_EVENTO, None),
+        ('transacao', CAMPOS_TRANSACAO, CHAVE_TRANSACAO, TRANSACOES_IMPORTAVEIS),
+    ):
+        colunas = _colunas(conexao, tabela)
+        if 'chave_importacao' not in colunas:
+            conexao.exec_driver_sql(f"ALTER TABLE {tabela} ADD COLUMN chave_importacao VARCHAR(40)")
+        if 'hash_conteudo' not in colunas:
+            conexao.exec_driver_sql(f"ALTER TABLE {tabela} ADD COLUMN hash_conteudo VARCHAR(40)")
+        conexao.exec_driver_sql(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{tabela}_chave_importacao ON {tabela} (chave_importacao)"
+        )
+        # Linhas já existentes passam a ser reconhecidas por uma nova importação
+        identificar_existentes(conexao, tabela, campos, campos_chave, condicao)
+
+
+@migracao(8, "Versão por linha em evento e transacao (cache de linhas renderizadas)")
+def _versao_linhas(conexao):
+    for tabela in ('evento', 'transacao'):
+        if 'versao' not in _colunas(conexao, tabela):
+            conexao.exec_driver_sql(f"ALTER TABLE {tabela} ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+    instalar_versao_linhas(conexao)
+
+
+@migracao(9, "Totais mensais da análise (meses recalculados sob demanda)")
+def _analise(conexao):
+    instalar_analise(conexao)
+    reconstruir_analise(conexao)
+
+
+@migracao(10, "Tabela de alertas pré-calculados (eventos próximos e saldos vencidos)")
+def _alertas(conexao):
+    instalar_alertas(conexao)
+
+
+@migracao(11, "Transações dos eventos sem chave de importação")
+def _transacoes_do_app(conexao):
+    # A versão 7 chaveava também pagamentos e entradas pendentes; uma planilha com os mesmos
+    # campos os atualizaria e o valor_pago do evento deixaria de bater com as transações
+    conexao.exec_driver_sql(
+        "UPDATE transacao SET chave_importacao = NULL, hash_conteudo = NULL "
+        "WHERE evento_id IS NOT NULL AND chave_importacao IS NOT NULL"
+    )
+
+
+@migracao(12, "Contador de versão incrementado uma vez por escrita")
+def _versao_uma_vez(conexao):
+    instalar_versao_linhas(conexao)
+
+
+def _preparar_tabela(conexao):
+    conexao.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS versao_schema ("
+        "versao INTEGER PRIMARY KEY, descricao VARCHAR(200) NOT NULL, aplicada_em DATETIME NOT NULL)"
+    )
+
+
+def versao_atual(conexao):
+    """Retorna a maior versão aplicada (0 se nenhuma)"""
+    _preparar_tabela(conexao)
+    return conexao.exec_driver_sql("SELECT COALESCE(MAX(versao), 0) FROM versao_schema").scalar()
+
+
+def migracoes_pendentes(conexao):
+    """Lista (versao, descricao) das migrações ainda não aplicadas"""
+    atual = versao_atual(conexao)
+    return [(versao, descricao) for versao, descricao, _ in MIGRACOES if versao > atual]
+
+
+def aplicar_migracoes(conexao):
+    """Aplica as migrações pendentes e retorna a lista das aplicadas"""
+    atual = versao_atual(conexao)
+    aplicadas = []
+    for versao, descricao, funcao in MIGRACOES:
+        if versao <= atual:
+            continue
+        funcao(conexao)
+        conexao.exec_driver_sql(
+            "INSERT INTO versao_schema (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+            (versao, descricao, datetime.utcnow().isoformat(sep=' ')),
+        )
+        aplicadas.append((versao, descricao))
+    return aplicadas
+
+
+# Tabelas criadas pelas migrações fora dos modelos (db.drop_all() não as conhece)
+TABELAS_MIGRACOES = (
+    'alerta', 'alerta_execucao',
+    'analise_meses_pendentes', 'analise_eventos_mes', 'analise_caixa_mes',
+    'busca_fts', 'versao_dados',
+)
+
+
+def resetar_versao(conexao):
+    """Esquece as versões aplicadas e remove as tabelas das migrações (usado após recriar todas as tabelas)"""
+    for tabela in TABELAS_MIGRACOES:
+        conexao.exec_driver_sql(f"DROP TABLE IF EXISTS {tabela}")
+    conexao.exec_driver_sql("DROP TABLE IF EXISTS versao_schema")
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Modelos do banco de dados (Flask-SQLAlchemy)
+
+O db não conhece o app: create_app (app.py) chama db.init_app. As tabelas
+derivadas (resumo, análise, alertas, índice de busca) são mantidas por
+triggers e pelas migrações (ver migracoes.py).
+"""
+
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+
+from migracoes import aplicar_migracoes
+from resumo_financeiro import PERIODO_GERAL
+
+db = SQLAlchemy()
+
+
+class Evento(db.Model):
+    __table_args__ = (
+        db.Index('ix_evento_status_data', 'status', 'data_evento'),
+        db.Index('ix_evento_data', 'data_evento'),
+        db.Index('ix_evento_cliente', 'cliente'),
+        db.Index('ix_evento_valor', 'valor_negociado'),
+        db.Index('ix_evento_chave_importacao', 'chave_importacao', unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    cliente = db.Column(db.String(100), nullable=False)
+    tipo_servico = db.Column(db.String(50), nullable=False)  # Fotografia, Storymaker, Ambos
+    data_evento = db.Column(db.Date, nullable=False)
+    valor_negociado = db.Column(db.Float, nullable=False)
+    valor_pago = db.Column(db.Float, default=0.0)
+    status = db.Column(db.String(20), default='Agendado')  # Agendado, Realizado, Cancelado
+    observacoes = db.Column(db.Text)
+    ensaios_extras = db.Column(db.String(100), nullable=False, default='Nenhum')
+    data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
+    chave_importacao = db.Column(db.String(40))  # Identifica a linha entre reimportações
+    hash_conteudo = db.Column(db.String(40))
+    versao = db.Column(db.Integer, nullable=False, server_default='0', server_onupdate=db.FetchedValue())  # Mantida por trigger (versao_dados.py)
+
+
+class Transacao(db.Model):
+    __table_args__ = (
+        db.Index('ix_transacao_tipo_data', 'tipo', 'data_transacao'),
+        db.Index('ix_transacao_evento_tipo', 'evento_id', 'tipo'),
+        db.Index('ix_transacao_data', 'data_transacao'),
+        db.Index('ix_transacao_chave_importacao', 'chave_importacao', unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    evento_id = db.Column(db.Integer, db.ForeignKey('evento.id'))
+    tipo = db.Column(db.String(20), nullable=False)  # Entrada, Saída
+    valor = db.Column(db.Float, nullable=False)
+    descricao = db.Column(db.String(200), nullable=False)
+    data_transacao = db.Column(db.Date, nullable=False)
+    categoria = db.Column(db.String(50))  # Equipamento, Transporte, etc.
+    chave_importacao = db.Column(db.String(40))  # Identifica a linha entre reimportações
+    hash_conteudo = db.Column(db.String(40))
+    versao = db.Column(db.Integer, nullable=False, server_default='0', server_onupdate=db.FetchedValue())  # Mantida por trigger (versao_dados.py)
+
+
+class ResumoFinanceiro(db.Model):
+    """Totais do caixa e dos eventos, mantidos por triggers (ver resumo_financeiro.py)"""
+    __tablename__ = 'resumo_financeiro'
+    periodo = db.Column(db.String(7), primary_key=True)  # 'geral' ou 'YYYY-MM'
+    entradas = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    saidas = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    pendentes = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    total_transacoes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    transacoes_pendentes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_eventos = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    eventos_agendados = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    eventos_realizados = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    eventos_cancelados = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_negociado = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    total_recebido = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
+
+def inicializar_banco():
+    """Cria as tabelas que faltam e aplica as migrações pendentes (ver migracoes.py)"""
+    db.create_all()
+    with db.engine.begin() as conexao:
+        return aplicar_migracoes(conexao)
+
+
+def obter_resumo(periodo=PERIODO_GERAL):
+    """Retorna a linha do resumo do período (vazia se ainda não houver movimento)"""
+    return db.session.get(ResumoFinanceiro, periodo) or ResumoFinanceiro(
+        periodo=periodo,
+        entradas=0.0, saidas=0.0, pendentes=0.0,
+        total_transacoes=0, transacoes_pendentes=0,
+        total_eventos=0, eventos_agendados=0, eventos_realizados=0, eventos_cancelados=0,
+        total_negociado=0.0, total_recebido=0.0
+    )
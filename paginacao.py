@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Paginação por cursor (keyset) para as listagens
+
+Em vez de OFFSET, cada página guarda os valores da chave de ordenação da
+última linha exibida (ex: data_transacao e id). A próxima página busca as
+linhas que vêm depois dessa chave, então o custo de uma página não cresce
+com o tamanho da tabela nem com a profundidade da rolagem.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+PAGINA_PADRAO = 50
+PAGINA_MAXIMA = 200
+
+
+def codificar_cursor(*valores):
+    """Codifica os valores da chave de ordenação em um token opaco para a URL"""
+    serializados = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores]
+    texto = json.dumps(serializados, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Decodifica o token gerado por codificar_cursor (ValueError se inválido)"""
+    try:
+        preenchido = cursor + '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(preenchido.encode('ascii')))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if not isinstance(valores, list):
+        raise ValueError('Cursor inválido')
+    return valores
+
+
+def ler_data(valor):
+    """Converte 'YYYY-MM-DD' em date (None se vazio, ValueError se inválido)"""
+    return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+
+
+def ler_limite(args, padrao=PAGINA_PADRAO):
+    """Lê o parâmetro 'limite' da query string dentro de 1..PAGINA_MAXIMA"""
+    limite = args.get('limite', padrao, type=int)
+    return max(1, min(limite, PAGINA_MAXIMA))
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Reconciliação das entradas pendentes (valores a receber dos eventos)
+
+Regra: todo evento não cancelado com saldo (valor_negociado - valor_pago)
+maior que zero tem exatamente uma transação 'Entrada Pendente' vinculada,
+com o valor do saldo e a data do evento. Eventos quitados, cancelados ou
+excluídos não têm nenhuma.
+
+A diferença entre essa regra e o que está gravado é calculada em SQL, de uma
+vez para todos os eventos (ou só para os informados): três comandos removem,
+atualizam e inserem o que for preciso. Entradas pendentes lançadas à mão,
+sem evento vinculado, não são tocadas.
+"""
+
+TIPO_PENDENTE = 'Entrada Pendente'
+CATEGORIA_PENDENTE = 'Pagamento de Cliente'
+
+# Situação esperada: uma linha por evento com saldo a receber
+_ALVO = """
+    SELECT id AS evento_id,
+           ROUND(valor_negociado - COALESCE(valor_pago, 0), 2) AS valor,
+           'A receber - ' || cliente AS descricao,
+           data_evento AS data_transacao
+    FROM evento
+    WHERE status != 'Cancelado'
+      AND ROUND(valor_negociado - COALESCE(valor_pago, 0), 2) > 0 {filtro_evento}
+"""
+# Subconsulta em vez de WITH: o sqlite3 só informa o rowcount de comandos que começam com INSERT/UPDATE/DELETE
+_FROM_ALVO = f"({_ALVO}) AS alvo"
+
+# Pendentes vinculadas a eventos; {filtro_transacao} restringe aos eventos informados
+_PENDENTES = f"tipo = '{TIPO_PENDENTE}' AND evento_id IS NOT NULL {{filtro_transacao}}"
+
+# Sobras: evento sem saldo/inexistente, ou cópias além da primeira do mesmo evento
+_SOBRAS = f"""
+    {_PENDENTES}
+    AND (evento_id NOT IN (SELECT evento_id FROM {_FROM_ALVO})
+         OR id NOT IN (SELECT MIN(id) FROM transacao WHERE {_PENDENTES} GROUP BY evento_id))
+"""
+
+_DIVERGENTES = f"""
+    transacao.tipo = '{TIPO_PENDENTE}' AND transacao.evento_id = alvo.evento_id
+    AND (ROUND(transacao.valor, 2) != alvo.valor
+         OR transacao.descricao != alvo.descricao
+         OR transacao.data_transacao != alvo.data_transacao)
+"""
+
+_FALTANTES = f"""
+    NOT EXISTS (SELECT 1 FROM transacao t
+                WHERE t.tipo = '{TIPO_PENDENTE}' AND t.evento_id = alvo.evento_id)
+"""
+
+
+def _montar(sql, eventos):
+    """Aplica o filtro de eventos ao SQL e devolve (sql, parâmetros)"""
+    if eventos is None:
+        return sql.format(filtro_evento='', filtro_transacao=''), ()
+    # Cada ocorrência de filtro recebe a lista inteira de ids
+    ocorrencias = sql.count('{filtro_evento}') + sql.count('{filtro_transacao}')
+    marcadores = ', '.join('?' * len(eventos))
+    sql = sql.format(filtro_evento=f'AND id IN ({marcadores})',
+                     filtro_transacao=f'AND evento_id IN ({marcadores})')
+    return sql, tuple(eventos) * ocorrencias
+
+
+def _executar(conexao, sql, eventos):
+    sql, parametros = _montar(sql, eventos)
+    return conexao.exec_driver_sql(sql, parametros)
+
+
+def diferencas(conexao, eventos=None):
+    """Calcula o que a reconciliação faria, sem alterar nada
+
+    Retorna um dict com as listas 'remover' (id, evento_id, valor),
+    'atualizar' (id, evento_id, valor_atual, valor_novo) e
+    'inserir' (evento_id, valor).
+    """
+    if eventos is not None and not eventos:
+        return {'remover': [], 'atualizar': [], 'inserir': []}
+    remover = _executar(conexao, f"SELECT id, evento_id, valor FROM transacao WHERE {_SOBRAS}", eventos)
+    remover = [tuple(linha) for linha in remover]
+    removidas = {linha[0] for linha in remover}
+    atualizar = _executar(
+        conexao,
+        f"SELECT transacao.id, transacao.evento_id, transacao.valor, alvo.valor "
+        f"FROM transacao JOIN {_FROM_ALVO} ON {_DIVERGENTES} ORDER BY transacao.id",
+        eventos,
+    )
+    atualizar = [tuple(linha) for linha in atualizar if linha[0] not in removidas]
+    inserir = _executar(conexao, f"SELECT evento_id, valor FROM {_FROM_ALVO} WHERE {_FALTANTES} ORDER BY evento_id", eventos)
+    return {'remover': remover, 'atualizar': atualizar, 'inserir': [tuple(linha) for linha in inserir]}
+
+
+def reconciliar(conexao, eventos=None):
+    """Remove, atualiza e insere as entradas pendentes em três comandos
+
+    eventos: ids dos eventos alterados (None reconcilia todos).
+    Retorna um dict com as quantidades 'removidas', 'atualizadas' e 'inseridas'.
+    """
+    if eventos is not None and not eventos:
+        return {'removidas': 0, 'atualizadas': 0, 'inseridas': 0}
+    removidas = _executar(conexao, f"DELETE FROM transacao WHERE {_SOBRAS}", eventos).rowcount
+    atualizadas = _executar(
+        conexao,
+        f"UPDATE transacao SET valor = alvo.valor, descricao = alvo.descricao, "
+        f"data_transacao = alvo.data_transacao FROM {_FROM_ALVO} WHERE {_DIVERGENTES}",
+        eventos,
+    ).rowcount
+    inseridas = _executar(
+        conexao,
+        f"INSERT INTO transacao (evento_id, tipo, valor, descricao, data_transacao, categoria) "
+        f"SELECT evento_id, '{TIPO_PENDENTE}', valor, descricao, data_transacao, '{CATEGORIA_PENDENTE}' "
+        f"FROM {_FROM_ALVO} WHERE {_FALTANTES} ORDER BY evento_id",
+        eventos,
+    ).rowcount
+    return {'removidas': removidas, 'atualizadas': atualizadas, 'inseridas': inseridas}
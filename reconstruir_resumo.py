@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para reconstruir a tabela resumo_financeiro e os totais mensais da análise
+a partir dos eventos e transações
+Use em caso de recuperação (ex: após edições manuais com os triggers desativados)
+Execute: python reconstruir_resumo.py
+"""
+
+from analise import instalar_analise, reconstruir_analise
+from app import create_app
+from banco import escrita
+from formatacao import formatar_moeda
+from modelos import db, inicializar_banco, obter_resumo
+from resumo_financeiro import instalar_triggers, reconstruir_resumo
+
+def reconstruir():
+    """Reinstala os triggers e recalcula todos os totais"""
+    with create_app().app_context():
+        inicializar_banco()
+        with escrita(), db.engine.begin() as conexao:
+            instalar_triggers(conexao)
+            reconstruir_resumo(conexao)
+            instalar_analise(conexao)
+            meses = reconstruir_analise(conexao)
+        
+        resumo = obter_resumo()
+        print("✅ Resumo financeiro reconstruído!")
+        print(f"📊 {resumo.total_eventos} eventos | {resumo.total_transacoes} transações | {resumo.transacoes_pendentes} pendentes")
+        print(f"📈 Análise mensal recalculada ({meses} meses)")
+        print(f"💰 Saldo atual: {formatar_moeda(resumo.entradas - resumo.saidas)}")
+
+if __name__ == "__main__":
+    reconstruir()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Manutenção incremental da tabela resumo_financeiro
+
+Os totais do caixa e do dashboard ficam em uma linha 'geral' e em uma linha
+por mês ('YYYY-MM'). Triggers do SQLite aplicam a diferença de cada INSERT,
+UPDATE e DELETE em evento/transacao dentro da mesma transação da escrita,
+então a leitura dos saldos é uma busca pela chave primária.
+"""
+
+PERIODO_GERAL = 'geral'
+
+# Contribuição de uma linha de transacao para cada coluna do resumo
+DELTAS_TRANSACAO = {
+    'entradas': "CASE WHEN {r}.tipo = 'Entrada' THEN {r}.valor ELSE 0 END",
+    'saidas': "CASE WHEN {r}.tipo = 'Saída' THEN {r}.valor ELSE 0 END",
+    'pendentes': "CASE WHEN {r}.tipo = 'Entrada Pendente' THEN {r}.valor ELSE 0 END",
+    'total_transacoes': "CASE WHEN {r}.tipo IN ('Entrada', 'Saída') THEN 1 ELSE 0 END",
+    'transacoes_pendentes': "CASE WHEN {r}.tipo = 'Entrada Pendente' THEN 1 ELSE 0 END",
+}
+
+# Contribuição de uma linha de evento para cada coluna do resumo
+DELTAS_EVENTO = {
+    'total_eventos': "1",
+    'eventos_agendados': "CASE WHEN {r}.status = 'Agendado' THEN 1 ELSE 0 END",
+    'eventos_realizados': "CASE WHEN {r}.status = 'Realizado' THEN 1 ELSE 0 END",
+    'eventos_cancelados': "CASE WHEN {r}.status = 'Cancelado' THEN 1 ELSE 0 END",
+    'total_negociado': "COALESCE({r}.valor_negociado, 0)",
+    'total_recebido': "COALESCE({r}.valor_pago, 0)",
+}
+
+TABELAS = {
+    'transacao': {
+        'data': 'data_transacao',
+        'colunas': ('tipo', 'valor', 'data_transacao'),
+        'deltas': DELTAS_TRANSACAO,
+    },
+    'evento': {
+        'data': 'data_evento',
+        'colunas': ('status', 'valor_negociado', 'valor_pago', 'data_evento'),
+        'deltas': DELTAS_EVENTO,
+    },
+}
+
+
+def _aplicar(tabela, linha, sinal):
+    """Gera os comandos que somam (ou subtraem) uma linha NEW/OLD do resumo"""
+    config = TABELAS[tabela]
+    periodo = f"strftime('%Y-%m', {linha}.{config['data']})"
+    atribuicoes = ', '.join(
+        f"{coluna} = ROUND({coluna} {sinal} ({expr.format(r=linha)}), 2)"
+        for coluna, expr in config['deltas'].items()
+    )
+    return (
+        f"INSERT OR IGNORE INTO resumo_financeiro (periodo) VALUES ({periodo}), ('{PERIODO_GERAL}');\n"
+        f"    UPDATE resumo_financeiro SET {atribuicoes}\n"
+        f"    WHERE periodo IN ({periodo}, '{PERIODO_GERAL}');"
+    )
+
+
+def ddl_triggers():
+    """Retorna os comandos CREATE TRIGGER que mantêm o resumo atualizado"""
+    comandos = []
+    for tabela, config in TABELAS.items():
+        colunas = ', '.join(config['colunas'])
+        comandos.append(
+            f"CREATE TRIGGER IF NOT EXISTS resumo_{tabela}_insert AFTER INSERT ON {tabela}\n"
+            f"BEGIN\n    {_aplicar(tabela, 'NEW', '+')}\nEND"
+        )
+        comandos.append(
+            f"CREATE TRIGGER IF NOT EXISTS resumo_{tabela}_delete AFTER DELETE ON {tabela}\n"
+            f"BEGIN\n    {_aplicar(tabela, 'OLD', '-')}\nEND"
+        )
+        comandos.append(
+            f"CREATE TRIGGER IF NOT EXISTS resumo_{tabela}_update AFTER UPDATE OF {colunas} ON {tabela}\n"
+            f"BEGIN\n    {_aplicar(tabela, 'OLD', '-')}\n    {_aplicar(tabela, 'NEW', '+')}\nEND"
+        )
+    return comandos
+
+
+def instalar_triggers(conexao):
+    """Cria os triggers de manutenção do resumo (idempotente)"""
+    for comando in ddl_triggers():
+        conexao.exec_driver_sql(comando)
+
+
+def reconstruir_resumo(conexao):
+    """Recalcula todo o resumo a partir de evento e transacao"""
+    colunas = list(DELTAS_TRANSACAO) + list(DELTAS_EVENTO)
+    selects = []
+    for tabela, config in TABELAS.items():
+        somas = ', '.join(
+            f"SUM({config['deltas'][coluna].format(r=tabela)}) AS {coluna}"
+            if coluna in config['deltas'] else f"0 AS {coluna}"
+            for coluna in colunas
+        )
+        selects.append(
+            f"SELECT strftime('%Y-%m', {config['data']}) AS periodo, {somas} "
+            f"FROM {tabela} GROUP BY 1"
+        )
+    lista = ', '.join(colunas)
+    totais = ', '.join(f"ROUND(TOTAL({coluna}), 2)" for coluna in colunas)
+
+    conexao.exec_driver_sql("DELETE FROM resumo_financeiro")
+    conexao.exec_driver_sql(
+        f"INSERT INTO resumo_financeiro (periodo, {lista}) "
+        f"SELECT periodo, {totais} FROM ({' UNION ALL '.join(selects)}) "
+        f"WHERE periodo IS NOT NULL GROUP BY periodo"
+    )
+    conexao.exec_driver_sql(
+        f"INSERT INTO resumo_financeiro (periodo, {lista}) "
+        f"SELECT '{PERIODO_GERAL}', {totais} FROM resumo_financeiro"
+    )
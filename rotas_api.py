@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+APIs JSON das páginas: gráficos, análise, calendário, busca, rolagem
+infinita, alertas e o /api/stream (tempo real)
+
+As leituras passam por resposta_versionada (ETag e cache até a próxima escrita).
+"""
+
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from alertas import gerados_em, ler_alertas, reconhecer
+from analise import atualizar_analise, ha_pendentes, ler_analise
+from busca import buscar
+from fluxo_caixa import serie_fluxo
+from metricas import orcamento_consultas
+from modelos import Evento, Transacao, db
+from paginacao import ler_data, ler_limite
+from reconciliacao import TIPO_PENDENTE
+from rotas_caixa import filtros_transacoes, pagina_transacoes, transacao_json
+from rotas_eventos import evento_json, filtros_eventos, pagina_eventos, totais_eventos
+from servicos import (atualizar_alertas, escrever_durante_leitura, notificar, renderizar_linha, resposta_versionada,
+                      totais_tempo_real)
+from versao_dados import incrementar_versao
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+
+def analise_consolidada(inicio=None, fim=None):
+    """Totais mensais (ver analise.py), recalculando antes os meses alterados desde a última leitura"""
+    if ha_pendentes(db.session.connection()):
+        escrever_durante_leitura(atualizar_analise)
+    return ler_analise(db.session.connection(), inicio, fim)
+
+def ler_mes(valor):
+    """Valida 'YYYY-MM' (None se vazio, ValueError se inválido)"""
+    return datetime.strptime(valor, '%Y-%m').strftime('%Y-%m') if valor else None
+
+@bp.route('/dashboard-data')
+@orcamento_consultas(17)  # Inclui o recálculo dos meses pendentes (7 sem ele)
+@resposta_versionada
+def dashboard_data():
+    try:
+        analise = analise_consolidada()
+
+        # Serviços por tipo (todos os eventos)
+        servicos_por_tipo = {}
+        for linha in analise['servicos']:
+            servicos_por_tipo[linha['tipo_servico']] = servicos_por_tipo.get(linha['tipo_servico'], 0) + linha['eventos']
+
+        return jsonify({
+            # Receita por mês (baseada no valor negociado)
+            'receita_por_mes': [{'mes': m['mes'], 'receita': m['negociado']} for m in analise['meses'] if m['eventos']],
+            'servicos_por_tipo': [{'tipo': tipo, 'total': total} for tipo, total in sorted(servicos_por_tipo.items())]
+        })
+    except Exception as e:
+        print(f"Erro na API dashboard-data: {e}")
+        return jsonify({
+            'receita_por_mes': [],
+            'servicos_por_tipo': []
+        })
+
+@bp.route('/analise')
+@orcamento_consultas(17)  # Inclui o recálculo dos meses pendentes (7 sem ele)
+@resposta_versionada
+def api_analise():
+    """Totais por mês, por tipo de serviço e por categoria do caixa (inicio/fim: 'YYYY-MM')"""
+    try:
+        inicio = ler_mes(request.args.get('inicio'))
+        fim = ler_mes(request.args.get('fim'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'inicio e fim devem estar no formato YYYY-MM'}), 400
+    return jsonify(dict(analise_consolidada(inicio, fim), inicio=inicio, fim=fim))
+
+@bp.route('/stream')
+@orcamento_consultas(6)
+def api_stream():
+    """Mudanças em tempo real (Server-Sent Events); começa com os totais atuais"""
+    ultimo_id = request.headers.get('Last-Event-ID', type=int)
+    transmissor = current_app.extensions['transmissor']
+    # Assina antes de ler os totais: o que for publicado depois da leitura chega pela fila
+    fila, perdidas = transmissor.assinar(ultimo_id)
+    try:
+        totais = totais_tempo_real()
+    except Exception:
+        transmissor.cancelar(fila)
+        raise
+    fluxo = transmissor.fluxo(fila, perdidas, ('totais', totais))
+    return Response(fluxo, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+LINHAS_MAXIMO = 200
+MODELOS_LINHA = {
+    'eventos': '_linha_evento.html',
+    'realizadas': '_linha_transacao.html',
+    'pendentes': '_linha_pendente.html',
+}
+
+def ler_ids(valor):
+    """'1,2,3' -> [1, 2, 3] (ValueError se inválido ou com mais de LINHAS_MAXIMO ids)"""
+    ids = [int(parte) for parte in valor.split(',') if parte.strip()] if valor else []
+    if len(ids) > LINHAS_MAXIMO:
+        raise ValueError(f'Máximo de {LINHAS_MAXIMO} ids por consulta')
+    return ids
+
+@bp.route('/linhas')
+@orcamento_consultas(5)
+@resposta_versionada
+def api_linhas():
+    """Linhas já renderizadas para as páginas trocarem só o que mudou
+
+    entidade=evento&ids=1,2 ou entidade=transacao&ids=3,4&eventos=1,2 (as
+    transações informadas e todas as dos eventos). 'ausentes' lista os ids
+    pedidos que não existem mais.
+    """
+    try:
+        ids = ler_ids(request.args.get('ids'))
+        eventos = ler_ids(request.args.get('eventos'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    entidade = request.args.get('entidade')
+    if entidade == 'evento':
+        registros = Evento.query.filter(Evento.id.in_(ids)).all() if ids else []
+        linhas = [('eventos', 'evento', e) for e in registros]
+    elif entidade == 'transacao':
+        condicoes = [Transacao.id.in_(ids)] if ids else []
+        if eventos:
+            condicoes.append(Transacao.evento_id.in_(eventos))
+        registros = Transacao.query.filter(db.or_(*condicoes)).all() if condicoes else []
+        linhas = [('pendentes' if t.tipo == TIPO_PENDENTE else 'realizadas', 'transacao', t) for t in registros]
+    else:
+        return jsonify({'success': False, 'error': 'entidade deve ser evento ou transacao'}), 400
+
+    encontrados = {registro.id for _, _, registro in linhas}
+    return jsonify({
+        'linhas': [{
+            'id': registro.id,
+            'evento_id': registro.id if nome == 'evento' else registro.evento_id,
+            'lista': lista,
+            'html': renderizar_linha(MODELOS_LINHA[lista], nome, registro),
+        } for lista, nome, registro in linhas],
+        'ausentes': [id for id in ids if id not in encontrados],
+    })
+
+@bp.route('/fluxo-caixa')
+@orcamento_consultas(8)
+@resposta_versionada
+def api_fluxo_caixa():
+    """Saldo realizado e projetado por dia, semana ou mês (periodo, inicio, fim: YYYY-MM-DD)"""
+    try:
+        return jsonify(serie_fluxo(
+            db.session.connection(),
+            request.args.get('periodo', 'semana'),
+            ler_data(request.args.get('inicio')),
+            ler_data(request.args.get('fim')),
+        ))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@bp.route('/eventos')
+@orcamento_consultas(6)
+@resposta_versionada
+def api_eventos():
+    try:
+        filtros = filtros_eventos(request.args)
+        eventos, proximo_cursor = pagina_eventos(
+            filtros, request.args.get('cursor'), ler_limite(request.args)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    resposta = {
+        'itens': [evento_json(e) for e in eventos],
+        'proximo_cursor': proximo_cursor
+    }
+    if request.args.get('totais'):
+        resposta['totais'] = totais_eventos(filtros)
+    # Linhas já renderizadas para a rolagem infinita do eventos.html
+    if request.args.get('html'):
+        resposta['html'] = ''.join(renderizar_linha('_linha_evento.html', 'evento', e) for e in eventos)
+    return jsonify(resposta)
+
+@bp.route('/transacoes')
+@orcamento_consultas(5)
+@resposta_versionada
+def api_transacoes():
+    lista = request.args.get('lista', 'realizadas')
+    if lista not in ('realizadas', 'pendentes'):
+        return jsonify({'success': False, 'error': 'Lista inválida'}), 400
+    try:
+        filtros = filtros_transacoes(request.args)
+        transacoes, proximo_cursor = pagina_transacoes(
+            lista, filtros, request.args.get('cursor'), ler_limite(request.args)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    resposta = {
+        'itens': [transacao_json(t) for t in transacoes],
+        'proximo_cursor': proximo_cursor
+    }
+    # Linhas já renderizadas para a rolagem infinita do caixa.html
+    if request.args.get('html'):
+        modelo = '_linha_pendente.html' if lista == 'pendentes' else '_linha_transacao.html'
+        resposta['html'] = ''.join(renderizar_linha(modelo, 'transacao', t) for t in transacoes)
+    return jsonify(resposta)
+
+@bp.route('/busca')
+@orcamento_consultas(6)
+@resposta_versionada
+def api_busca():
+    """Busca textual em clientes, observações e descrições de transações"""
+    resultados = buscar(db.session.connection(), request.args.get('q', ''),
+                        ler_limite(request.args, padrao=20))
+
+    ids_eventos = [id for entidade, id, _ in resultados if entidade == 'evento']
+    ids_transacoes = [id for entidade, id, _ in resultados if entidade == 'transacao']
+    eventos = {e.id: e for e in Evento.query.filter(Evento.id.in_(ids_eventos))} if ids_eventos else {}
+    transacoes = {t.id: t for t in Transacao.query.filter(Transacao.id.in_(ids_transacoes))} if ids_transacoes else {}
+
+    itens = []
+    for entidade, id, relevancia in resultados:
+        if entidade == 'evento' and id in eventos:
+            dados = evento_json(eventos[id])
+        elif entidade == 'transacao' and id in transacoes:
+            dados = transacao_json(transacoes[id])
+        else:
+            continue
+        itens.append({'entidade': entidade, 'relevancia': round(-relevancia, 4), **dados})
+    return jsonify({'itens': itens})
+
+# Campos enviados ao calendário (observações e data de cadastro vêm de /api/evento/<id>)
+CAMPOS_CALENDARIO = ('id', 'cliente', 'tipo_servico', 'data_evento', 'valor_negociado', 'valor_pago', 'status')
+
+def janela_calendario(args, hoje):
+    """Lê start/end (YYYY-MM-DD); sem parâmetros usa o mês atual"""
+    inicio = ler_data(args.get('start'))
+    fim = ler_data(args.get('end'))
+    if inicio is None:
+        inicio = hoje.replace(day=1)
+    if fim is None:
+        proximo_mes = (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+        fim = proximo_mes - timedelta(days=1)
+    if fim < inicio:
+        raise ValueError('Intervalo inválido')
+    return inicio, fim
+
+@bp.route('/eventos-calendario')
+@orcamento_consultas(5)
+@resposta_versionada
+def eventos_calendario():
+    try:
+        inicio, fim = janela_calendario(request.args, date.today())
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        # Só as colunas e o intervalo visíveis (usa ix_evento_data)
+        linhas = db.session.query(
+            Evento.id, Evento.cliente, Evento.tipo_servico, Evento.data_evento,
+            Evento.valor_negociado, Evento.valor_pago, Evento.status
+        ).filter(
+            Evento.data_evento >= inicio, Evento.data_evento <= fim
+        ).order_by(Evento.data_evento, Evento.id).all()
+
+        # Formato compacto: um array por campo, sem repetir as chaves a cada evento
+        if request.args.get('formato') == 'colunas':
+            colunas = {campo: [] for campo in CAMPOS_CALENDARIO}
+            for linha in linhas:
+                colunas['id'].append(linha.id)
+                colunas['cliente'].append(linha.cliente)
+                colunas['tipo_servico'].append(linha.tipo_servico)
+                colunas['data_evento'].append(linha.data_evento.strftime('%Y-%m-%d'))
+                colunas['valor_negociado'].append(float(linha.valor_negociado))
+                colunas['valor_pago'].append(float(linha.valor_pago or 0))
+                colunas['status'].append(linha.status)
+            return jsonify(colunas)
+
+        return jsonify([{
+            'id': linha.id,
+            'cliente': linha.cliente,
+            'tipo_servico': linha.tipo_servico,
+            'data_evento': linha.data_evento.strftime('%Y-%m-%d'),
+            'valor_negociado': float(linha.valor_negociado),
+            'valor_pago': float(linha.valor_pago or 0),
+            'status': linha.status
+        } for linha in linhas])
+    except Exception as e:
+        print(f"Erro na API eventos-calendario: {e}")
+        return jsonify([])
+
+@bp.route('/evento/<int:id>')
+@orcamento_consultas(5)
+@resposta_versionada
+def api_evento(id):
+    evento = Evento.query.get_or_404(id)
+    dados = evento_json(evento)
+    dados['data_cadastro'] = evento.data_cadastro.isoformat() if evento.data_cadastro else None
+    return jsonify(dados)
+
+@bp.route('/alertas-eventos')
+@orcamento_consultas(13)  # Inclui a geração dos alertas na primeira leitura do dia (4 sem ela)
+@resposta_versionada
+def alertas_eventos():
+    """Alertas pré-calculados; na primeira leitura do dia (sem o gerar_alertas.py agendado) são gerados aqui"""
+    try:
+        if gerados_em(db.session.connection()) != date.today().isoformat():
+            escrever_durante_leitura(atualizar_alertas)
+
+        alertas = ler_alertas(db.session.connection(), incluir_reconhecidos=bool(request.args.get('todos')))
+        for alerta in alertas:
+            alerta['data'] = datetime.strptime(alerta.pop('data_evento'), '%Y-%m-%d').strftime('%d/%m/%Y')
+        return jsonify(alertas)
+    except Exception as e:
+        print(f"Erro na API alertas-eventos: {e}")
+        return jsonify([])
+
+@bp.route('/alertas/<int:id>/reconhecer', methods=['POST'])
+@orcamento_consultas(9)
+def reconhecer_alerta(id):
+    """Esconde o alerta até que o nível dele mude (ex: de 'semana' para 'urgente')"""
+    if not reconhecer(db.session.connection(), id, datetime.now()):
+        return jsonify({'success': False, 'error': 'Alerta não encontrado'}), 404
+    incrementar_versao(db.session.connection())
+    db.session.commit()
+    notificar('alerta', 'reconhecido', id)
+    return jsonify({'success': True})
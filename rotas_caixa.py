@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Caixa: listagem paginada das transações, lançamentos e reversão de pagamentos
+
+Os filtros e a paginação também servem à API (rotas_api.py) e à exportação
+(rotas_planilhas.py).
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, jsonify, redirect, render_template, request, url_for
+
+from metricas import orcamento_consultas
+from modelos import Evento, Transacao, db, obter_resumo
+from paginacao import PAGINA_PADRAO, codificar_cursor, decodificar_cursor, ler_data
+from reconciliacao import TIPO_PENDENTE
+from servicos import notificar, reconciliar_pendentes
+
+bp = Blueprint('caixa', __name__)
+
+
+# Listagem paginada do caixa
+def filtros_transacoes(args):
+    """Lê os filtros do caixa da query string (ValueError se inválidos)"""
+    return {
+        'data_inicio': ler_data(args.get('data_inicio')),
+        'data_fim': ler_data(args.get('data_fim')),
+        'tipo': args.get('tipo') or None,
+        'categoria': args.get('categoria') or None,
+    }
+
+def filtrar_transacoes(query, filtros, lista=None):
+    """lista: 'realizadas' (Entrada/Saída), 'pendentes' (Entrada Pendente) ou None (todas)"""
+    if lista == 'pendentes':
+        query = query.filter(Transacao.tipo == TIPO_PENDENTE)
+    elif lista == 'realizadas':
+        # Equivalente a tipo IN ('Entrada', 'Saída'), mas deixa o SQLite percorrer ix_transacao_data
+        # já na ordem da página em vez de ordenar todas as linhas dos dois tipos
+        query = query.filter(Transacao.tipo != TIPO_PENDENTE)
+
+    if filtros['tipo']:
+        query = query.filter(Transacao.tipo == filtros['tipo'])
+    if filtros['categoria']:
+        query = query.filter(Transacao.categoria == filtros['categoria'])
+    if filtros['data_inicio']:
+        query = query.filter(Transacao.data_transacao >= filtros['data_inicio'])
+    if filtros['data_fim']:
+        query = query.filter(Transacao.data_transacao <= filtros['data_fim'])
+    return query
+
+def pagina_transacoes(lista, filtros, cursor=None, limite=PAGINA_PADRAO):
+    """Retorna uma página de transações ordenada por (data_transacao, id) decrescente
+
+    lista: 'realizadas' (Entrada/Saída) ou 'pendentes' (Entrada Pendente).
+    Retorna (transacoes, proximo_cursor); proximo_cursor é None na última página.
+    """
+    query = filtrar_transacoes(Transacao.query, filtros, lista)
+
+    if cursor:
+        data_cursor, id_cursor = decodificar_cursor(cursor)
+        query = query.filter(
+            db.tuple_(Transacao.data_transacao, Transacao.id) < (ler_data(str(data_cursor)), int(id_cursor))
+        )
+
+    transacoes = query.order_by(
+        Transacao.data_transacao.desc(), Transacao.id.desc()
+    ).limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(transacoes) > limite:
+        transacoes = transacoes[:limite]
+        ultima = transacoes[-1]
+        proximo_cursor = codificar_cursor(ultima.data_transacao, ultima.id)
+    return transacoes, proximo_cursor
+
+def transacao_json(transacao):
+    return {
+        'id': transacao.id,
+        'evento_id': transacao.evento_id,
+        'tipo': transacao.tipo,
+        'valor': float(transacao.valor),
+        'descricao': transacao.descricao,
+        'data_transacao': transacao.data_transacao.strftime('%Y-%m-%d'),
+        'categoria': transacao.categoria or ''
+    }
+
+@bp.route('/caixa')
+@orcamento_consultas(6)
+def caixa():
+    try:
+        filtros = filtros_transacoes(request.args)
+    except ValueError:
+        filtros = filtros_transacoes({})
+
+    # Primeira página de cada lista; as demais são carregadas por /api/transacoes
+    transacoes_realizadas, proximo_cursor = pagina_transacoes('realizadas', filtros)
+    transacoes_pendentes, proximo_cursor_pendentes = pagina_transacoes('pendentes', filtros)
+
+    # Saldos lidos do resumo financeiro
+    resumo = obter_resumo()
+    saldo_atual = resumo.entradas - resumo.saidas
+    saldo_projetado = saldo_atual + resumo.pendentes
+
+    return render_template('caixa.html',
+                         transacoes=transacoes_realizadas,
+                         transacoes_pendentes=transacoes_pendentes,
+                         proximo_cursor=proximo_cursor,
+                         proximo_cursor_pendentes=proximo_cursor_pendentes,
+                         filtros=filtros,
+                         resumo=resumo,
+                         saldo=saldo_atual,
+                         saldo_projetado=saldo_projetado,
+                         total_pendente=resumo.pendentes)
+
+@bp.route('/transacao/nova', methods=['POST'])
+@orcamento_consultas(9)
+def nova_transacao():
+    transacao = Transacao(
+        tipo=request.form['tipo'],
+        valor=float(request.form['valor']),
+        descricao=request.form['descricao'],
+        data_transacao=datetime.strptime(request.form['data_transacao'], '%Y-%m-%d').date(),
+        categoria=request.form.get('categoria', '')
+    )
+    db.session.add(transacao)
+    db.session.commit()
+    notificar('transacao', 'criada', transacao.id)
+    return redirect(url_for('caixa.caixa'))
+
+@bp.route('/transacao/<int:id>/reverter', methods=['POST'])
+@orcamento_consultas(18)
+def reverter_pagamento(id):
+    try:
+        transacao = Transacao.query.get_or_404(id)
+
+        # Só permite reverter transações de entrada com evento vinculado
+        if transacao.tipo != 'Entrada' or not transacao.evento_id:
+            return jsonify({'success': False, 'error': 'Transação não pode ser revertida'}), 400
+
+        # Buscar evento relacionado
+        evento = Evento.query.get(transacao.evento_id)
+        if evento:
+            # Reverter valor pago
+            evento.valor_pago -= transacao.valor
+            if evento.valor_pago < 0:
+                evento.valor_pago = 0
+
+            # Voltar status para Agendado se estava Realizado
+            if evento.status == 'Realizado':
+                evento.status = 'Agendado'
+
+        # Excluir a transação
+        db.session.delete(transacao)
+        reconciliar_pendentes(transacao.evento_id)
+        db.session.commit()
+        notificar('transacao', 'excluida', id)
+        notificar('evento', 'atualizado', transacao.evento_id)
+
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao reverter pagamento: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/transacao/<int:id>/excluir', methods=['POST'])
+@orcamento_consultas(9)
+def excluir_transacao(id):
+    transacao = Transacao.query.get_or_404(id)
+    db.session.delete(transacao)
+    db.session.commit()
+    notificar('transacao', 'excluida', id)
+    return jsonify({'success': True})
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Dashboard, listagem e cadastro de eventos e registro de pagamentos
+
+Os filtros e a paginação da listagem também servem à API (rotas_api.py) e
+à exportação (rotas_planilhas.py).
+"""
+
+from datetime import date, datetime
+
+from flask import Blueprint, jsonify, redirect, render_template, request, url_for
+
+from metricas import orcamento_consultas
+from modelos import Evento, Transacao, db, obter_resumo
+from paginacao import PAGINA_PADRAO, codificar_cursor, decodificar_cursor, ler_data
+from servicos import estatisticas_eventos, notificar, reconciliar_pendentes
+
+bp = Blueprint('eventos', __name__)
+
+
+@bp.route('/')
+@orcamento_consultas(6)
+def dashboard():
+    hoje = date.today()
+
+    # Estatísticas básicas, status e valores financeiros
+    stats = estatisticas_eventos(hoje)
+
+    # Próximos eventos (5 mais próximos por data)
+    proximos_eventos = Evento.query.order_by(Evento.data_evento.asc()).limit(5).all()
+
+    return render_template('dashboard.html',
+                         proximos_eventos=proximos_eventos,
+                         **stats)
+
+# Listagem paginada de eventos
+STATUS_EVENTO = ('Agendado', 'Realizado', 'Cancelado')
+SALDO_EVENTO = Evento.valor_negociado - db.func.coalesce(Evento.valor_pago, 0)
+
+# Campos de ordenação aceitos: expressão SQL e conversão do valor guardado no cursor
+ORDENACOES_EVENTO = {
+    'data': (Evento.data_evento, lambda v: ler_data(str(v))),
+    'cliente': (Evento.cliente, str),
+    'valor': (Evento.valor_negociado, float),
+    'saldo': (SALDO_EVENTO, float),
+}
+
+def filtros_eventos(args):
+    """Lê filtros e ordenação da listagem de eventos (ValueError se inválidos)"""
+    ordem = args.get('ordem') or 'data'
+    if ordem not in ORDENACOES_EVENTO:
+        raise ValueError('Ordenação inválida')
+    return {
+        'status': args.get('status') or None,
+        'tipo_servico': args.get('tipo_servico') or None,
+        'data_inicio': ler_data(args.get('data_inicio')),
+        'data_fim': ler_data(args.get('data_fim')),
+        'pendente': args.get('pendente') in ('1', 'true', 'on'),
+        'ordem': ordem,
+        'desc': args.get('direcao') == 'desc',
+    }
+
+def filtrar_eventos(query, filtros):
+    if filtros['status']:
+        query = query.filter(Evento.status == filtros['status'])
+    if filtros['tipo_servico']:
+        query = query.filter(Evento.tipo_servico == filtros['tipo_servico'])
+    if filtros['data_inicio']:
+        query = query.filter(Evento.data_evento >= filtros['data_inicio'])
+    if filtros['data_fim']:
+        query = query.filter(Evento.data_evento <= filtros['data_fim'])
+    if filtros['pendente']:
+        query = query.filter(SALDO_EVENTO > 0)
+    return query
+
+def pagina_eventos(filtros, cursor=None, limite=PAGINA_PADRAO):
+    """Retorna uma página de eventos filtrada e ordenada no SQL
+
+    A ordenação é sempre (campo, id) para que o cursor seja único.
+    Retorna (eventos, proximo_cursor); proximo_cursor é None na última página.
+    """
+    coluna, converter = ORDENACOES_EVENTO[filtros['ordem']]
+    query = filtrar_eventos(Evento.query, filtros)
+
+    if cursor:
+        valor_cursor, id_cursor = decodificar_cursor(cursor)
+        chave = db.tuple_(coluna, Evento.id)
+        limite_cursor = (converter(valor_cursor), int(id_cursor))
+        query = query.filter(chave < limite_cursor if filtros['desc'] else chave > limite_cursor)
+
+    if filtros['desc']:
+        query = query.order_by(coluna.desc(), Evento.id.desc())
+    else:
+        query = query.order_by(coluna.asc(), Evento.id.asc())
+    eventos = query.limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(eventos) > limite:
+        eventos = eventos[:limite]
+        ultimo = eventos[-1]
+        valor = {
+            'data': ultimo.data_evento,
+            'cliente': ultimo.cliente,
+            'valor': ultimo.valor_negociado,
+            'saldo': ultimo.valor_negociado - (ultimo.valor_pago or 0),
+        }[filtros['ordem']]
+        proximo_cursor = codificar_cursor(valor, ultimo.id)
+    return eventos, proximo_cursor
+
+def totais_eventos(filtros):
+    """Soma negociado/pago dos eventos filtrados (sem filtros, lê o resumo financeiro)"""
+    if not any(filtros[c] for c in ('status', 'tipo_servico', 'data_inicio', 'data_fim', 'pendente')):
+        geral = obter_resumo()
+        return {'eventos': geral.total_eventos, 'negociado': geral.total_negociado, 'pago': geral.total_recebido}
+
+    linha = filtrar_eventos(db.session.query(
+        db.func.count(Evento.id),
+        db.func.coalesce(db.func.sum(Evento.valor_negociado), 0),
+        db.func.coalesce(db.func.sum(Evento.valor_pago), 0)
+    ), filtros).one()
+    return {'eventos': linha[0], 'negociado': linha[1], 'pago': linha[2]}
+
+def evento_json(evento):
+    return {
+        'id': evento.id,
+        'cliente': evento.cliente,
+        'tipo_servico': evento.tipo_servico,
+        'data_evento': evento.data_evento.strftime('%Y-%m-%d'),
+        'valor_negociado': float(evento.valor_negociado),
+        'valor_pago': float(evento.valor_pago or 0),
+        'status': evento.status,
+        'ensaios_extras': evento.ensaios_extras,
+        'observacoes': evento.observacoes or ''
+    }
+
+@bp.route('/eventos')
+@orcamento_consultas(5)
+def listar_eventos():
+    try:
+        filtros = filtros_eventos(request.args)
+        eventos, proximo_cursor = pagina_eventos(filtros)
+    except ValueError:
+        filtros = filtros_eventos({})
+        eventos, proximo_cursor = pagina_eventos(filtros)
+
+    return render_template('eventos.html',
+                         eventos=eventos,
+                         proximo_cursor=proximo_cursor,
+                         filtros=filtros,
+                         totais=totais_eventos(filtros),
+                         status_evento=STATUS_EVENTO)
+
+@bp.route('/evento/novo', methods=['GET', 'POST'])
+@orcamento_consultas(16)
+def novo_evento():
+    if request.method == 'POST':
+        # Processar ensaios extras
+        tem_ensaios = request.form.get('tem_ensaios_extras') == 'on'
+        if tem_ensaios:
+            tipo_ensaio = request.form.get('tipo_ensaio')
+            if tipo_ensaio == 'Outros':
+                ensaios_extras = request.form.get('outros_ensaio_texto', 'Outros')
+            else:
+                ensaios_extras = tipo_ensaio or 'Nenhum'
+        else:
+            ensaios_extras = 'Nenhum'
+
+        evento = Evento(
+            cliente=request.form['cliente'],
+            tipo_servico=request.form['tipo_servico'],
+            data_evento=datetime.strptime(request.form['data_evento'], '%Y-%m-%d').date(),
+            valor_negociado=float(request.form['valor_negociado']),
+            observacoes=request.form.get('observacoes', ''),
+            ensaios_extras=ensaios_extras
+        )
+        db.session.add(evento)
+        db.session.flush()
+        reconciliar_pendentes(evento.id)
+        db.session.commit()
+        notificar('evento', 'criado', evento.id)
+        return redirect(url_for('eventos.listar_eventos'))
+
+    return render_template('novo_evento.html')
+
+@bp.route('/evento/<int:id>/excluir', methods=['POST'])
+@orcamento_consultas(16)
+def excluir_evento(id):
+    evento = Evento.query.get_or_404(id)
+    db.session.delete(evento)
+    reconciliar_pendentes(id)
+    db.session.commit()
+    notificar('evento', 'excluido', id)
+    return jsonify({'success': True})
+
+@bp.route('/evento/<int:id>/editar', methods=['POST'])
+@orcamento_consultas(16)
+def editar_evento(id):
+    evento = Evento.query.get_or_404(id)
+
+    # Processar ensaios extras
+    ensaios_extras = request.json.get('ensaios_extras', 'Nenhum')
+
+    evento.cliente = request.json.get('cliente', evento.cliente)
+    evento.tipo_servico = request.json.get('tipo_servico', evento.tipo_servico)
+    evento.data_evento = datetime.strptime(request.json.get('data_evento'), '%Y-%m-%d').date() if request.json.get('data_evento') else evento.data_evento
+    evento.valor_negociado = float(request.json.get('valor_negociado', evento.valor_negociado))
+    evento.valor_pago = float(request.json.get('valor_pago', evento.valor_pago))
+    evento.status = request.json.get('status', evento.status)
+    evento.ensaios_extras = ensaios_extras
+    evento.observacoes = request.json.get('observacoes', evento.observacoes)
+
+    reconciliar_pendentes(id)
+    db.session.commit()
+    notificar('evento', 'atualizado', id)
+    return jsonify({'success': True})
+
+# Pagamentos: incremento atômico no SQL (sem ler valor_pago para o Python)
+PAGAMENTOS_LOTE_MAXIMO = 1000
+
+def validar_pagamento(item):
+    """Retorna (evento_id, valor, data_pagamento) do item ou ValueError com o motivo"""
+    try:
+        evento_id = int(item['evento_id'])
+        valor = float(item['valor'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('evento_id e valor são obrigatórios e devem ser numéricos')
+    if not 0 < valor < float('inf'):
+        raise ValueError('valor deve ser maior que zero')
+    try:
+        data_pagamento = ler_data(item.get('data')) or date.today()
+    except (TypeError, ValueError):
+        raise ValueError('data deve estar no formato YYYY-MM-DD')
+    return evento_id, round(valor, 2), data_pagamento
+
+def registrar_pagamentos(pagamentos):
+    """Aplica os pagamentos [(evento_id, valor, data)] na transação atual
+
+    Um UPDATE por pagamento (executemany) soma o valor e marca o evento como
+    Realizado quando quitado, sem ler valor_pago antes; pagamentos simultâneos
+    ao mesmo evento nunca se perdem. Retorna o conjunto de eventos encontrados;
+    pagamentos de eventos inexistentes são ignorados.
+    """
+    ids = {evento_id for evento_id, _, _ in pagamentos}
+    if not ids:
+        return set()
+    clientes = dict(db.session.query(Evento.id, Evento.cliente).filter(Evento.id.in_(ids)).all())
+    validos = [p for p in pagamentos if p[0] in clientes]
+    if not validos:
+        return set()
+
+    evento = Evento.__table__
+    novo_valor_pago = db.func.round(db.func.coalesce(evento.c.valor_pago, 0) + db.bindparam('valor'), 2)
+    db.session.execute(
+        db.update(evento)
+        .where(evento.c.id == db.bindparam('id_evento'))
+        .values(
+            valor_pago=novo_valor_pago,
+            status=db.case((novo_valor_pago >= evento.c.valor_negociado, 'Realizado'), else_=evento.c.status)
+        ),
+        [{'id_evento': evento_id, 'valor': valor} for evento_id, valor, _ in validos]
+    )
+    db.session.execute(db.insert(Transacao.__table__), [{
+        'evento_id': evento_id,
+        'tipo': 'Entrada',
+        'valor': valor,
+        'descricao': f'Pagamento - {clientes[evento_id]}',
+        'data_transacao': data_pagamento,
+        'categoria': 'Pagamento de Cliente'
+    } for evento_id, valor, data_pagamento in validos])
+    reconciliar_pendentes(*sorted(clientes))
+    return set(clientes)
+
+@bp.route('/evento/<int:id>/pagar', methods=['POST'])
+@orcamento_consultas(17)
+def registrar_pagamento(id):
+    try:
+        data = request.get_json()
+        pagamento = validar_pagamento({'evento_id': id, 'valor': data['valor'], 'data': data.get('data')})
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        if not registrar_pagamentos([pagamento]):
+            return jsonify({'success': False, 'error': 'Evento não encontrado'}), 404
+        db.session.commit()
+        notificar('evento', 'pago', id)
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro no pagamento: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/pagamentos/lote', methods=['POST'])
+@orcamento_consultas(17)
+def registrar_pagamentos_lote():
+    """Registra vários pagamentos em uma transação; responde com o resultado de cada item"""
+    dados = request.get_json(silent=True) or {}
+    itens = dados.get('pagamentos') if isinstance(dados, dict) else None
+    if not isinstance(itens, list) or not itens:
+        return jsonify({'success': False, 'error': 'Envie {"pagamentos": [{"evento_id": ..., "valor": ...}]}'}), 400
+    if len(itens) > PAGAMENTOS_LOTE_MAXIMO:
+        return jsonify({'success': False, 'error': f'Máximo de {PAGAMENTOS_LOTE_MAXIMO} pagamentos por lote'}), 400
+
+    resultados, pagamentos = [], []
+    for indice, item in enumerate(itens):
+        try:
+            pagamento = validar_pagamento(item if isinstance(item, dict) else {})
+            pagamentos.append(pagamento)
+            resultados.append({'indice': indice, 'evento_id': pagamento[0], 'valor': pagamento[1], 'success': True})
+        except ValueError as e:
+            evento_id = item.get('evento_id') if isinstance(item, dict) else None
+            resultados.append({'indice': indice, 'evento_id': evento_id, 'success': False, 'error': str(e)})
+
+    try:
+        encontrados = registrar_pagamentos(pagamentos)
+        db.session.commit()
+        if encontrados:
+            notificar('evento', 'pago', *sorted(encontrados))
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro no lote de pagamentos: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    for resultado in resultados:
+        if resultado['success'] and resultado['evento_id'] not in encontrados:
+            resultado.update(success=False, error='Evento não encontrado')
+            del resultado['valor']
+    aplicados = sum(1 for r in resultados if r['success'])
+    return jsonify({
+        'success': True,
+        'aplicados': aplicados,
+        'rejeitados': len(resultados) - aplicados,
+        'resultados': resultados
+    })
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Importação de planilhas em segundo plano e exportação das listagens
+
+A validação e a inserção em lote ficam em importacao.py, importado só quando
+chega um upload (carrega o pandas); a geração dos arquivos fica em
+exportacao.py, que carrega openpyxl/pyarrow só ao gerar XLSX/Parquet.
+"""
+
+import os
+from datetime import date
+
+from flask import (Blueprint, Response, current_app, flash, jsonify, redirect, render_template, request,
+                   send_from_directory, stream_with_context, url_for)
+from werkzeug.utils import secure_filename
+
+from banco import escrita
+from exportacao import FORMATOS, FormatoIndisponivel, gerar_exportacao, verificar_parquet
+from metricas import orcamento_consultas
+from modelos import Evento, Transacao, db
+from reconciliacao import reconciliar
+from rotas_caixa import filtrar_transacoes, filtros_transacoes
+from rotas_eventos import ORDENACOES_EVENTO, filtrar_eventos, filtros_eventos
+from servicos import atualizar_alertas, publicar
+from tarefas import LimiteTarefasExcedido, Tarefa
+
+bp = Blueprint('planilhas', __name__)
+
+
+@bp.route('/importar')
+@orcamento_consultas(0)
+def importar():
+    return render_template('importar.html')
+
+# Importação de planilhas em segundo plano
+# (validação e inserção em lote em importacao.py, fila de tarefas em tarefas.py)
+def _processar_importacao(tarefa, app, filepath, filename):
+    """Roda no pool de importação: valida, insere/atualiza em lotes (uma transação por lote) e grava as rejeições"""
+    from importacao import (CHAVE_EVENTO, CHAVE_TRANSACAO, ler_planilha, salvar_rejeicoes, sincronizar_em_lotes,
+                            validar_eventos, validar_transacoes)
+
+    validar, modelo, chave = {
+        'eventos': (validar_eventos, Evento, CHAVE_EVENTO),
+        'transacoes': (validar_transacoes, Transacao, CHAVE_TRANSACAO),
+    }[tarefa.tipo]
+    with app.app_context():
+        try:
+            df = ler_planilha(filepath, filename)
+            registros, rejeitadas = validar(df)
+            tarefa.total = len(df)
+            tarefa.rejeitadas = len(rejeitadas)
+            tarefa.avancar(len(rejeitadas))
+
+            # As contagens vão para a tarefa a cada lote: se parar no meio (cancelamento, erro),
+            # os lotes já gravados ficam e continuam contados
+            try:
+                sincronizar_em_lotes(db.engine, modelo.__table__, registros, chave,
+                                     ao_processar=tarefa.registrar_lote)
+            finally:
+                if tarefa.inseridas or tarefa.atualizadas:
+                    if tarefa.tipo == 'eventos':
+                        # Transação curta própria, depois dos lotes
+                        with escrita(), db.engine.begin() as conexao:
+                            reconciliar(conexao)
+                            atualizar_alertas(conexao)
+                    publicar([{'entidade': modelo.__tablename__, 'acao': 'importado', 'ids': []}])
+
+            if len(rejeitadas):
+                tarefa.relatorio = salvar_rejeicoes(rejeitadas, app.config['UPLOAD_FOLDER'])
+        finally:
+            if os.path.exists(filepath):
+                os.remove(filepath)  # Remover arquivo após importação
+
+def _quer_json():
+    return request.accept_mimetypes.best == 'application/json'
+
+def _recusar_importacao(erro, status_code):
+    if _quer_json():
+        return jsonify({'success': False, 'error': erro}), status_code
+    flash(erro, 'error')
+    return redirect(url_for('planilhas.importar'))
+
+def _importar_arquivo(tipo):
+    """Recebe o upload e agenda a importação; responde com o id da tarefa"""
+    from importacao import EXTENSOES_PERMITIDAS, FORMATO_NAO_SUPORTADO
+
+    arquivo = request.files.get('arquivo')
+    if arquivo is None or arquivo.filename == '':
+        return _recusar_importacao('Nenhum arquivo selecionado', 400)
+
+    filename = secure_filename(arquivo.filename)
+    if not filename.lower().endswith(EXTENSOES_PERMITIDAS):
+        return _recusar_importacao(FORMATO_NAO_SUPORTADO, 400)
+    tarefa = Tarefa(tipo, filename)
+    # Prefixo único: uploads simultâneos com o mesmo nome não se sobrescrevem
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f'{tarefa.id}_{filename}')
+    arquivo.save(filepath)
+    try:
+        current_app.extensions['importacoes'].enviar(
+            tarefa, _processar_importacao, current_app._get_current_object(), filepath, filename
+        )
+    except LimiteTarefasExcedido as e:
+        os.remove(filepath)
+        return _recusar_importacao(str(e), 429)
+
+    if _quer_json():
+        return jsonify({
+            'success': True,
+            'tarefa': tarefa.id,
+            'status_url': url_for('planilhas.status_importacao', id_tarefa=tarefa.id)
+        }), 202
+    return redirect(url_for('planilhas.importar', tarefa=tarefa.id))
+
+@bp.route('/importar/eventos', methods=['POST'])
+@orcamento_consultas(0)
+def importar_eventos():
+    return _importar_arquivo('eventos')
+
+@bp.route('/importar/transacoes', methods=['POST'])
+@orcamento_consultas(0)
+def importar_transacoes():
+    return _importar_arquivo('transacoes')
+
+@bp.route('/importar/status/<id_tarefa>')
+@orcamento_consultas(0)
+def status_importacao(id_tarefa):
+    tarefa = current_app.extensions['importacoes'].obter(id_tarefa)
+    if tarefa is None:
+        return jsonify({'success': False, 'error': 'Importação não encontrada'}), 404
+    dados = tarefa.como_dict()
+    dados['relatorio_url'] = url_for('planilhas.baixar_rejeicoes', nome=tarefa.relatorio) if tarefa.relatorio else None
+    return jsonify(dados)
+
+@bp.route('/importar/cancelar/<id_tarefa>', methods=['POST'])
+@orcamento_consultas(0)
+def cancelar_importacao(id_tarefa):
+    if not current_app.extensions['importacoes'].cancelar(id_tarefa):
+        return jsonify({'success': False, 'error': 'Importação não encontrada ou já finalizada'}), 404
+    return jsonify({'success': True})
+
+@bp.route('/importar/rejeicoes/<nome>')
+@orcamento_consultas(0)
+def baixar_rejeicoes(nome):
+    return send_from_directory(os.path.abspath(current_app.config['UPLOAD_FOLDER']),
+                               secure_filename(nome), as_attachment=True)
+
+# Exportação (mesmos filtros das listagens)
+EXPORTACAO_LINHAS_POR_LOTE = 1000
+
+COLUNAS_EXPORTACAO_EVENTO = (
+    ('id', 'inteiro'), ('cliente', 'texto'), ('tipo_servico', 'texto'), ('data_evento', 'data'),
+    ('valor_negociado', 'numero'), ('valor_pago', 'numero'), ('status', 'texto'),
+    ('ensaios_extras', 'texto'), ('observacoes', 'texto'),
+)
+COLUNAS_EXPORTACAO_TRANSACAO = (
+    ('id', 'inteiro'), ('evento_id', 'inteiro'), ('tipo', 'texto'), ('valor', 'numero'),
+    ('descricao', 'texto'), ('data_transacao', 'data'), ('categoria', 'texto'),
+)
+
+def _exportar(nome, cabecalho, query):
+    """Responde com o arquivo gerado a partir da consulta, lida em lotes (yield_per)"""
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return jsonify({'success': False, 'error': 'Formato inválido. Use csv, xlsx ou parquet'}), 400
+    if formato == 'parquet':
+        try:
+            verificar_parquet()
+        except FormatoIndisponivel as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+    linhas = (tuple(linha) for linha in query.yield_per(EXPORTACAO_LINHAS_POR_LOTE))
+    tipo_conteudo, extensao = FORMATOS[formato]
+    conteudo = gerar_exportacao(formato, cabecalho, linhas, titulo=nome.capitalize())
+    nome_arquivo = f'{nome}_{date.today().isoformat()}.{extensao}'
+    return Response(stream_with_context(conteudo), mimetype=tipo_conteudo, headers={
+        'Content-Disposition': f'attachment; filename="{nome_arquivo}"'
+    })
+
+@bp.route('/exportar/eventos')
+@orcamento_consultas(4)
+def exportar_eventos():
+    try:
+        filtros = filtros_eventos(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    coluna, _ = ORDENACOES_EVENTO[filtros['ordem']]
+    query = filtrar_eventos(
+        db.session.query(*[getattr(Evento, nome) for nome, _ in COLUNAS_EXPORTACAO_EVENTO]), filtros
+    )
+    if filtros['desc']:
+        query = query.order_by(coluna.desc(), Evento.id.desc())
+    else:
+        query = query.order_by(coluna.asc(), Evento.id.asc())
+    return _exportar('eventos', COLUNAS_EXPORTACAO_EVENTO, query)
+
+@bp.route('/exportar/transacoes')
+@orcamento_consultas(4)
+def exportar_transacoes():
+    lista = request.args.get('lista') or None
+    if lista not in (None, 'realizadas', 'pendentes'):
+        return jsonify({'success': False, 'error': 'Lista inválida'}), 400
+    try:
+        filtros = filtros_transacoes(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    query = filtrar_transacoes(
+        db.session.query(*[getattr(Transacao, nome) for nome, _ in COLUNAS_EXPORTACAO_TRANSACAO]), filtros, lista
+    ).order_by(Transacao.data_transacao, Transacao.id)  # Ordem cronológica, como numa planilha de lançamentos
+    return _exportar('transacoes', COLUNAS_EXPORTACAO_TRANSACAO, query)
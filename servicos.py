@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Funções compartilhadas pelas rotas (rotas_*.py) e pelos scripts
+
+Tudo aqui usa o app atual (current_app): o estado de cada app (caches,
+transmissor do /api/stream, fila de importações) fica em app.extensions,
+criado por create_app (app.py).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from markupsafe import Markup
+
+from alertas import gerar_alertas
+from banco import escrita
+from modelos import db, obter_resumo
+from reconciliacao import reconciliar
+from versao_dados import ler_versao
+
+CACHE_RESPOSTAS_MAXIMO = 256
+CACHE_LINHAS_MAXIMO = 50000
+
+
+class CacheLRU:
+    """Dicionário limitado que descarta o item usado há mais tempo (seguro entre threads)"""
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+def limpar_caches(app=None):
+    """Esvazia o cache de respostas e o de linhas (benchmarks e verificações)"""
+    app = app or current_app
+    app.extensions['cache_respostas'].limpar()
+    app.extensions['cache_linhas'].limpar()
+
+
+def reconciliar_pendentes(*eventos):
+    """Ajusta as entradas pendentes e os alertas dos eventos alterados na transação atual (antes do commit)"""
+    db.session.flush()
+    resultado = reconciliar(db.session.connection(), list(eventos))
+    atualizar_alertas(db.session.connection(), list(eventos))
+    return resultado
+
+
+def atualizar_alertas(conexao, eventos=None):
+    """Recalcula os alertas de hoje (ver alertas.py) com os horizontes configurados"""
+    return gerar_alertas(conexao, date.today(), current_app.config['ALERTAS_HORIZONTES'],
+                         current_app.config['ALERTAS_DIAS_VENCIDOS'], eventos)
+
+
+def escrever_durante_leitura(funcao, *args):
+    """Executa funcao(conexao, *args) numa transação de escrita própria, dentro de uma requisição de leitura"""
+    db.session.rollback()  # A leitura seguinte precisa começar depois da escrita
+    with escrita(), db.engine.begin() as conexao:
+        return funcao(conexao, *args)
+
+
+# Cache das APIs por versão dos dados (ver versao_dados.py)
+def resposta_versionada(funcao):
+    """Adiciona ETag derivada da versão dos dados, responde 304 a If-None-Match
+    e guarda a resposta serializada até a próxima escrita"""
+    @wraps(funcao)
+    def decorada(*args, **kwargs):
+        versao = ler_versao(db.session.connection())
+        # O dia entra na chave porque alertas e o calendário padrão dependem da data atual
+        chave = (request.path, request.query_string, date.today().isoformat())
+        etag = f"{versao}-{hashlib.sha1(repr(chave).encode('utf-8')).hexdigest()[:12]}"
+        cache = current_app.extensions['cache_respostas']
+
+        if etag in request.if_none_match:
+            resposta = current_app.response_class(status=304)
+        else:
+            em_cache = cache.obter(chave)  # (versao, corpo, mimetype)
+            if em_cache and em_cache[0] == versao:
+                resposta = current_app.response_class(em_cache[1], mimetype=em_cache[2])
+            else:
+                resposta = make_response(funcao(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+                cache.guardar(chave, (versao, resposta.get_data(), resposta.mimetype))
+
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
+    return decorada
+
+
+# Cache das linhas renderizadas das tabelas: (modelo, id, versao) identifica o conteúdo
+# da linha (a coluna versao é atualizada por trigger a cada escrita, ver versao_dados.py)
+def renderizar_linha(modelo, nome, registro):
+    """Renderiza o template da linha para o registro, reaproveitando o HTML se a linha não mudou"""
+    app = current_app._get_current_object()  # Chamada uma vez por linha: resolve o proxy uma vez só
+    chave = (modelo, registro.id, registro.versao)
+    cache = app.extensions['cache_linhas']
+    html = cache.obter(chave)
+    if html is None:
+        html = Markup(app.jinja_env.get_template(modelo).render({nome: registro}))
+        cache.guardar(chave, html)
+    return html
+
+
+# Estatísticas do dashboard
+def estatisticas_eventos(hoje):
+    """Lê os indicadores do dashboard do resumo financeiro (geral e mês atual)"""
+    geral = obter_resumo()
+    mes = obter_resumo(hoje.strftime('%Y-%m'))
+    return {
+        'total_eventos': geral.total_eventos,
+        'eventos_mes': mes.total_eventos,
+        # Receitas (baseadas em valor_pago - dinheiro realmente recebido)
+        'receita_total': geral.total_recebido,
+        'receita_mes': mes.total_recebido,
+        'eventos_agendados': geral.eventos_agendados,
+        'eventos_realizados': geral.eventos_realizados,
+        'eventos_cancelados': geral.eventos_cancelados,
+        'total_negociado': geral.total_negociado,
+        'total_recebido': geral.total_recebido,
+        'total_pendente': geral.total_negociado - geral.total_recebido,
+    }
+
+
+def totais_tempo_real():
+    """Indicadores do dashboard e do caixa, enviados pelo /api/stream quando mudam"""
+    totais = estatisticas_eventos(date.today())
+    resumo = obter_resumo()
+    saldo = round(resumo.entradas - resumo.saidas, 2)
+    totais.update({
+        'entradas': resumo.entradas,
+        'saidas': resumo.saidas,
+        'saldo': saldo,
+        'pendentes': resumo.pendentes,
+        'saldo_projetado': round(saldo + resumo.pendentes, 2),
+        'transacoes': resumo.total_transacoes + resumo.transacoes_pendentes,
+        'transacoes_pendentes': resumo.transacoes_pendentes,
+        'percentual_recebido': round(totais['total_recebido'] / totais['total_negociado'] * 100)
+                               if totais['total_negociado'] > 0 else 0,
+    })
+    return totais
+
+
+# Mudanças publicadas em /api/stream para os navegadores abertos (ver transmissao.py)
+def notificar(entidade, acao, *ids):
+    """Registra uma mudança da requisição atual, publicada depois que a resposta for bem-sucedida"""
+    g.setdefault('mudancas', []).append({'entidade': entidade, 'acao': acao, 'ids': list(ids)})
+
+
+def publicar(mudancas):
+    """Envia as mudanças e os totais que elas alteraram a todos os clientes conectados"""
+    transmissor = current_app.extensions['transmissor']
+    return transmissor.publicar('mudanca', {
+        'mudancas': mudancas,
+        'totais': transmissor.alterados(totais_tempo_real()),
+    })
@@ -0,0 +1,50 @@
+// Rolagem infinita das listagens paginadas por cursor (caixa e eventos)
+//
+// Cada <tbody> paginado informa em data-url o endpoint JSON e em data-cursor
+// o cursor da próxima página. O elemento .carregar-mais logo abaixo da tabela
+// (data-alvo = id do tbody) dispara a busca quando fica visível.
+function carregarMais(sentinela) {
+    const tbody = document.getElementById(sentinela.dataset.alvo);
+    const cursor = tbody.dataset.cursor;
+    if (!cursor || sentinela.dataset.carregando) {
+        return;
+    }
+    sentinela.dataset.carregando = '1';
+    
+    // Mantém os filtros da página atual
+    const url = new URL(tbody.dataset.url, window.location.origin);
+    new URLSearchParams(window.location.search).forEach((valor, chave) => {
+        if (!url.searchParams.has(chave)) {
+            url.searchParams.set(chave, valor);
+        }
+    });
+    url.searchParams.set('cursor', cursor);
+    url.searchParams.set('html', '1');
+    
+    fetch(url)
+        .then(response => response.json())
+        .then(data => {
+            tbody.insertAdjacentHTML('beforeend', data.html || '');
+            tbody.dataset.cursor = data.proximo_cursor || '';
+            if (!data.proximo_cursor) {
+                sentinela.style.display = 'none';
+            }
+        })
+        .catch(error => {
+            console.error('Erro ao carregar mais registros:', error);
+        })
+        .finally(() => {
+            delete sentinela.dataset.carregando;
+        });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const observador = new IntersectionObserver(entradas => {
+        entradas.forEach(entrada => {
+            if (entrada.isIntersecting) {
+                carregarMais(entrada.target);
+            }
+        });
+    });
+    document.querySelectorAll('.carregar-mais').forEach(sentinela => observador.observe(sentinela));
+});
@@ -0,0 +1,117 @@
+// Atualização das páginas pelas mudanças publicadas em /api/stream (Server-Sent Events)
+//
+// - Elementos com data-total="chave" recebem o novo valor do total
+//   (data-formato: moeda, decimal ou numero; padrão moeda). Com
+//   data-sinal-positivo/data-sinal-negativo, as classes trocam conforme o sinal.
+// - Mudanças próximas são agrupadas e repassadas às páginas no evento
+//   'dados-alterados' do document (detail.mudancas = lista de
+//   {entidade, acao, ids}).
+// - sincronizarLinhas() troca, insere ou remove as linhas das tabelas
+//   (<tr data-evento-id> / <tr data-transacao-id>) usando /api/linhas.
+const tempoReal = {
+    conectado: false,
+    pendentes: [],
+    temporizador: null,
+    ESPERA_AGRUPAR: 300  // ms
+};
+
+const FORMATOS_TOTAL = {
+    moeda: valor => new Intl.NumberFormat('pt-BR', {style: 'currency', currency: 'BRL'}).format(valor),
+    decimal: valor => new Intl.NumberFormat('pt-BR', {minimumFractionDigits: 2, maximumFractionDigits: 2}).format(valor),
+    numero: valor => new Intl.NumberFormat('pt-BR', {maximumFractionDigits: 0}).format(valor)
+};
+
+function aplicarTotais(totais) {
+    Object.entries(totais).forEach(([chave, valor]) => {
+        document.querySelectorAll(`[data-total="${chave}"]`).forEach(elemento => {
+            const formatar = FORMATOS_TOTAL[elemento.dataset.formato || 'moeda'];
+            elemento.textContent = formatar(valor);
+        });
+        document.querySelectorAll(`[data-sinal="${chave}"]`).forEach(elemento => {
+            elemento.classList.remove(elemento.dataset.sinalPositivo, elemento.dataset.sinalNegativo);
+            elemento.classList.add(valor >= 0 ? elemento.dataset.sinalPositivo : elemento.dataset.sinalNegativo);
+        });
+    });
+}
+
+function avisarMudancas(mudancas) {
+    tempoReal.pendentes.push(...mudancas);
+    clearTimeout(tempoReal.temporizador);
+    tempoReal.temporizador = setTimeout(() => {
+        const agrupadas = tempoReal.pendentes;
+        tempoReal.pendentes = [];
+        document.dispatchEvent(new CustomEvent('dados-alterados', {detail: {mudancas: agrupadas}}));
+    }, tempoReal.ESPERA_AGRUPAR);
+}
+
+// Ids alterados de uma entidade nas mudanças (null se alguma mudança não informou ids, ex: importação)
+function idsAlterados(mudancas, entidade) {
+    const ids = new Set();
+    for (const mudanca of mudancas.filter(m => m.entidade === entidade)) {
+        if (!mudanca.ids.length) {
+            return null;
+        }
+        mudanca.ids.forEach(id => ids.add(id));
+    }
+    return [...ids];
+}
+
+// listas: nome da lista retornada pela API -> id do <tbody> na página
+// inserir: false para só trocar/remover as linhas já exibidas (ex: página filtrada)
+function sincronizarLinhas(entidade, ids, eventos, listas, inserir = true) {
+    if (!ids.length && !eventos.length) {
+        return Promise.resolve();
+    }
+    const atributo = entidade === 'evento' ? 'data-evento-id' : 'data-transacao-id';
+    const url = `/api/linhas?entidade=${entidade}&ids=${ids.join(',')}&eventos=${eventos.join(',')}`;
+    return fetch(url)
+        .then(response => response.json())
+        .then(data => {
+            const recebidos = new Set(data.linhas.map(linha => String(linha.id)));
+            data.linhas.forEach(linha => {
+                const tbody = document.getElementById(listas[linha.lista]);
+                const atual = document.querySelector(`tr[${atributo}="${linha.id}"]`);
+                if (atual && tbody && atual.parentElement === tbody) {
+                    atual.outerHTML = linha.html;
+                } else {
+                    if (atual) {
+                        atual.remove();
+                    }
+                    if (tbody && (atual || inserir)) {
+                        tbody.insertAdjacentHTML('afterbegin', linha.html);
+                    }
+                }
+            });
+            data.ausentes.forEach(id => document.querySelectorAll(`tr[${atributo}="${id}"]`).forEach(tr => tr.remove()));
+            // Linhas vinculadas aos eventos que não vieram mais (ex: pendência quitada)
+            eventos.forEach(eventoId => {
+                document.querySelectorAll(`tr[${atributo}][data-evento-id="${eventoId}"]`).forEach(tr => {
+                    if (!recebidos.has(tr.getAttribute(atributo))) {
+                        tr.remove();
+                    }
+                });
+            });
+        });
+}
+
+// Depois de uma ação na própria página: sem conexão em tempo real, recarrega como antes
+function aguardarAtualizacao() {
+    if (!tempoReal.conectado) {
+        location.reload();
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    if (!window.EventSource) {
+        return;
+    }
+    const fonte = new EventSource('/api/stream');
+    fonte.addEventListener('open', () => { tempoReal.conectado = true; });
+    fonte.addEventListener('error', () => { tempoReal.conectado = false; });
+    fonte.addEventListener('totais', evento => aplicarTotais(JSON.parse(evento.data)));
+    fonte.addEventListener('mudanca', evento => {
+        const dados = JSON.parse(evento.data);
+        aplicarTotais(dados.totais);
+        avisarMudancas(dados.mudancas);
+    });
+});
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Execução de importações em segundo plano
+
+O upload apenas registra uma Tarefa e devolve o id. O processamento roda em
+um pool de threads de tamanho fixo; a tarefa expõe o progresso (linhas
+processadas, rejeitadas, ETA) e pode ser cancelada entre os lotes (os lotes
+já gravados são mantidos e continuam contados). O número de tarefas
+ativas (na fila ou em execução) é limitado para não acumular uploads.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+NA_FILA = 'na_fila'
+PROCESSANDO = 'processando'
+CONCLUIDA = 'concluida'
+CANCELADA = 'cancelada'
+ERRO = 'erro'
+
+ATIVOS = (NA_FILA, PROCESSANDO)
+
+
+class LimiteTarefasExcedido(Exception):
+    """Há tarefas ativas demais para aceitar uma nova"""
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro do processamento quando o cancelamento é pedido"""
+
+
+class Tarefa:
+    def __init__(self, tipo, nome_arquivo):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.nome_arquivo = nome_arquivo
+        self.status = NA_FILA
+        self.total = None
+        self.processadas = 0
+        self.inseridas = 0
+        self.atualizadas = 0
+        self.inalteradas = 0
+        self.rejeitadas = 0
+        self.relatorio = None
+        self.erro = None
+        self.criada_em = time.time()
+        self.iniciada_em = None
+        self.finalizada_em = None
+        self._cancelar = threading.Event()
+
+    @property
+    def ativa(self):
+        return self.status in ATIVOS
+
+    def pedir_cancelamento(self):
+        self._cancelar.set()
+
+    def verificar_cancelamento(self):
+        """Chamado entre os lotes; interrompe o processamento se cancelada"""
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+
+    def avancar(self, quantidade):
+        self.processadas += quantidade
+        self.verificar_cancelamento()
+
+    def registrar_lote(self, processadas, inseridas, atualizadas, inalteradas):
+        """Soma um lote já gravado (as contagens valem mesmo se a tarefa parar depois)"""
+        self.inseridas += inseridas
+        self.atualizadas += atualizadas
+        self.inalteradas += inalteradas
+        self.avancar(processadas)
+
+    def eta_segundos(self):
+        """Estimativa do tempo restante pela taxa de linhas processadas até agora"""
+        if self.status != PROCESSANDO or not self.total or not self.processadas:
+            return None
+        decorrido = time.time() - self.iniciada_em
+        return round(decorrido / self.processadas * (self.total - self.processadas), 1)
+
+    def como_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'arquivo': self.nome_arquivo,
+            'status': self.status,
+            'total': self.total,
+            'processadas': self.processadas,
+            'inseridas': self.inseridas,
+            'atualizadas': self.atualizadas,
+            'inalteradas': self.inalteradas,
+            'rejeitadas': self.rejeitadas,
+            'eta_segundos': self.eta_segundos(),
+            'relatorio': self.relatorio,
+            'erro': self.erro,
+        }
+
+
+class FilaTarefas:
+    """Pool de threads com limite de tarefas ativas e histórico das últimas concluídas"""
+
+    def __init__(self, max_trabalhadores=2, max_ativas=4, max_historico=50):
+        self.max_ativas = max_ativas
+        self.max_historico = max_historico
+        self._executor = ThreadPoolExecutor(max_workers=max_trabalhadores,
+                                            thread_name_prefix='importacao')
+        self._tarefas = {}
+        self._trava = threading.Lock()
+
+    def enviar(self, tarefa, funcao, *args):
+        """Agenda funcao(tarefa, *args); LimiteTarefasExcedido se a fila estiver cheia"""
+        with self._trava:
+            if sum(1 for t in self._tarefas.values() if t.ativa) >= self.max_ativas:
+                raise LimiteTarefasExcedido(
+                    f'Limite de {self.max_ativas} importações simultâneas atingido. Aguarde as atuais terminarem.'
+                )
+            self._tarefas[tarefa.id] = tarefa
+            self._limpar_historico()
+        self._executor.submit(self._executar, tarefa, funcao, *args)
+        return tarefa
+
+    def obter(self, id_tarefa):
+        with self._trava:
+            return self._tarefas.get(id_tarefa)
+
+    def cancelar(self, id_tarefa):
+        """Pede o cancelamento; retorna False se a tarefa não existe ou já terminou"""
+        tarefa = self.obter(id_tarefa)
+        if tarefa is None or not tarefa.ativa:
+            return False
+        tarefa.pedir_cancelamento()
+        return True
+
+    def _executar(self, tarefa, funcao, *args):
+        tarefa.iniciada_em = time.time()
+        try:
+            tarefa.verificar_cancelamento()
+            tarefa.status = PROCESSANDO
+            funcao(tarefa, *args)
+            tarefa.status = CONCLUIDA
+        except TarefaCancelada:
+            tarefa.status = CANCELADA
+        except Exception as e:
+            tarefa.erro = str(e)
+            tarefa.status = ERRO
+        finally:
+            tarefa.finalizada_em = time.time()
+
+    def _limpar_historico(self):
+        finalizadas = sorted((t for t in self._tarefas.values() if not t.ativa),
+                             key=lambda t: t.criada_em)
+        for tarefa in finalizadas[:max(0, len(finalizadas) - self.max_historico)]:
+            del self._tarefas[tarefa.id]
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+Orçamentos de consultas SQL de todas as rotas (ver verificar_orcamentos.py)
+Execute: python -m pytest -q
+"""
+
+from verificar_orcamentos import verificar
+
+
+def test_orcamentos_das_rotas():
+    linhas, falhas = verificar()
+    assert linhas
+    assert not falhas, "\n".join(falhas)
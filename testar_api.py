@@ -5,10 +5,11 @@ Script para testar a API e verificar dados
 Execute: python testar_api.py
 """
 
-from app import app, db, Evento, Transacao
+from app import create_app
+from modelos import db, Evento
 from datetime import datetime, date
 
-def verificar_dados():
+def verificar_dados(app):
     """Verifica os dados no banco"""
     with app.app_context():
         print("=== VERIFICANDO DADOS ===")
@@ -53,7 +54,7 @@ def verificar_dados():
         for s in servicos_query:
             print(f"  {s.tipo_servico}: {s.total} eventos")
 
-def testar_api():
+def testar_api(app):
     """Testa a API diretamente"""
     with app.app_context():
         print("\n=== TESTANDO API ===")
@@ -66,7 +67,8 @@ def testar_api():
 if __name__ == "__main__":
     print("🔍 DIAGNÓSTICO COMPLETO")
     print("=" * 50)
-    verificar_dados()
-    testar_api()
+    app = create_app()
+    verificar_dados(app)
+    testar_api(app)
     
     input("\nPressione Enter para continuar...")
\ No newline at end of file
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga: leitores e escritores simultâneos sobre um banco temporário
+Cada leitor/escritor é um processo separado (como vários usuários em servidores
+diferentes), então a disputa pelo banco é a mesma de um ambiente real.
+Mostra que, com o perfil 'producao' (ver banco.py), todos avançam sem 'database is locked'
+Execute: python teste_carga.py [--leitores 8] [--escritores 4] [--segundos 10] [--perfil producao]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+LEITURAS = ('/', '/caixa', '/eventos', '/api/eventos?limite=50', '/api/transacoes?limite=50')
+
+def preparar_banco(pasta, perfil):
+    """Aponta o app para um banco novo na pasta temporária e cria dados de exemplo"""
+    os.environ['FOTOGRAFIA_BANCO'] = 'sqlite:///' + os.path.join(pasta, 'carga.db')
+    os.environ['FOTOGRAFIA_BANCO_PERFIL'] = perfil
+    from app import create_app
+    from modelos import db, inicializar_banco
+
+    with create_app().app_context():
+        inicializar_banco()
+        with db.engine.begin() as conexao:
+            conexao.exec_driver_sql(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2000) "
+                "INSERT INTO evento (cliente, tipo_servico, data_evento, valor_negociado, valor_pago, status, ensaios_extras, data_cadastro) "
+                "SELECT 'Cliente ' || i, 'Fotografia', date('now', (i % 365 - 180) || ' days'), 1500, 0, 'Agendado', 'Nenhum', "
+                "datetime('now') FROM n"
+            )
+            conexao.exec_driver_sql(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000) "
+                "INSERT INTO transacao (tipo, valor, descricao, data_transacao, categoria) "
+                "SELECT CASE i % 2 WHEN 0 THEN 'Entrada' ELSE 'Saída' END, i % 300 + 10, 'Lançamento ' || i, "
+                "date('now', (i % 365 - 180) || ' days'), 'Outros' FROM n"
+            )
+            modo = conexao.exec_driver_sql("PRAGMA journal_mode").scalar()
+        db.engine.dispose()
+    return modo
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+def trabalhador(papel, numero, barreira, segundos):
+    """Roda em um processo próprio: repete requisições até o fim do teste"""
+    from app import create_app
+    
+    cliente = create_app().test_client()
+    tempos, erros, exemplos = [], 0, []
+    barreira.wait()  # Todos começam juntos, depois de importar o app
+    fim = time.time() + segundos
+    i = 0
+    while time.time() < fim:
+        comeco = time.perf_counter()
+        try:
+            if papel == 'leitor':
+                resposta = cliente.get(LEITURAS[i % len(LEITURAS)])
+            elif i % 2 == 0:
+                resposta = cliente.post(f'/evento/{(numero * 97 + i) % 2000 + 1}/pagar', json={'valor': 1})
+            else:
+                resposta = cliente.post('/transacao/nova', data={
+                    'tipo': 'Saída', 'valor': '12.50', 'descricao': f'Carga {numero}-{i}',
+                    'data_transacao': time.strftime('%Y-%m-%d'), 'categoria': 'Outros'
+                })
+            if resposta.status_code >= 500:
+                erros += 1
+                exemplos.append(resposta.get_data(as_text=True)[:200])
+        except Exception as e:
+            erros += 1
+            exemplos.append(str(e)[:200])
+        tempos.append(time.perf_counter() - comeco)
+        i += 1
+    return papel, numero, tempos, erros, exemplos
+
+def executar(leitores, escritores, segundos):
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Manager() as gerenciador:
+        barreira = gerenciador.Barrier(leitores + escritores)
+        tarefas = [('leitor', n, barreira, segundos) for n in range(leitores)]
+        tarefas += [('escritor', n, barreira, segundos) for n in range(escritores)]
+        with contexto.Pool(len(tarefas)) as pool:
+            return pool.starmap(trabalhador, tarefas)
+
+def relatorio(resultados, segundos):
+    """Imprime o resumo por papel e retorna True se todos avançaram sem erros"""
+    sucesso = True
+    for papel in ('leitor', 'escritor'):
+        do_papel = [r for r in resultados if r[0] == papel]
+        if not do_papel:
+            continue
+        tempos = [t for r in do_papel for t in r[2]]
+        erros = sum(r[3] for r in do_papel)
+        parados = [r[1] for r in do_papel if len(r[2]) - r[3] == 0]
+        print(f"{'📖' if papel == 'leitor' else '✏️ '} {len(do_papel)} {papel}es: {len(tempos)} requisições "
+              f"({len(tempos) / segundos:.1f}/s) | p50 {percentil(tempos, 0.5) * 1000:.0f} ms | "
+              f"p95 {percentil(tempos, 0.95) * 1000:.0f} ms | erros {erros}")
+        for exemplo in {e for r in do_papel for e in r[4]}:
+            print(f"   ❌ {exemplo}")
+        if parados:
+            print(f"   ❌ {papel}es sem nenhuma requisição concluída: {parados}")
+        sucesso = sucesso and erros == 0 and not parados
+    return sucesso
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga com leitores e escritores simultâneos")
+    parser.add_argument('--leitores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--perfil', default='producao', help="Perfil do banco (ver PERFIS em banco.py)")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='teste_carga_')
+    try:
+        modo = preparar_banco(pasta, args.perfil)
+        print(f"🔧 Perfil '{args.perfil}' (journal_mode={modo}) | {args.leitores} leitores, "
+              f"{args.escritores} escritores, {args.segundos:.0f}s")
+        resultados = executar(args.leitores, args.escritores, args.segundos)
+        ok = relatorio(resultados, args.segundos)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    print("✅ Todos avançaram sem erros de trava" if ok else "❌ Houve erros ou threads paradas")
+    sys.exit(0 if ok else 1)
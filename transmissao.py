@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Transmissão de mudanças para os navegadores abertos (Server-Sent Events)
+
+Um único Transmissor por processo atende todos os clientes de /api/stream:
+publicar() formata a mensagem uma vez e a coloca na fila de cada cliente
+conectado; cada conexão só lê da sua fila. As últimas mensagens ficam num
+histórico curto, então um navegador que reconecta (o EventSource envia o
+cabeçalho Last-Event-ID) recebe o que perdeu.
+
+Um cliente lento demais para acompanhar (fila cheia) é desconectado e
+reconecta sozinho, recuperando as mensagens pelo histórico. Sem mensagens,
+um comentário a cada INTERVALO_SINAL segundos mantém a conexão aberta.
+
+Cada conexão aberta ocupa uma thread do servidor; com mais de um processo
+(ex: gunicorn com vários workers), cada processo tem o seu transmissor e
+só avisa sobre as escritas que passaram por ele.
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+
+INTERVALO_SINAL = 15  # segundos
+ESPERA_RECONEXAO = 3000  # ms, sugerido ao navegador
+
+
+def formatar(id_mensagem, tipo, dados):
+    """Mensagem no formato text/event-stream"""
+    corpo = json.dumps(dados, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {id_mensagem}\nevent: {tipo}\ndata: {corpo}\n\n"
+
+
+class Transmissor:
+    """Distribui mensagens para todos os clientes conectados"""
+
+    def __init__(self, historico=200, fila_maxima=100):
+        self._trava = threading.Lock()
+        self._filas = set()
+        self._historico = deque(maxlen=historico)  # (id, mensagem formatada)
+        self._ultimo_id = 0
+        self._fila_maxima = fila_maxima
+        self._estado = {}
+
+    @property
+    def conectados(self):
+        with self._trava:
+            return len(self._filas)
+
+    def alterados(self, totais):
+        """Guarda os totais e retorna só os que mudaram desde a última chamada"""
+        with self._trava:
+            mudaram = {chave: valor for chave, valor in totais.items() if self._estado.get(chave) != valor}
+            self._estado.update(totais)
+        return mudaram
+
+    def publicar(self, tipo, dados):
+        """Envia a mensagem a todos os clientes e retorna o id dela"""
+        with self._trava:
+            self._ultimo_id += 1
+            mensagem = formatar(self._ultimo_id, tipo, dados)
+            self._historico.append((self._ultimo_id, mensagem))
+            for fila in list(self._filas):
+                try:
+                    fila.put_nowait(mensagem)
+                except queue.Full:
+                    # Desconecta; o navegador reconecta e recupera pelo histórico
+                    self._filas.discard(fila)
+                    while not fila.empty():
+                        fila.get_nowait()
+                    fila.put_nowait(None)
+            return self._ultimo_id
+
+    def assinar(self, ultimo_id=None):
+        """Registra um cliente; retorna (fila, perdidas)
+
+        perdidas: com ultimo_id, as mensagens do histórico posteriores a ele.
+        As publicadas depois da assinatura vão para a fila.
+        """
+        fila = queue.Queue(self._fila_maxima)
+        perdidas = []
+        with self._trava:
+            if ultimo_id is not None:
+                perdidas = [mensagem for id_mensagem, mensagem in self._historico if id_mensagem > ultimo_id]
+                perdidas = perdidas[-self._fila_maxima:]
+            self._filas.add(fila)
+        return fila, perdidas
+
+    def cancelar(self, fila):
+        with self._trava:
+            self._filas.discard(fila)
+
+    def fluxo(self, fila, perdidas=(), inicial=None, intervalo=INTERVALO_SINAL):
+        """Gerador do corpo da resposta de uma conexão assinada (até o cliente desconectar)
+
+        Envia as mensagens perdidas, depois inicial, depois a fila. inicial:
+        (tipo, dados) sem id, calculado depois de assinar (ex: os totais atuais).
+        As perdidas vêm antes porque carregam os totais da época em que foram
+        publicadas; enviadas depois, voltariam a tela para valores antigos.
+        """
+        try:
+            yield f"retry: {ESPERA_RECONEXAO}\n\n"
+            yield from perdidas
+            if inicial:
+                corpo = json.dumps(inicial[1], ensure_ascii=False, separators=(',', ':'))
+                yield f"event: {inicial[0]}\ndata: {corpo}\n\n"
+            while True:
+                try:
+                    mensagem = fila.get(timeout=intervalo)
+                except queue.Empty:
+                    yield ": sinal\n\n"
+                    continue
+                if mensagem is None:
+                    return
+                yield mensagem
+        finally:
+            self.cancelar(fila)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para verificar se as consultas das rotas usam os índices
+Executa as rotas e os caminhos de escrita, captura o SQL emitido e roda EXPLAIN QUERY PLAN
+em cada SELECT, INSERT ... SELECT, UPDATE e DELETE. As escritas rodam numa transação
+desfeita no final (o banco não muda). A reconciliação completa fica de fora: ela passa
+por todos os eventos de propósito.
+Uma varredura completa (SCAN sem índice) em evento ou transacao é reportada como falha.
+Execute: python verificar_indices.py
+"""
+
+import re
+import sys
+
+from datetime import date
+
+from sqlalchemy import event
+
+from app import create_app
+from banco import escrita
+from modelos import db, inicializar_banco
+
+ROTAS = {
+    'dashboard()': '/',
+    'caixa()': '/caixa',
+    'alertas_eventos()': '/api/alertas-eventos',
+}
+
+def _pagamento():
+    """Pagamento de um evento agendado (UPDATE do evento, reconciliação e alertas só dele)"""
+    from rotas_eventos import registrar_pagamentos
+
+    evento_id = db.session.execute(db.text(
+        "SELECT id FROM evento WHERE status = 'Agendado' ORDER BY id LIMIT 1")).scalar()
+    if evento_id is not None:
+        registrar_pagamentos([(evento_id, 1.0, date.today())])
+
+def _alertas_do_dia():
+    """Geração diária dos alertas (INSERT ... SELECT por faixa de data_evento)"""
+    from servicos import atualizar_alertas
+
+    atualizar_alertas(db.session.connection())
+
+# Caminhos de escrita, executados na transação da sessão e desfeitos depois
+ESCRITAS = {
+    'registrar_pagamentos()': _pagamento,
+    'atualizar_alertas()': _alertas_do_dia,
+}
+
+VARREDURA_COMPLETA = re.compile(r'^SCAN (evento|transacao)\b(?!.*USING (COVERING )?INDEX)')
+PLANEJAVEIS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+def capturar_consultas(executar):
+    """Chama executar() e retorna os comandos planejáveis emitidos com seus parâmetros"""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(PLANEJAVEIS):
+            # executemany: o plano é o mesmo para todos os conjuntos de parâmetros
+            consultas.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        executar()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    return consultas
+
+def requisitar(app, url):
+    with app.test_client() as client:
+        resposta = client.get(url)
+        if resposta.status_code != 200:
+            raise RuntimeError(f"{url} respondeu {resposta.status_code}")
+
+def analisar(consultas):
+    """Imprime o plano de cada comando; retorna False se algum faz varredura completa"""
+    ok = True
+    for statement, parameters in consultas:
+        plano = db.session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+        detalhes = [linha[-1] for linha in plano]
+        if not detalhes:
+            continue  # INSERT ... VALUES e afins: nada é lido
+        varreduras = [d for d in detalhes if VARREDURA_COMPLETA.match(d)]
+        print(("❌ " if varreduras else "✅ ") + " ".join(statement.split())[:100])
+        for detalhe in detalhes:
+            print(f"     {detalhe}")
+        ok = ok and not varreduras
+    return ok
+
+def verificar():
+    """Retorna True se nenhuma consulta das rotas e das escritas faz varredura completa"""
+    ok = True
+    app = create_app()
+    with app.app_context():
+        inicializar_banco()
+        for nome, url in ROTAS.items():
+            print(f"\n=== {nome} ({url}) ===")
+            ok = analisar(capturar_consultas(lambda: requisitar(app, url))) and ok
+        for nome, executar in ESCRITAS.items():
+            print(f"\n=== {nome} (desfeito no final) ===")
+            with escrita():
+                try:
+                    # Os planos saem dentro da mesma transação (tabelas temporárias ainda existem)
+                    ok = analisar(capturar_consultas(executar)) and ok
+                finally:
+                    db.session.rollback()
+    return ok
+
+if __name__ == "__main__":
+    print("🔍 VERIFICANDO USO DE ÍNDICES")
+    print("=" * 50)
+    if verificar():
+        print("\n✅ Todas as consultas usam índices")
+    else:
+        print("\n❌ Há consultas com varredura completa. Execute: python atualizar_banco.py")
+        sys.exit(1)
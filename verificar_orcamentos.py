@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificação dos orçamentos de consultas SQL de todas as rotas (ver orcamento_consultas em metricas.py)
+Gera bancos sintéticos de dois tamanhos (ver dados_sinteticos.py) e chama cada rota do app (rotas_*.py)
+em modo de teste, onde passar do orçamento levanta OrcamentoExcedido. Falha também se:
+- alguma rota não declara orçamento ou não tem requisição de teste aqui;
+- o orçamento passa de FOLGA_MAXIMA acima do medido (ou não é 0 numa rota que não consulta o banco);
+- a quantidade de consultas de uma rota cresce com o volume de dados (consulta por linha, N+1);
+- alguma rota responde com erro 500.
+Execute: python verificar_orcamentos.py [--tamanhos 300 3000]  (ou pytest, ver test_orcamentos.py)
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+TAMANHOS_PADRAO = (300, 3000)
+FOLGA_MAXIMA = 2  # consultas de sobra no orçamento, acima do medido
+
+# endpoint -> (método, url, argumentos do test client); {evento}, {entrada}, {saida}, {alerta}
+# e {tarefa} são preenchidos com registros do banco gerado. Na ordem: leituras, escritas e as leituras
+# que recalculam o que as escritas deixaram pendente ('endpoint (caso)' repete a rota; ver PREPARACOES).
+REQUISICOES = {
+    'eventos.dashboard': ('GET', '/', {}),
+    'eventos.listar_eventos': ('GET', '/eventos?status=Agendado', {}),
+    'caixa.caixa': ('GET', '/caixa', {}),
+    'planilhas.importar': ('GET', '/importar', {}),
+    'api.dashboard_data': ('GET', '/api/dashboard-data', {}),
+    'api.api_analise': ('GET', '/api/analise', {}),
+    'api.api_fluxo_caixa': ('GET', '/api/fluxo-caixa?periodo=mes', {}),
+    'api.api_eventos': ('GET', '/api/eventos?totais=1&html=1&limite=50', {}),
+    'api.api_transacoes': ('GET', '/api/transacoes?lista=pendentes&html=1&limite=50', {}),
+    'api.api_busca': ('GET', '/api/busca?q=silva', {}),
+    'api.eventos_calendario': ('GET', '/api/eventos-calendario?formato=colunas', {}),
+    'api.api_evento': ('GET', '/api/evento/{evento}', {}),
+    'api.api_linhas': ('GET', '/api/linhas?entidade=transacao&ids={entrada},{saida}&eventos={evento}', {}),
+    'api.alertas_eventos': ('GET', '/api/alertas-eventos?todos=1', {}),
+    'api.api_stream': ('GET', '/api/stream', {}),
+    'planilhas.exportar_eventos': ('GET', '/exportar/eventos?formato=csv', {}),
+    'planilhas.exportar_transacoes': ('GET', '/exportar/transacoes?formato=csv', {}),
+    'metricas': ('GET', '/metrics', {}),
+    'consultas_lentas': ('GET', '/metrics/consultas-lentas', {}),
+    'planilhas.baixar_rejeicoes': ('GET', '/importar/rejeicoes/inexistente.csv', {}),
+    'eventos.novo_evento': ('POST', '/evento/novo', {'data': {
+        'cliente': 'Orçamento', 'tipo_servico': 'Fotografia', 'data_evento': '2030-01-05', 'valor_negociado': '1500'}}),
+    'api.reconhecer_alerta': ('POST', '/api/alertas/{alerta}/reconhecer', {}),
+    'eventos.registrar_pagamento': ('POST', '/evento/{evento}/pagar', {'json': {'valor': 10}}),
+    'eventos.registrar_pagamentos_lote': ('POST', '/pagamentos/lote', {'json': {'pagamentos': [
+        {'evento_id': 1, 'valor': 5}, {'evento_id': 2, 'valor': 5}, {'evento_id': 3, 'valor': 5}]}}),
+    'eventos.editar_evento': ('POST', '/evento/{evento}/editar', {'json': {'observacoes': 'Orçamento de consultas'}}),
+    'caixa.nova_transacao': ('POST', '/transacao/nova', {'data': {
+        'tipo': 'Saída', 'valor': '42.50', 'descricao': 'Verificação', 'data_transacao': '2024-01-15',
+        'categoria': 'Outros'}}),
+    'caixa.reverter_pagamento': ('POST', '/transacao/{entrada}/reverter', {}),
+    'caixa.excluir_transacao': ('POST', '/transacao/{saida}/excluir', {}),
+    'eventos.excluir_evento': ('POST', '/evento/{evento}/excluir', {}),
+    'api.dashboard_data (meses pendentes)': ('GET', '/api/dashboard-data', {}),
+    'api.api_analise (meses pendentes)': ('GET', '/api/analise', {}),
+    'api.alertas_eventos (alertas de ontem)': ('GET', '/api/alertas-eventos?todos=1', {}),
+    'planilhas.importar_eventos': ('POST', '/importar/eventos', {'arquivo': (
+        'eventos.csv', 'cliente,tipo_servico,data_evento,valor_negociado\nOrçamento,Fotografia,2030-01-05,1500\n')}),
+    'planilhas.importar_transacoes': ('POST', '/importar/transacoes', {'arquivo': (
+        'transacoes.csv', 'tipo,valor,descricao,data_transacao\nSaída,10,Orçamento,2024-01-05\n')}),
+    'planilhas.status_importacao': ('GET', '/importar/status/{tarefa}', {}),
+    'planilhas.cancelar_importacao': ('POST', '/importar/cancelar/{tarefa}', {}),
+}
+
+# Comandos executados antes da requisição (fora da contagem): o pior caso dos recálculos na leitura
+PREPARACOES = {
+    'api.dashboard_data (meses pendentes)': "INSERT OR IGNORE INTO analise_meses_pendentes (mes) "
+                                            "SELECT DISTINCT strftime('%Y-%m', data_evento) FROM evento",
+    'api.api_analise (meses pendentes)': "INSERT OR IGNORE INTO analise_meses_pendentes (mes) "
+                                         "SELECT DISTINCT strftime('%Y-%m', data_transacao) FROM transacao",
+    'api.alertas_eventos (alertas de ontem)': "UPDATE alerta_execucao SET dia = '2000-01-01'",
+}
+
+def _endpoint(chave):
+    return chave.split(' (')[0]
+
+def _argumentos(extras):
+    argumentos = dict(extras)
+    if 'arquivo' in argumentos:
+        nome, conteudo = argumentos.pop('arquivo')
+        argumentos['data'] = {'arquivo': (io.BytesIO(conteudo.encode('utf-8')), nome)}
+        argumentos['headers'] = {'Accept': 'application/json'}
+    return argumentos
+
+def verificar_tamanho(eventos, pasta):
+    """Roda em um processo próprio: banco novo, todas as rotas; retorna {chave de REQUISICOES: (consultas, erro)}"""
+    os.makedirs(pasta)
+    os.chdir(pasta)  # uploads/ e rejeições ficam na pasta temporária
+    os.environ['FOTOGRAFIA_BANCO'] = 'sqlite:///' + os.path.join(pasta, f'orcamentos_{eventos}.db')
+    from app import create_app
+    from dados_sinteticos import gerar_dados
+    from metricas import OrcamentoExcedido
+    from modelos import db, inicializar_banco
+    from servicos import atualizar_alertas, limpar_caches
+    from sqlalchemy import event
+
+    app = create_app({'TESTING': True})
+    with app.app_context():
+        inicializar_banco()
+        with db.engine.begin() as conexao:
+            gerar_dados(conexao, eventos)
+            atualizar_alertas(conexao)
+            valores = {
+                'evento': conexao.exec_driver_sql(
+                    "SELECT evento_id FROM transacao WHERE tipo = 'Entrada' AND evento_id IS NOT NULL "
+                    "ORDER BY id LIMIT 1").scalar(),
+                'saida': conexao.exec_driver_sql("SELECT MIN(id) FROM transacao WHERE tipo = 'Saída'").scalar(),
+                'alerta': conexao.exec_driver_sql("SELECT MIN(id) FROM alerta").scalar(),
+            }
+            valores['entrada'] = conexao.exec_driver_sql(
+                "SELECT MIN(id) FROM transacao WHERE tipo = 'Entrada' AND evento_id = ?", (valores['evento'],)
+            ).scalar()
+
+        consultas = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def contar(*_):
+            if threading.current_thread() is threading.main_thread():  # Sem as importações em segundo plano
+                consultas[0] += 1
+
+    cliente = app.test_client()
+    resultados = {}
+    for endpoint, (metodo, url, extras) in REQUISICOES.items():
+        if endpoint in PREPARACOES:
+            with app.app_context(), db.engine.begin() as conexao:
+                conexao.exec_driver_sql(PREPARACOES[endpoint])
+        limpar_caches(app)
+        consultas[0] = 0
+        erro = None
+        try:
+            resposta = cliente.open(url.format(**valores), method=metodo, **_argumentos(extras))
+            if endpoint == 'api.api_stream':
+                resposta.close()  # Só a parte da requisição (o corpo do stream não tem fim)
+            else:
+                resposta.get_data()  # Corpos em streaming (exportações) consultam o banco enquanto são lidos
+            if resposta.status_code >= 500:
+                erro = f"HTTP {resposta.status_code}"
+            if endpoint.startswith('planilhas.importar_') and resposta.status_code == 202:
+                valores['tarefa'] = resposta.get_json()['tarefa']
+        except OrcamentoExcedido as e:
+            erro = str(e)
+        resultados[endpoint] = (consultas[0], erro)
+    return resultados
+
+def orcamentos_declarados():
+    """{endpoint: orçamento declarado (None se não declarou)} de todas as rotas do app"""
+    from app import create_app
+
+    app = create_app()
+    return {
+        regra.endpoint: getattr(app.view_functions[regra.endpoint], 'orcamento_consultas', None)
+        for regra in app.url_map.iter_rules() if regra.endpoint != 'static'
+    }
+
+def verificar(tamanhos=TAMANHOS_PADRAO):
+    """Mede todas as rotas nos dois tamanhos; retorna (linhas da tabela, falhas)"""
+    contexto = multiprocessing.get_context('spawn')  # Um processo por banco (engine, caches e triggers isolados)
+    pasta = tempfile.mkdtemp(prefix='orcamentos_')
+    try:
+        with contexto.Pool(1) as pool:
+            orcamentos = pool.apply(orcamentos_declarados)
+        medidas = []
+        for eventos in tamanhos:
+            with contexto.Pool(1) as pool:
+                medidas.append(pool.apply(verificar_tamanho, (eventos, os.path.join(pasta, str(eventos)))))
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    linhas, falhas = [], []
+    for endpoint in sorted(set(orcamentos) - {_endpoint(chave) for chave in REQUISICOES}):
+        falhas.append(f"{endpoint}: sem requisição em REQUISICOES")
+    maximos = {}
+    for chave in sorted(REQUISICOES):
+        endpoint = _endpoint(chave)
+        if endpoint not in orcamentos:
+            falhas.append(f"{chave}: está em REQUISICOES, mas não existe no app")
+            continue
+        if orcamentos[endpoint] is None and endpoint == chave:
+            falhas.append(f"{endpoint}: sem orcamento_consultas")
+        (pequeno, erro_pequeno), (grande, erro_grande) = (medida[chave] for medida in medidas)
+        for erro in {erro_pequeno, erro_grande} - {None}:
+            falhas.append(f"{chave}: {erro}")
+        if grande > pequeno:
+            falhas.append(f"{chave}: consultas crescem com os dados ({pequeno} -> {grande})")
+        maximos[endpoint] = max(maximos.get(endpoint, 0), grande)
+        linhas.append((chave, orcamentos[endpoint] if orcamentos[endpoint] is not None else '-', pequeno, grande))
+    for endpoint, grande in sorted(maximos.items()):  # O orçamento cobre o caso mais caro da rota
+        orcamento = orcamentos[endpoint]
+        folga = FOLGA_MAXIMA if grande else 0
+        if orcamento is not None and orcamento > grande + folga:
+            falhas.append(f"{endpoint}: orçamento {orcamento} muito acima do medido ({grande}); use {grande + folga}")
+    return linhas, falhas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica os orçamentos de consultas de todas as rotas")
+    parser.add_argument('--tamanhos', type=int, nargs=2, default=list(TAMANHOS_PADRAO),
+                        help="eventos no banco menor e no maior")
+    args = parser.parse_args()
+
+    linhas, falhas = verificar(args.tamanhos)
+    menor, maior = args.tamanhos
+    print(f"🧮 Consultas SQL por rota ({menor} e {maior} eventos)")
+    print(f"   {'rota':<45} {'orçamento':>9} {menor:>8} {maior:>8}")
+    for chave, orcamento, pequeno, grande in linhas:
+        print(f"   {chave:<45} {orcamento:>9} {pequeno:>8} {grande:>8}")
+    for falha in falhas:
+        print(f"   ❌ {falha}")
+    print("✅ Todas as rotas dentro do orçamento" if not falhas else f"❌ {len(falhas)} problemas")
+    sys.exit(1 if falhas else 0)
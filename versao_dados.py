@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Contador de versão dos dados
+
+A tabela versao_dados tem uma única linha cujo número aumenta a cada INSERT,
+UPDATE ou DELETE em evento ou transacao (triggers, na mesma transação da
+escrita). As APIs usam esse número para gerar ETags e invalidar o cache de
+respostas: se a versão não mudou, a resposta anterior continua válida.
+
+Cada linha de evento e transacao também guarda, na coluna versao, o valor do
+contador na sua última escrita. Como o contador só cresce, (id, versao)
+identifica o conteúdo da linha mesmo se um id for reaproveitado depois de
+uma exclusão; é a chave do cache de linhas renderizadas das tabelas.
+
+Com a versão por linha instalada, os triggers de INSERT e UPDATE da linha
+incrementam o contador e os do contador ficam só para o DELETE: cada escrita
+incrementa a versão uma única vez. Os triggers de UPDATE listam as colunas
+(todas menos versao), para que gravar a versão na linha não conte como outra
+escrita; migrações que acrescentarem colunas devem chamar
+instalar_versao_linhas() de novo.
+"""
+
+TABELAS = ('evento', 'transacao')
+OPERACOES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def _colunas_dados(conexao, tabela):
+    """Colunas da tabela exceto versao (a escrita da própria versão não é uma alteração)"""
+    return [linha[1] for linha in conexao.exec_driver_sql(f"PRAGMA table_info({tabela})") if linha[1] != 'versao']
+
+
+def instalar_contador(conexao):
+    """Cria a tabela do contador e os triggers que o incrementam (idempotente)"""
+    conexao.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS versao_dados (id INTEGER PRIMARY KEY CHECK (id = 1), versao INTEGER NOT NULL)"
+    )
+    conexao.exec_driver_sql("INSERT OR IGNORE INTO versao_dados (id, versao) VALUES (1, 1)")
+    for tabela in TABELAS:
+        for operacao in OPERACOES:
+            gatilho = operacao
+            if operacao == 'UPDATE':
+                gatilho = f"UPDATE OF {', '.join(_colunas_dados(conexao, tabela))}"
+            conexao.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS versao_{tabela}_{operacao.lower()} AFTER {gatilho} ON {tabela}\n"
+                f"BEGIN\n    UPDATE versao_dados SET versao = versao + 1 WHERE id = 1;\nEND"
+            )
+
+
+def instalar_versao_linhas(conexao):
+    """(Re)cria os triggers que gravam a versão em cada linha inserida ou alterada
+
+    Eles incrementam o contador, então substituem os triggers de INSERT e
+    UPDATE de instalar_contador().
+    """
+    for tabela in TABELAS:
+        for nome in (f'versao_{tabela}_insert', f'versao_{tabela}_update', f'versao_linha_{tabela}_update'):
+            conexao.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nome}")
+        # Incrementa o contador e copia o valor na mesma execução: a ordem dos triggers não importa
+        corpo = (
+            "BEGIN\n"
+            "    UPDATE versao_dados SET versao = versao + 1 WHERE id = 1;\n"
+            f"    UPDATE {tabela} SET versao = (SELECT versao FROM versao_dados WHERE id = 1) WHERE id = NEW.id;\n"
+            "END"
+        )
+        conexao.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS versao_linha_{tabela}_insert AFTER INSERT ON {tabela}\n{corpo}"
+        )
+        # Sem versao na lista: o UPDATE do corpo não dispara o trigger de novo
+        conexao.exec_driver_sql(
+            f"CREATE TRIGGER versao_linha_{tabela}_update "
+            f"AFTER UPDATE OF {', '.join(_colunas_dados(conexao, tabela))} ON {tabela}\n"
+            f"WHEN NEW.versao = OLD.versao\n{corpo}"
+        )
+
+
+def incrementar_versao(conexao):
+    """Invalida ETags e respostas em cache após uma escrita fora de evento/transacao"""
+    conexao.exec_driver_sql("UPDATE versao_dados SET versao = versao + 1 WHERE id = 1")
+
+
+def ler_versao(conexao):
+    """Retorna a versão atual dos dados"""
+    return conexao.exec_driver_sql("SELECT versao FROM versao_dados WHERE id = 1").scalar() or 0